@@ -0,0 +1,335 @@
+"""
+Registers many control points with batched FFT phase correlation.
+
+Registering points one task at a time schedules a small FFT per point and angle.  Here the
+target and rotated source regions of interest for a batch of points are stacked into 3-D
+arrays and transformed together with scipy.fft, which spreads the batch across threads.
+Regions are built by nornir's BuildAlignmentROIs on a thread pool and padded with nornir's
+PadImageForPhaseCorrelation.  Each correlation image is scored by nornir's FindPeak, so peaks
+and weights follow nornir_imageregistration.FindOffset(target_roi, source_roi): the (Y,X)
+offset of the correlation peak from the center of the correlation image.
+
+The batched path is off by default.  compare_with_point_registration reports how far its
+results are from registering each point with pyre.point_registration.align_point, see
+scripts/check_batch_registration.py.
+"""
+from __future__ import annotations
+
+import hashlib
+from typing import Generator, Iterable, NamedTuple, Sequence
+
+import numpy as np
+from numpy.typing import NDArray
+import scipy.fft
+import scipy.ndimage
+
+import nornir_imageregistration
+from nornir_imageregistration import ImagePermutationHelper
+import nornir_pools
+from pyre.interfaces.managers.roi_cache import IRegistrationROICache, ROICacheKey
+import pyre.point_registration
+
+_geometry_samples = 9  # Samples per axis of the transform over a region when computing its cache digest
+
+
+class BatchPhaseCorrelation:
+    """
+    Phase correlates stacks of regions of interest.  Regions are padded with noise to twice their
+    size so the circular correlation does not wrap, as nornir pads them for a single correlation.
+    """
+    _alignment_area: tuple[int, int]
+    _angles: NDArray[np.floating]
+    _padded_shape: tuple[int, int]
+    _max_batch: int
+    _workers: int
+
+    @property
+    def alignment_area(self) -> tuple[int, int]:
+        return self._alignment_area
+
+    @property
+    def angles(self) -> NDArray[np.floating]:
+        return self._angles
+
+    @property
+    def padded_shape(self) -> tuple[int, int]:
+        """Shape regions are padded to before the FFT"""
+        return self._padded_shape
+
+    def __init__(self,
+                 alignment_area: NDArray | tuple[int, int],
+                 angles: Iterable[float],
+                 max_batch: int = 64,
+                 workers: int = -1):
+        """
+        :param alignment_area: (height, width) of the regions of interest
+        :param angles: Rotations in degrees applied to the source region, the best scoring angle is returned
+        :param max_batch: Maximum point/angle correlations held in memory at once
+        :param workers: Threads used by scipy.fft, -1 uses every core
+        """
+        self._alignment_area = (int(alignment_area[0]), int(alignment_area[1]))
+        self._angles = np.asarray(list(angles), dtype=np.float64)
+        if self._angles.size == 0:
+            self._angles = np.zeros(1)
+
+        self._padded_shape = (scipy.fft.next_fast_len(2 * self._alignment_area[0], real=True),
+                              scipy.fft.next_fast_len(2 * self._alignment_area[1], real=True))
+        self._max_batch = max(1, int(max_batch))
+        self._workers = workers
+
+    def build_rois(self,
+                   transform: nornir_imageregistration.ITransform,
+                   target: ImagePermutationHelper,
+                   source: ImagePermutationHelper,
+                   target_points: NDArray) -> tuple[NDArray, NDArray]:
+        """
+        Cut the target regions and the source regions warped into target space for each point
+        :return: (target_rois, source_rois), each with shape (points, height, width)
+        """
+        target_rois = np.empty((len(target_points), *self._alignment_area), dtype=np.float32)
+        source_rois = np.empty((len(target_points), *self._alignment_area), dtype=np.float32)
+
+        # Building a region warps it through the transform, the slowest step of a batch.  The regions are built
+        # concurrently, most of the work is in numpy and scipy calls that release the GIL.
+        pool = nornir_pools.GetGlobalThreadPool()
+        tasks = [pool.add_task(f"Build alignment ROIs {i}",
+                               nornir_imageregistration.local_distortion_correction.BuildAlignmentROIs,
+                               transform=transform,
+                               targetImage_param=target.ImageWithMaskAsNoise,
+                               sourceImage_param=source.ImageWithMaskAsNoise,
+                               target_image_stats=target.Stats,
+                               source_image_stats=source.Stats,
+                               target_controlpoint=point,
+                               alignmentArea=self._alignment_area)
+                 for i, point in enumerate(target_points)]
+
+        for i, task in enumerate(tasks):
+            target_rois[i], source_rois[i] = task.wait_return()
+
+        return target_rois, source_rois
+
+    def _pad(self, rois: NDArray) -> NDArray:
+        """Pad a (..., height, width) stack of regions with noise matching each region, as nornir pads one region"""
+        padded_height, padded_width = self._padded_shape
+        flat = rois.reshape(-1, *rois.shape[-2:])
+        padded = np.empty((flat.shape[0], padded_height, padded_width), dtype=np.float32)
+        for i, roi in enumerate(flat):
+            padded[i] = nornir_imageregistration.PadImageForPhaseCorrelation(roi,
+                                                                             NewWidth=padded_width,
+                                                                             NewHeight=padded_height,
+                                                                             PowerOfTwo=False)
+        return padded.reshape(*rois.shape[:-2], padded_height, padded_width)
+
+    def target_ffts(self, target_rois: NDArray) -> NDArray:
+        """FFTs of a (points, height, width) stack of target regions"""
+        return scipy.fft.rfft2(self._pad(target_rois), workers=self._workers)
+
+    def rotated_source_ffts(self, source_rois: NDArray) -> NDArray:
+        """FFTs of a (points, height, width) stack of source regions at every search angle, shape (points, angles, ...)"""
+        rotated = np.empty((source_rois.shape[0], len(self._angles), *self._alignment_area), dtype=np.float32)
+        for i_angle, angle in enumerate(self._angles):
+            if angle == 0:
+                rotated[:, i_angle] = source_rois
+                continue
+
+            # axes=(2, 1) rotates each (Y,X) region as scipy.ndimage.rotate rotates a single 2-D image with its default
+            # axes=(1, 0), so angles turn the same way as they do for one region
+            rotated[:, i_angle] = scipy.ndimage.rotate(source_rois, angle, axes=(2, 1), reshape=False, order=1,
+                                                       mode='constant', cval=np.nan)
+
+        # Corners uncovered by a rotation are filled with noise matching the region, as padding is
+        uncovered = np.isnan(rotated)
+        if np.any(uncovered):
+            mean = np.nanmean(rotated, axis=(-2, -1), keepdims=True)
+            std = np.nanstd(rotated, axis=(-2, -1), keepdims=True)
+            noise = np.random.standard_normal(rotated.shape).astype(np.float32) * std + mean
+            rotated[uncovered] = noise[uncovered]
+
+        return scipy.fft.rfft2(self._pad(rotated), workers=self._workers)
+
+    def correlate(self, target_ffts: NDArray, source_ffts: NDArray) -> tuple[NDArray, NDArray]:
+        """
+        Phase correlate target FFTs (points, ...) with source FFTs (points, angles, ...)
+        :return: (peaks, weights) with shapes (points, angles, 2) and (points, angles)
+        """
+        cross = np.conj(target_ffts[:, np.newaxis]) * source_ffts
+        magnitude = np.abs(cross)
+        np.divide(cross, magnitude, out=cross, where=magnitude > 0)
+        correlation = scipy.fft.irfft2(cross, s=self._padded_shape, workers=self._workers)
+        correlation = scipy.fft.fftshift(correlation, axes=(-2, -1))
+
+        # Each correlation image is scored as nornir scores one, by the offset from the image center and summed
+        # strength of the brightest peak
+        num_points, num_angles, height, width = correlation.shape
+        peaks = np.empty((num_points, num_angles, 2), dtype=np.float64)
+        weights = np.empty((num_points, num_angles), dtype=np.float64)
+        for i_point in range(num_points):
+            for i_angle in range(num_angles):
+                peak, weight = nornir_imageregistration.FindPeak(correlation[i_point, i_angle])
+                peaks[i_point, i_angle] = peak
+                weights[i_point, i_angle] = weight
+
+        return peaks, weights
+
+    def _records(self, peaks: NDArray, weights: NDArray) -> list[nornir_imageregistration.AlignmentRecord]:
+        """The best scoring angle of each point as an AlignmentRecord"""
+        best = weights.argmax(axis=1)
+        return [nornir_imageregistration.AlignmentRecord(peak=tuple(peaks[i, a]),
+                                                         weight=float(weights[i, a]),
+                                                         angle=float(self._angles[a]))
+                for i, a in enumerate(best)]
+
+    def geometry_digests(self,
+                         transform: nornir_imageregistration.ITransform,
+                         target_points: NDArray) -> tuple[list[bytes], list[bytes]]:
+        """
+        Digests identifying the target and source regions of each point for the ROI cache.  The source
+        digest samples the transform on a grid over the region, so moving the point or any control point
+        that changes the mapping of the grid produces a different digest.
+        :return: (target digests, source digests)
+        """
+        height, width = self._alignment_area
+        grid_y, grid_x = np.meshgrid(np.linspace(-height / 2, height / 2, _geometry_samples),
+                                     np.linspace(-width / 2, width / 2, _geometry_samples),
+                                     indexing='ij')
+        grid = np.column_stack((grid_y.ravel(), grid_x.ravel()))
+
+        samples = (target_points[:, np.newaxis, :] + grid[np.newaxis, :, :]).reshape(-1, 2)
+        mapped = np.asarray(transform.InverseTransform(samples), dtype=np.float64)
+        mapped = np.round(mapped, 3).reshape(len(target_points), -1, 2)
+
+        shape = np.asarray(self._alignment_area, dtype=np.int64).tobytes()
+        target_digests = []
+        source_digests = []
+        for point, point_mapped in zip(np.round(np.asarray(target_points, dtype=np.float64), 3), mapped):
+            target_digests.append(hashlib.blake2b(shape + point.tobytes(), digest_size=16).digest())
+            source_digests.append(hashlib.blake2b(shape + point.tobytes() + point_mapped.tobytes(),
+                                                  digest_size=16).digest())
+
+        return target_digests, source_digests
+
+    def _batch_rois(self,
+                    transform: nornir_imageregistration.ITransform,
+                    target: ImagePermutationHelper,
+                    source: ImagePermutationHelper,
+                    indices: Sequence[int],
+                    target_points: NDArray,
+                    cache: IRegistrationROICache | None) -> tuple[NDArray, NDArray]:
+        """Target and source regions for a batch of points, only regions missing from the cache are built"""
+        if cache is None:
+            return self.build_rois(transform, target, source, target_points)
+
+        target_digests, source_digests = self.geometry_digests(transform, target_points)
+        target_keys = [ROICacheKey('target', index, digest) for index, digest in zip(indices, target_digests)]
+        source_keys = [ROICacheKey('source', index, digest) for index, digest in zip(indices, source_digests)]
+
+        target_rois = [cache.get(key) for key in target_keys]
+        source_rois = [cache.get(key) for key in source_keys]
+        missing = [i for i in range(len(indices)) if target_rois[i] is None or source_rois[i] is None]
+
+        if len(missing) > 0:
+            missing_target_rois, missing_source_rois = self.build_rois(transform, target, source,
+                                                                       target_points[missing])
+
+            # Copies so a cached entry does not keep the whole batch alive
+            for j, i in enumerate(missing):
+                target_rois[i] = missing_target_rois[j].copy()
+                source_rois[i] = missing_source_rois[j].copy()
+                cache.put(target_keys[i], target_rois[i])
+                cache.put(source_keys[i], source_rois[i])
+
+        return np.stack(target_rois), np.stack(source_rois)
+
+    def align_batches(self,
+                      transform: nornir_imageregistration.ITransform,
+                      target: ImagePermutationHelper,
+                      source: ImagePermutationHelper,
+                      indices: Sequence[int],
+                      target_points: NDArray,
+                      cache: IRegistrationROICache | None = None) -> Generator[
+        dict[int, nornir_imageregistration.AlignmentRecord], None, None]:
+        """
+        Register control points in batches, yielding the records of each batch as it completes
+        :param indices: Control point index of each target point, used as keys of the result
+        :param target_points: (Y,X) target space position of each control point
+        :param cache: Regions from earlier runs, points whose regions have not changed are not rebuilt
+        """
+        target_points = np.asarray(target_points)
+        points_per_batch = max(1, self._max_batch // len(self._angles))
+
+        for start in range(0, len(indices), points_per_batch):
+            batch_indices = indices[start:start + points_per_batch]
+            target_rois, source_rois = self._batch_rois(transform, target, source, batch_indices,
+                                                        target_points[start:start + points_per_batch], cache)
+            peaks, weights = self.correlate(self.target_ffts(target_rois), self.rotated_source_ffts(source_rois))
+            yield dict(zip(batch_indices, self._records(peaks, weights)))
+
+    def align(self,
+              transform: nornir_imageregistration.ITransform,
+              target: ImagePermutationHelper,
+              source: ImagePermutationHelper,
+              indices: Sequence[int],
+              target_points: NDArray,
+              cache: IRegistrationROICache | None = None) -> dict[int, nornir_imageregistration.AlignmentRecord]:
+        """
+        Register control points in batches
+        :return: Alignment record for each control point index
+        """
+        results = {}
+        for batch in self.align_batches(transform, target, source, indices, target_points, cache):
+            results.update(batch)
+
+        return results
+
+
+class RegistrationDifference(NamedTuple):
+    """Difference between registering a control point in a batch and with pyre.point_registration.align_point"""
+    index: int  # Index of the control point
+    batched: nornir_imageregistration.AlignmentRecord
+    single: nornir_imageregistration.AlignmentRecord | None
+
+    @property
+    def peak_distance(self) -> float:
+        """Distance between the peaks in pixels, infinite if the single point registration failed"""
+        if self.single is None:
+            return np.inf
+        return float(np.linalg.norm(np.asarray(self.batched.peak) - np.asarray(self.single.peak)))
+
+    @property
+    def weight_ratio(self) -> float:
+        """Batched weight divided by the single point weight"""
+        if self.single is None or self.single.weight == 0:
+            return np.inf
+        return float(self.batched.weight / self.single.weight)
+
+    @property
+    def angle_difference(self) -> float:
+        """Difference between the best angles in degrees"""
+        if self.single is None:
+            return np.inf
+        return float(abs(self.batched.angle - self.single.angle))
+
+
+def compare_with_point_registration(transform: nornir_imageregistration.ITransform,
+                                    target: ImagePermutationHelper,
+                                    source: ImagePermutationHelper,
+                                    target_points: NDArray,
+                                    alignment_area: tuple[int, int],
+                                    angles: Sequence[float]) -> list[RegistrationDifference]:
+    """
+    Register control points both in batches and one at a time with pyre.point_registration.align_point.
+    Padding is random noise in both, so peaks and weights differ slightly between runs of either.
+    :param target_points: (Y,X) target space position of each control point
+    :return: The difference for each control point
+    """
+    target_points = np.asarray(target_points)
+    indices = list(range(len(target_points)))
+    batched = BatchPhaseCorrelation(alignment_area, angles).align(transform, target, source, indices, target_points)
+
+    pool = nornir_pools.GetGlobalThreadPool()
+    with pyre.point_registration.SharedRegistrationImages(source, target) as images:
+        tasks = [images.start_align_point(pool, i, transform, target_points[i], alignment_area, angles)
+                 for i in indices]
+        single = {result.index: result.record for result in (task.wait_return() for task in tasks)}
+
+    return [RegistrationDifference(i, batched[i], single[i]) for i in indices]
@@ -12,7 +12,7 @@ from pyre import Space
 from pyre.command_interfaces import StatusChangeCallback
 from pyre.commands import InstantCommandBase, NavigationCommandBase
 from pyre.commands.commandexceptions import RequiresSelectionError
-from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager
+from pyre.interfaces.managers import ICommandHistory, ICommandQueue, IMousePositionHistoryManager
 from pyre.container import IContainer
 from pyre.controllers import TransformController
 
@@ -29,6 +29,7 @@ class CallControlPointToMouseCommand(InstantCommandBase):
     _original_points: NDArray[[2, ], np.floating]
 
     _mouse_position_history: IMousePositionHistoryManager = Provide[IContainer.mouse_position_history]
+    _history_manager: ICommandHistory = Provide[IContainer.history_manager]
     _mouse_position: NDArray[float] = None
     _selected_point: int
 
@@ -63,7 +64,7 @@ class CallControlPointToMouseCommand(InstantCommandBase):
 
         self._selected_point = self._selected_points.__iter__().__next__()
 
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
 
     def __str__(self):
         return "CallControlPointToMouseCommand"
@@ -81,6 +82,7 @@ class CallControlPointToMouseCommand(InstantCommandBase):
                                             self._mouse_position[1],
                                             self._mouse_position[0],
                                             self._space)
+        self._history_manager.RecordPointEdit(self._transform_controller, self._original_points)
         super().execute()
 
     def activate(self):
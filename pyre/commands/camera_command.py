@@ -1,9 +1,11 @@
+import logging
+
 import nornir_imageregistration.spatial
 
 try:
     import wx
 except:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
 
 import pyre.commands.uicommandbase as uicommand_base
 
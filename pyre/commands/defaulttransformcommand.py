@@ -23,8 +23,11 @@ from pyre.space import Space
 from pyre.commands.navigationcommandbase import NavigationCommandBase
 from pyre.container import IContainer
 from pyre.commands.extensions import GetKeyModifiers, GetMouseModifiers
+import pyre.log
 import pyre.ui
 
+_per_motion = pyre.log.throttle()  # Mouse motion while panning the camera
+
 
 class DefaultTransformCommand(NavigationCommandBase):
     """
@@ -50,7 +53,7 @@ class DefaultTransformCommand(NavigationCommandBase):
     _selection_event_history: dict[SelectionEventKey, SelectionEventData] = {}
     _action_to_command: Dict[ControlPointAction, Factory]
 
-    log: Logger = logging.Logger("DefaultTransformCommand")
+    log: Logger = logging.getLogger(__name__)
 
     @property
     def selected_points(self) -> ObservableSet[int]:
@@ -133,7 +136,7 @@ class DefaultTransformCommand(NavigationCommandBase):
 
         if isinstance(transform_controller.TransformModel, IControlPoints):
             controlpointmapkey = ControlPointManagerKey(transform_controller, space)
-            print(f'Key: {controlpointmapkey} Space: {space}')
+            self.log.debug('Key: %s Space: %s', controlpointmapkey, space)
 
             self._controlpointmap = DefaultTransformCommand._controlpointmap_manager.getorcreate(controlpointmapkey)
             self._actionmap = transform_action_map_factory(self._controlpointmap)
@@ -313,8 +316,8 @@ class DefaultTransformCommand(NavigationCommandBase):
             elif event.RightIsDown():
                 old_point = self._mouse_position_history[self.space]
                 dy, dx = self._mouse_position_history[self.space] - point
-                if nornir_imageregistration.in_debug_mode():
-                    print(f'x:{point[1]} y:{point[0]} hx:{old_point[1]} hy:{old_point[0]} dx:{dx} dy:{dy}')
+                self.log.debug('x:%g y:%g hx:%g hy:%g dx:%g dy:%g', point[1], point[0], old_point[1], old_point[0], dx, dy,
+                               extra=_per_motion)
                 self.camera.translate((dy, dx))
 
                 # Update the point pair to account for camera motion
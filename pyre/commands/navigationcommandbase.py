@@ -6,6 +6,8 @@ Created on Feb 10, 2015
 
 from __future__ import annotations
 
+import logging
+
 from dependency_injector.wiring import Provide, inject
 import numpy as np
 import wx
@@ -22,6 +24,8 @@ from pyre.space import Space
 
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class NavigationCommandBase(UICommandBase, abc.ABC):
     """
@@ -205,8 +209,7 @@ class NavigationCommandBase(UICommandBase, abc.ABC):
 
                     self._transform_controller.Rotate(rangle, world_center)
                 except NotImplementedError:
-                    print("Current transform does not support rotation")
-                    pass
+                    _logger.warning("Current transform does not support rotation")
 
                 # if isinstance(self._transform_controller.TransformModel, nornir_imageregistration.ITransformTargetRotation):
                 #     self._transform_controller.TransformModel.RotateTargetPoints(-rangle,
@@ -285,8 +288,6 @@ class NavigationCommandBase(UICommandBase, abc.ABC):
             self.camera.scale *= 0.9
         elif keycode == wx.WXK_PAGEDOWN:
             self.camera.scale *= 1.1
-
-            self.history_manager.SaveState(self._transform_controller.SetPoints, self._transform_controller.points)
         # elif symbol == 'l':
         #    self.show_lines = not self.show_lines
         # elif keycode == wx.WXK_F1:
@@ -306,5 +307,6 @@ class NavigationCommandBase(UICommandBase, abc.ABC):
         elif symbol == 'x' and e.CmdDown():
             self.history_manager.Redo()
         elif symbol == 'f':
+            original_points = self._transform_controller.CopyPoints()
             self._transform_controller.FlipWarped()
-            self.history_manager.SaveState(self._transform_controller.FlipWarped)
+            self.history_manager.RecordPointEdit(self._transform_controller, original_points)
@@ -4,13 +4,19 @@ Created on Feb 10, 2015
 @author: u0490822
 '''
 
+import logging
+
 import numpy
 import wx
 
 import nornir_imageregistration.spatial
 from pyre.commands.uicommandbase import UICommandBase
+import pyre.log
 import pyre.views
 
+_logger = logging.getLogger(__name__)
+_per_motion = pyre.log.throttle()
+
 
 class RectangleCommand(UICommandBase):
     '''
@@ -68,9 +74,9 @@ class RectangleCommand(UICommandBase):
 
         self._bind_mouse_events()
 
-        print("Start Rect: %d x %d" % (
-            self.Origin[nornir_imageregistration.spatial.iPoint.X],
-            self.Origin[nornir_imageregistration.spatial.iPoint.Y]))
+        _logger.debug("Start Rect: %d x %d",
+                      self.Origin[nornir_imageregistration.spatial.iPoint.X],
+                      self.Origin[nornir_imageregistration.spatial.iPoint.Y])
 
     def _bind_mouse_events(self):
         self.parent.Bind(wx.EVT_MOTION, self.on_mouse_drag)
@@ -98,8 +104,8 @@ class RectangleCommand(UICommandBase):
         '''
         try:
             self._update_last_mouse_position(e)
-            print("X: %g x Y: %g" % (self.LastMousePosition[nornir_imageregistration.spatial.iPoint.X],
-                                     self.LastMousePosition[nornir_imageregistration.spatial.iPoint.Y]))
+            _logger.debug("X: %g x Y: %g", self.LastMousePosition[nornir_imageregistration.spatial.iPoint.X],
+                          self.LastMousePosition[nornir_imageregistration.spatial.iPoint.Y], extra=_per_motion)
             self.parent.Refresh()
         finally:
             e.Skip()
@@ -111,8 +117,8 @@ class RectangleCommand(UICommandBase):
         :param tuple mouse_position: Position of the mouse on the screen, corrected for inverted Y coordinates in GL        
         '''
         self._update_last_mouse_position(e)
-        print("X: %g x Y: %g" % (self.LastMousePosition[nornir_imageregistration.spatial.iPoint.X],
-                                 self.LastMousePosition[nornir_imageregistration.spatial.iPoint.Y]))
+        _logger.debug("X: %g x Y: %g", self.LastMousePosition[nornir_imageregistration.spatial.iPoint.X],
+                      self.LastMousePosition[nornir_imageregistration.spatial.iPoint.Y])
         self.parent.Refresh()
         self.end_command()
         return
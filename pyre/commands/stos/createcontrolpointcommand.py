@@ -60,7 +60,7 @@ class CreateControlPointCommand(NavigationCommandBase):
         self._selected_points = selected_points
         self._left_mouse_down = True
         self._new_point_position = PointPair(source=source_position, target=target_position)
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
 
     def on_activate(self):
         wx.CallAfter(self.queue_translate_command)
@@ -108,6 +108,11 @@ class CreateControlPointCommand(NavigationCommandBase):
         super().cancel()
         return
 
+    def execute(self):
+        # Recorded after the translate command it queued, so adding and dragging the point is one undo step
+        self.history_manager.RecordPointEdit(self._transform_controller, self._original_points)
+        super().execute()
+
     def queue_translate_command(self):
 
         point = self._new_point_position
@@ -12,7 +12,7 @@ from pyre.observable import ObservableSet, ObservedAction
 from pyre import Space
 from pyre.command_interfaces import StatusChangeCallback, ICommand
 from pyre.commands import InstantCommandBase
-from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager
+from pyre.interfaces.managers import ICommandHistory, ICommandQueue, IMousePositionHistoryManager
 from pyre.container import IContainer
 from pyre.selection_event_data import InputEvent, InputModifiers, SelectionEventData, InputSource, PointPair
 
@@ -25,10 +25,12 @@ class CreateRegisterControlPointCommand(InstantCommandBase):
     _selected_points: ObservableSet[int]  # The indices of the selected points
 
     _mouse_position_history: IMousePositionHistoryManager = Provide[IContainer.mouse_position_history]
+    _history_manager: ICommandHistory = Provide[IContainer.history_manager]
     _original_points: NDArray[np.floating]
     _left_mouse_down: bool = False
     _transform_controller: pyre.viewmodels.TransformController
     _commandqueue: ICommandQueue
+    _parent: wx.Window | None  # Window the command was started from, owns the registration's progress dialog
 
     _source_image: str
     _target_image: str
@@ -40,6 +42,7 @@ class CreateRegisterControlPointCommand(InstantCommandBase):
                  source_image: str,
                  target_image: str,
                  completed_func: StatusChangeCallback = None,
+                 parent: wx.Window | None = None,
                  transform_controller: pyre.viewmodels.TransformController = Provide[IContainer.transform_controller],
                  config: Configuration = Provide[IContainer.config],
                  **kwargs):
@@ -64,8 +67,9 @@ class CreateRegisterControlPointCommand(InstantCommandBase):
         self._selected_points = selected_points
         self._transform_controller = transform_controller
         self._commandqueue = commandqueue
+        self._parent = parent
         self._new_point_position = PointPair(source=source_position, target=target_position)
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
 
     def on_activate(self):
         wx.CallAfter(self.queue_registration_command)
@@ -80,6 +84,11 @@ class CreateRegisterControlPointCommand(InstantCommandBase):
         super().cancel()
         return
 
+    def execute(self):
+        # Recorded after the registration command it queued, so adding and registering the point is one undo step
+        self._history_manager.RecordPointEdit(self._transform_controller, self._original_points)
+        super().execute()
+
     def queue_registration_command(self):
 
         point = self._new_point_position
@@ -97,7 +106,8 @@ class CreateRegisterControlPointCommand(InstantCommandBase):
             command_points={index},
             source_image=self._source_image,
             target_image=self._target_image,
-            completed_func=self.check_for_cancel)
+            completed_func=self.check_for_cancel,
+            parent=self._parent)
         self._commandqueue.put(registration_command)
         self.deactivate()
         return
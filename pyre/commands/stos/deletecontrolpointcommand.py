@@ -12,7 +12,7 @@ from pyre import Space
 from pyre.command_interfaces import StatusChangeCallback
 from pyre.commands import NavigationCommandBase, InstantCommandBase
 from pyre.commands.commandexceptions import RequiresSelectionError
-from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager
+from pyre.interfaces.managers import ICommandHistory, ICommandQueue, IMousePositionHistoryManager
 from pyre.interfaces.controlpointselection import SetSelectionCallable
 from pyre.container import IContainer
 from pyre.controllers import TransformController
@@ -24,6 +24,7 @@ class DeleteControlPointCommand(InstantCommandBase):
     _selected_points: ObservableSet[int]  # The indices of the selected points
     _original_points: NDArray[[2, ], np.floating]
     _transform_controller: TransformController
+    _history_manager: ICommandHistory = Provide[IContainer.history_manager]
 
     @inject
     def __init__(self,
@@ -50,7 +51,7 @@ class DeleteControlPointCommand(InstantCommandBase):
         if len(selected_points) == 0:
             raise RequiresSelectionError()
 
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
 
     def __str__(self):
         return "DeleteControlPointCommand"
@@ -66,6 +67,7 @@ class DeleteControlPointCommand(InstantCommandBase):
         indicies_to_delete = list(self._selected_points)
         self._selected_points.clear()
         self._transform_controller.TryDeletePoints(indicies_to_delete)
+        self._history_manager.RecordPointEdit(self._transform_controller, self._original_points)
         super().execute()
 
     def activate(self):
@@ -1,5 +1,9 @@
 from __future__ import annotations
-from typing import Sequence, Iterable
+import copy
+import logging
+import threading
+import time
+from typing import Generator, Sequence, Iterable
 from dependency_injector.wiring import inject, Provide
 from dependency_injector.providers import Configuration
 import numpy as np
@@ -15,12 +19,21 @@ import pyre
 from pyre import Space
 from pyre.command_interfaces import StatusChangeCallback
 from pyre.commands import InstantCommandBase, NavigationCommandBase
-from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager, IImageManager
+from pyre.interfaces.managers import ICommandHistory, ICommandQueue, IMousePositionHistoryManager, IImageManager, \
+    IRegistrationROICache
 from pyre.interfaces.controlpointselection import SetSelectionCallable
 from pyre.container import IContainer
 from pyre.commands.commandexceptions import RequiresSelectionError
+import pyre.batch_registration
+import pyre.log
+import pyre.point_registration
 from pyre.settings import AppSettings, UISettings, PointRegistrationSettings
 
+_logger = logging.getLogger(__name__)
+_per_point = pyre.log.throttle(1.0, 10)  # Messages about individual points of a registration batch
+
+_flush_interval = 0.25  # Minimum seconds between applying background registration results to the transform
+
 
 class RegisterControlPointCommand(InstantCommandBase):
     """Automatically register selected control points"""
@@ -29,9 +42,24 @@ class RegisterControlPointCommand(InstantCommandBase):
     _original_points: NDArray[[2, ], np.floating]
     _transform_controller: pyre.viewmodels.TransformController
     _image_manager: IImageManager = Provide[IContainer.image_manager]
+    _roi_cache: IRegistrationROICache = Provide[IContainer.roi_cache]
+    _history_manager: ICommandHistory = Provide[IContainer.history_manager]
     _source_image: str
     _target_image: str
     _settings: PointRegistrationSettings
+    _confidence: dict[int, float]  # Alignment weight of each registered point
+    _registration_thread: threading.Thread | None = None
+    _cancel_event: threading.Event
+    _progress_dialog: wx.ProgressDialog | None = None
+    _dialog_parent: wx.Window | None  # Top level window the progress dialog belongs to
+    _expected_version: int | None = None  # Controller version after the background registration last changed it
+    _recorded_version: int | None = None  # Controller version the background registration's undo step was recorded at
+    _interrupted: bool = False  # The points were edited during the background registration
+
+    @property
+    def confidence(self) -> dict[int, float]:
+        """Alignment weight of each point registered so far"""
+        return self._confidence
 
     @property
     def alignment_area(self) -> NDArray[int]:
@@ -49,6 +77,7 @@ class RegisterControlPointCommand(InstantCommandBase):
                  target_image: str,
                  completed_func: StatusChangeCallback = None,
                  register_all: bool = False,  # If True, register all points in the transform
+                 parent: wx.Window | None = None,
                  transform_controller: pyre.viewmodels.TransformController = Provide[IContainer.transform_controller],
                  config: Configuration = Provide[IContainer.config],
                  settings: AppSettings = Provide[IContainer.settings],
@@ -68,10 +97,13 @@ class RegisterControlPointCommand(InstantCommandBase):
         super().__init__(completed_func=completed_func)
 
         self._config = config
+        self._dialog_parent = wx.GetTopLevelParent(parent) if parent is not None else None
         self._source_image = source_image
         self._target_image = target_image
         self._selected_points = selected_points
         self._settings = settings.stos.point_registration
+        self._confidence = {}
+        self._cancel_event = threading.Event()
 
         if register_all:
             self._selected_points.update(range(transform_controller.NumPoints))
@@ -81,7 +113,7 @@ class RegisterControlPointCommand(InstantCommandBase):
         if len(self._selected_points) == 0:
             raise RequiresSelectionError('No points selected')
 
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
         self._transform_controller = transform_controller
 
     def __str__(self):
@@ -91,6 +123,10 @@ class RegisterControlPointCommand(InstantCommandBase):
         return True
 
     def cancel(self):
+        if self._registration_thread is not None:
+            # The background registration stops after the batch in progress, already applied points are kept
+            self._cancel_event.set()
+
         super().cancel()
         return
 
@@ -98,9 +134,14 @@ class RegisterControlPointCommand(InstantCommandBase):
         source = self._image_manager[self._source_image]
         target = self._image_manager[self._target_image]
 
-        indicies_to_register = list(self._selected_points)
+        if self._settings.async_registration and len(self._selected_points) > 1:
+            # Completes when the background registration finishes
+            self._start_async_registration(source, target, self._selected_points)
+            return
+
         # self.SelectedPointIndex = self._transform_controller.AutoAlignPoints(self.indicies_to_register)
         self.align_points(source, target, self._selected_points)
+        self._history_manager.RecordPointEdit(self._transform_controller, self._original_points)
 
         # Do not clear the selected indicies in case we want to re-run
         super().execute()
@@ -109,113 +150,141 @@ class RegisterControlPointCommand(InstantCommandBase):
         super().activate()
         self.execute()
 
+    @staticmethod
+    def _as_point_list(i_points: Sequence[int] | Iterable[int] | int) -> list[int]:
+        if isinstance(i_points, range):
+            return list(i_points)
+        elif isinstance(i_points, Iterable) and not isinstance(i_points, Sequence):
+            return [*i_points]
+        elif not isinstance(i_points, Iterable):
+            return [i_points]
+
+        return list(i_points)
+
+    def _split_masked(self,
+                      transform: nornir_imageregistration.ITransform,
+                      i_points: list[int]) -> tuple[list[int], list[int]]:
+        """:return: (points to register, points where either ROI is entirely masked)"""
+        masked = pyre.common.find_masked_rois(transform,
+                                              transform.TargetPoints[i_points],
+                                              self.alignment_area,
+                                              self._image_manager.mask_summed_area_table(self._target_image),
+                                              self._image_manager.mask_summed_area_table(self._source_image))
+        valid = [i_point for i_point, is_masked in zip(i_points, masked) if not is_masked]
+        invalid = [i_point for i_point, is_masked in zip(i_points, masked) if is_masked]
+        return valid, invalid
+
+    def _record_batches(self,
+                        sourceimage: ImagePermutationHelper,
+                        targetimage: ImagePermutationHelper,
+                        transform: nornir_imageregistration.ITransform,
+                        i_points: list[int]) -> Generator[
+        dict[int, nornir_imageregistration.AlignmentRecord | None], None, None]:
+        """Register points, yielding records as they complete"""
+        if len(i_points) == 0:
+            return
+
+        if self._settings.batched_fft:
+            engine = pyre.batch_registration.BatchPhaseCorrelation(alignment_area=self.alignment_area,
+                                                                   angles=self.angles_to_search,
+                                                                   max_batch=self._settings.fft_batch_size)
+            yield from engine.align_batches(transform, target=targetimage, source=sourceimage, indices=i_points,
+                                            target_points=transform.TargetPoints[i_points], cache=self._roi_cache)
+        else:
+            yield from self._align_points_shared(sourceimage, targetimage, transform, i_points)
+
+    def _offsets_from_records(self,
+                              records: dict[int, nornir_imageregistration.AlignmentRecord | None]) -> NDArray:
+        """Offsets to apply to each control point, zero for points that did not register"""
+        offsets = np.zeros((self._transform_controller.NumPoints, 2))
+        for i_point in sorted(records.keys()):
+            record = records[i_point]
+            if record is None:
+                _logger.info("point #%d returned None for alignment", i_point, extra=_per_point)
+                continue
+
+            self._confidence[i_point] = record.weight
+            if record.weight == 0:
+                _logger.info("point #%d returned weight 0 for alignment, ignoring", i_point, extra=_per_point)
+                continue
+
+            (dy, dx) = record.peak
+
+            if math.isnan(dx) or math.isnan(dy):
+                continue
+
+            offsets[i_point, :] = np.array([dy, dx])
+
+        return offsets
+
+    def _apply_offsets(self, offsets: NDArray):
+        """Translate the registered points, one transform change event for the whole set"""
+        moved = np.flatnonzero(np.any(offsets != 0, axis=1))
+        if len(moved) == 0:
+            return
+
+        self._transform_controller.TranslateFixed(offsets)
+
+        # Cached regions of points that moved can no longer be hit, free them
+        self._roi_cache.invalidate_points(moved.tolist())
+
+    def _remove_invalid_points(self, invalid_points: list[int]):
+        # If we aligned all points, remove the ones we couldn't register
+        try:
+            self._transform_controller.RemovePoints(invalid_points)
+        except ValueError:
+            _logger.warning("Unable to remove unmappable points from the transform")
+
     def align_points(self,
                      sourceimage: ImagePermutationHelper,
                      targetimage: ImagePermutationHelper,
                      i_points: Sequence[int]) -> None:
         """Attemps to align the specified point indicies"""
-        # from pyre.state import currentStosConfig
+        i_points = self._as_point_list(i_points)
+        transform = self._transform_controller.TransformModel
+        register_many = len(i_points) > 1
 
-        # if (currentStosConfig.FixedImageViewModel is None or
-        #         currentStosConfig.WarpedImageViewModel is None):
-        #     return
+        # Points where either ROI is entirely masked are not worth scheduling
+        i_points, invalid_points = self._split_masked(transform, i_points)
 
-        if isinstance(i_points, range):
-            i_points = list(i_points)
-        elif isinstance(i_points, Iterable) and not isinstance(i_points, Sequence):
-            i_points = [*i_points]
-        elif not isinstance(i_points, Iterable):
-            i_points = [i_points]
-
-        offsets = np.zeros((self._transform_controller.NumPoints, 2))
+        if register_many:
+            records = {}
+            for batch in self._record_batches(sourceimage, targetimage, transform, i_points):
+                records.update(batch)
 
-        indextotask = {}
-        invalid_points = []
-        if len(i_points) > 1:
-            pool = pools.GetGlobalLocalMachinePool()
-
-            for i_point in i_points:
-                fixed = self._transform_controller.GetFixedPoint(i_point)
-                warped = self._transform_controller.GetWarpedPoint(i_point)
-
-                task = pyre.common.StartAttemptAlignPoint(pool=pool,
-                                                          task_description=f"Align Pyre Point {i_point}",
-                                                          transform=self._transform_controller.TransformModel,
-                                                          target_image=targetimage.ImageWithMaskAsNoise,
-                                                          source_image=sourceimage.ImageWithMaskAsNoise,
-                                                          target_mask=targetimage.BlendedMask,
-                                                          source_mask=sourceimage.BlendedMask,
-                                                          target_image_stats=sourceimage.Stats,
-                                                          source_image_stats=targetimage.Stats,
-                                                          target_controlpoint=fixed,
-                                                          alignmentArea=self.alignment_area,
-                                                          anglesToSearch=self.angles_to_search)
-
-                if task is not None:
-                    indextotask[i_point] = task
-                else:
-                    invalid_points.append(i_point)
-
-            for i_point in sorted(indextotask.keys()):
-                task = indextotask[i_point]
-
-                record = None
-                try:
-                    record = task.wait_return()
-                except Exception as e:
-                    print(f"Exception aligning point {i_point}:\n{e}")
-                    return
-
-                if record is None:
-                    print("point #" + str(i_point) + " returned None for alignment")
-                    continue
-
-                if record.weight == 0:
-                    print("point #" + str(i_point) + " returned weight 0 for alignment, ignoring")
-                    continue
-
-                (dy, dx) = record.peak
-
-                if math.isnan(dx) or math.isnan(dy):
-                    continue
-
-                offsets[i_point, :] = np.array([dy, dx])
-                del indextotask[i_point]
+            offsets = self._offsets_from_records(records)
 
         else:
-            i_point = i_points
+            if len(i_points) == 0:
+                _logger.info("point #%d had no texture for alignment", invalid_points[0])
+                return
+
+            i_point = i_points[0]
             fixed = self._transform_controller.GetFixedPoint(i_point)
-            warped = self._transform_controller.GetWarpedPoint(i_point)
             task = pyre.common.StartAttemptAlignPoint(pool=None,
                                                       task_description=f"Align Pyre Point {i_point}",
-                                                      transform=self._transform_controller.TransformModel,
+                                                      transform=transform,
                                                       target_image=targetimage.ImageWithMaskAsNoise,
                                                       source_image=sourceimage.ImageWithMaskAsNoise,
-                                                      target_mask=targetimage.BlendedMask,
-                                                      source_mask=sourceimage.BlendedMask,
-                                                      target_image_stats=sourceimage.Stats,
-                                                      source_image_stats=targetimage.Stats,
+                                                      target_image_stats=targetimage.Stats,
+                                                      source_image_stats=sourceimage.Stats,
                                                       target_controlpoint=fixed,
                                                       alignmentArea=self.alignment_area,
                                                       anglesToSearch=self.angles_to_search)
 
-            if task is None:
-                print("point #" + str(i_point) + " had no texture for alignment")
-                return
-
             record = None
             try:
                 record = task.wait_return()
-            except Exception as e:
-                print(f"Exception aligning point {i_point}:\n{e}")
+            except Exception:
+                _logger.exception("Exception aligning point %d", i_point)
                 return
 
             if record is None:
-                print("point #" + str(i_point) + " returned None for alignment")
+                _logger.info("point #%d returned None for alignment", i_point, extra=_per_point)
                 return
 
             if record.weight == 0:
-                print("point #" + str(i_point) + " returned weight 0 for alignment, ignoring")
+                _logger.info("point #%d returned weight 0 for alignment, ignoring", i_point, extra=_per_point)
                 return
 
             (dy, dx) = record.peak
@@ -223,17 +292,187 @@ class RegisterControlPointCommand(InstantCommandBase):
             if math.isnan(dx) or math.isnan(dy):
                 return
 
-            print(f"Adjusting point {i_point} by x: {dx} y: {dy}")
+            _logger.debug("Adjusting point %d by x: %g y: %g", i_point, dx, dy)
+            self._confidence[i_point] = record.weight
+            offsets = np.zeros((self._transform_controller.NumPoints, 2))
             offsets[i_point, :] = np.array([dy, dx])
 
         # Translate all points
-        self._transform_controller.TranslateFixed(offsets)
+        self._apply_offsets(offsets)
+        self._remove_invalid_points(invalid_points)
 
-        # If we aligned all points, remove the ones we couldn't register
+        # return self._transform_controller.MovePoint(i_point, dx, dy, FixedSpace = self.FixedSpace)
+
+    def _start_async_registration(self,
+                                  sourceimage: ImagePermutationHelper,
+                                  targetimage: ImagePermutationHelper,
+                                  i_points: Sequence[int]):
+        """Register points on a background thread.  Results are applied on the UI thread as they arrive."""
+        # Register against a snapshot so applying results does not move the regions still being registered
+        transform = copy.deepcopy(self._transform_controller.TransformModel)
+        self._original_points = self._transform_controller.CopyPoints()
+        self._expected_version = self._transform_controller.version
+        self._recorded_version = None
+        self._interrupted = False
+        i_points, invalid_points = self._split_masked(transform, self._as_point_list(i_points))
+
+        self._progress_dialog = wx.ProgressDialog("Register Control Points",
+                                                  f"Registering {len(i_points)} points",
+                                                  maximum=max(len(i_points), 1),
+                                                  parent=self._dialog_parent,
+                                                  style=wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME |
+                                                        wx.PD_REMAINING_TIME)
+        self._cancel_event.clear()
+        self._registration_thread = threading.Thread(target=self._run_registration,
+                                                     args=(sourceimage, targetimage, transform, i_points,
+                                                           invalid_points),
+                                                     name=str(self),
+                                                     daemon=True)
+        self._registration_thread.start()
+
+    def _run_registration(self,
+                          sourceimage: ImagePermutationHelper,
+                          targetimage: ImagePermutationHelper,
+                          transform: nornir_imageregistration.ITransform,
+                          i_points: list[int],
+                          invalid_points: list[int]):
+        """Background thread body, flushes completed records to the UI thread at most every _flush_interval seconds"""
+        pending = {}
+        completed = 0
+        last_flush = time.monotonic()
         try:
-            self._transform_controller.RemovePoints(invalid_points)
-        except ValueError:
-            print("Unable to remove unmappable points from the transform")
-            pass
+            batches = self._record_batches(sourceimage, targetimage, transform, i_points)
+            for batch in batches:
+                pending.update(batch)
+                completed += len(batch)
+
+                if self._cancel_event.is_set():
+                    batches.close()
+                    break
+
+                if time.monotonic() - last_flush >= _flush_interval:
+                    wx.CallAfter(self._apply_records, pending, completed, len(i_points))
+                    pending = {}
+                    last_flush = time.monotonic()
+        except Exception:
+            _logger.exception("Exception registering points")
+        finally:
+            wx.CallAfter(self._finish_async_registration, pending, completed, len(i_points), invalid_points)
+
+    def _apply_records(self,
+                       records: dict[int, nornir_imageregistration.AlignmentRecord | None],
+                       completed: int,
+                       total: int):
+        """Apply a set of registration results and update progress.  Runs on the UI thread."""
+        if self.status == pyre.CommandStatus.Completed:
+            return  # Cancelled externally, the transform may have been replaced
+
+        if self._transform_unchanged():
+            self._apply_offsets(self._offsets_from_records(records))
+            self._record_async_edit()
+
+        if self._progress_dialog:  # False once destroyed with its parent window
+            keep_going, _ = self._progress_dialog.Update(min(completed, total), self._progress_message(completed,
+                                                                                                        total))
+            if not keep_going:
+                self._cancel_event.set()
+
+    def _transform_unchanged(self) -> bool:
+        """
+        Results are indexed by the points at the start of the registration.  If anything else edited the points
+        since this command last changed them, the indices may no longer match, so the registration is stopped
+        and its remaining results are discarded.  Runs on the UI thread.
+        """
+        if self._transform_controller.version == self._expected_version:
+            return True
+
+        if not self._interrupted:
+            _logger.warning("Control points were edited during registration, the remaining results are discarded")
+            self._interrupted = True
+            self._cancel_event.set()
+
+        return False
+
+    def _record_async_edit(self):
+        """Record the points changed so far as the command's undo step, replacing the step recorded before"""
+        version = self._transform_controller.version
+        if version == self._expected_version:
+            return  # The results did not move any point
+
+        self._history_manager.RecordPointEdit(self._transform_controller, self._original_points,
+                                              replaces_version=self._recorded_version)
+        self._expected_version = version
+        self._recorded_version = version
+
+    def _progress_message(self, completed: int, total: int) -> str:
+        message = f"Registered {completed} of {total} points"
+        if len(self._confidence) > 0:
+            weights = np.fromiter(self._confidence.values(), dtype=float)
+            weakest = min(self._confidence, key=self._confidence.get)
+            message += f"\nMean confidence {weights.mean():.3f}, lowest point #{weakest} at {weights.min():.3f}"
+        return message
+
+    def _finish_async_registration(self,
+                                   records: dict[int, nornir_imageregistration.AlignmentRecord | None],
+                                   completed: int,
+                                   total: int,
+                                   invalid_points: list[int]):
+        """Apply the last results and complete the command.  Runs on the UI thread."""
+        self._registration_thread = None
+        if self._progress_dialog:  # False once destroyed with its parent window
+            self._progress_dialog.Destroy()
+        self._progress_dialog = None
+
+        if self.status == pyre.CommandStatus.Completed:
+            return  # Cancelled externally, the transform may have been replaced
+
+        if self._transform_unchanged():
+            self._apply_offsets(self._offsets_from_records(records))
+
+            # Masked points are only removed if the whole run completed
+            if not self._cancel_event.is_set():
+                self._remove_invalid_points(invalid_points)
+
+            self._record_async_edit()
+
+        _logger.info("%s", self._progress_message(completed, total))
+
+        # Points aligned before a user cancel are kept, so the command still executes
+        super().execute()
 
-        # return self._transform_controller.MovePoint(i_point, dx, dy, FixedSpace = self.FixedSpace)
+    def _align_points_shared(self,
+                             sourceimage: ImagePermutationHelper,
+                             targetimage: ImagePermutationHelper,
+                             transform: nornir_imageregistration.ITransform,
+                             i_points: Sequence[int]) -> Generator[
+        dict[int, nornir_imageregistration.AlignmentRecord | None], None, None]:
+        """Register each point in its own worker task against shared memory images, yielding each result"""
+        pool = pools.GetGlobalLocalMachinePool()
+
+        with pyre.point_registration.SharedRegistrationImages(source=sourceimage,
+                                                              target=targetimage) as shared_images:
+            tasks = [shared_images.start_align_point(pool,
+                                                     index=i_point,
+                                                     transform=transform,
+                                                     target_controlpoint=transform.TargetPoints[i_point, :],
+                                                     alignmentArea=self.alignment_area,
+                                                     anglesToSearch=self.angles_to_search)
+                     for i_point in i_points]
+
+            i_task = 0
+            try:
+                for i_task, (i_point, task) in enumerate(zip(i_points, tasks)):
+                    try:
+                        result = task.wait_return()
+                    except Exception:
+                        _logger.exception("Exception aligning point %d", i_point)
+                        continue
+
+                    yield {i_point: result.record}
+            finally:
+                # Every task must finish before the shared images are released
+                for task in tasks[i_task + 1:]:
+                    try:
+                        task.wait_return()
+                    except Exception:
+                        pass
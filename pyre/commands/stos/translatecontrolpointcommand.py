@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 from dependency_injector.wiring import inject, Provide
 import numpy as np
 from numpy._typing import NDArray
@@ -15,6 +17,8 @@ from pyre.commands.commandexceptions import RequiresSelectionError
 from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class TranslateControlPointCommand(NavigationCommandBase):
     """This command takes a selection of control points and adjusts the position"""
@@ -24,6 +28,8 @@ class TranslateControlPointCommand(NavigationCommandBase):
     _space: Space
     _translate_origin: NDArray[float, float]
     _original_points: NDArray[[2, ], np.floating]
+    _drag_offset: NDArray[np.floating]  # (Y,X) offset dragged since the last commit, previewed but not yet applied
+    _edited: bool  # True once the transform has been edited by this command
 
     _mouse_position_history: IMousePositionHistoryManager = Provide[IContainer.mouse_position_history]
 
@@ -73,7 +79,9 @@ class TranslateControlPointCommand(NavigationCommandBase):
         if len(self._command_points) == 0:
             raise RequiresSelectionError()
 
-        self._original_points = transform_controller.points
+        self._original_points = transform_controller.CopyPoints()
+        self._drag_offset = np.zeros(2)
+        self._edited = False
 
     def __str__(self):
         return "TranslateControlPointCommand"
@@ -105,19 +113,13 @@ class TranslateControlPointCommand(NavigationCommandBase):
         world_point = point_pair.source if self.space == Space.Source else point_pair.target
 
         delta = world_point - self._translate_origin
-        print(
-            f'space: {self.space} x:{world_point[1]} y:{world_point[0]} hx:{self._translate_origin[1]} hy:{self._translate_origin[0]} dx:{delta[1]} dy:{delta[0]}')
         self._translate_origin = world_point
 
-        new_selected_indicies = self._transform_controller.MovePoint(self._selected_point_set, delta[1], delta[0],
-                                                                     space=self.space)
-
-        # Update selected points in the UI if indicies have changed
-        if len(set(new_selected_indicies) - self._selected_point_set) > 0:
-            self._selected_point_set.clear()
-            self._selected_point_set.update(new_selected_indicies)
-
-        pass
+        # Only the drawn positions of the selected points move while dragging, the transform and everything built
+        # from it is updated once when the mouse is released
+        self._drag_offset += delta
+        self._transform_controller.SetPreviewOffset(self._drag_offset, space=self.space)
+        self.parent.Refresh()
 
     def on_key_down(self, event: wx.KeyEvent):
         """Called when a key is pressed"""
@@ -130,13 +132,11 @@ class TranslateControlPointCommand(NavigationCommandBase):
 
             # Users can nudge points with the arrow keys.  Holding shift steps five pixels, holding Ctrl shifts 25.  Holding both steps 125
             multiplier = 1
-            print(str(multiplier))
             if event.ShiftDown():
                 multiplier *= 5
-                print(str(multiplier))
             if event.ControlDown():
                 multiplier *= 25
-                print(str(multiplier))
+            _logger.debug("Nudge multiplier %d", multiplier)
 
             delta = [0, 0]
             if keycode == wx.WXK_LEFT:
@@ -151,10 +151,27 @@ class TranslateControlPointCommand(NavigationCommandBase):
             delta[0] *= multiplier
             delta[1] *= multiplier
 
-            self._transform_controller.MovePoint(self._selected_point_set, delta[1], delta[0],
-                                                 space=self._space)
+            self._move_selected_points(np.asarray(delta, dtype=np.float64))
         return
 
+    def _move_selected_points(self, delta: NDArray[np.floating]):
+        """Apply an offset to the selected points in a single transform edit"""
+        self._edited = True
+        new_selected_indicies = self._transform_controller.MovePoints(self._selected_point_set, delta,
+                                                                      space=self.space)
+
+        # Update selected points in the UI if indicies have changed
+        if len(set(new_selected_indicies) - self._selected_point_set) > 0:
+            self._selected_point_set.clear()
+            self._selected_point_set.update(new_selected_indicies)
+
+    def _commit_drag(self):
+        """Replace the previewed drag with a single edit of the transform"""
+        self._transform_controller.SetPreviewOffset(None)
+        if np.any(self._drag_offset != 0):
+            self._move_selected_points(self._drag_offset)
+            self._drag_offset = np.zeros(2)
+
     def activate(self):
         super().activate()
         self._selected_point_set.update(
@@ -172,12 +189,17 @@ class TranslateControlPointCommand(NavigationCommandBase):
         return True
 
     def cancel(self):
-        self._transform_controller.SetPoints(self._original_points)
+        self._transform_controller.SetPreviewOffset(None)
+        self._drag_offset = np.zeros(2)
+        if self._edited:
+            self._transform_controller.SetPoints(self._original_points)
         super().cancel()
         return
 
     def execute(self):
         # self._transform_controller.points[self._selected_points] = self.translated_points
+        self._commit_drag()
+        self.history_manager.RecordPointEdit(self._transform_controller, self._original_points)
         super().execute()
 
     def subscribe_to_parent(self):
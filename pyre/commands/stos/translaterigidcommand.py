@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 from dependency_injector.wiring import inject, Provide
 import numpy as np
 from numpy._typing import NDArray
@@ -16,6 +18,8 @@ from pyre.commands.commandexceptions import RequiresSelectionError
 from pyre.interfaces.managers import ICommandQueue, IMousePositionHistoryManager
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class ManipulateRigidTransformCommand(NavigationCommandBase):
     """This command takes a selection of control points and adjusts the position"""
@@ -138,13 +142,11 @@ class ManipulateRigidTransformCommand(NavigationCommandBase):
 
             # Users can nudge points with the arrow keys.  Holding shift steps five pixels, holding Ctrl shifts 25.  Holding both steps 125
             multiplier = 1
-            print(str(multiplier))
             if event.ShiftDown():
                 multiplier *= 5
-                print(str(multiplier))
             if event.ControlDown():
                 multiplier *= 25
-                print(str(multiplier))
+            _logger.debug("Nudge multiplier %d", multiplier)
 
             delta = [0, 0]
             if keycode == wx.WXK_LEFT:
@@ -3,7 +3,11 @@ Created on Oct 16, 2012
 
 @author: u0490822
 '''
-from typing import Iterable
+import logging
+import os
+import tempfile
+import time
+from typing import Callable, Iterable
 
 from dependency_injector.wiring import Provide, inject
 import numpy
@@ -11,7 +15,6 @@ from numpy.typing import NDArray
 
 import nornir_imageregistration
 from nornir_imageregistration import ITransform
-import nornir_imageregistration.assemble as assemble
 import nornir_imageregistration.stos_brute as stos
 import nornir_pools
 import pyre
@@ -19,22 +22,35 @@ from pyre.container import IContainer
 from pyre.interfaces.managers import IImageManager
 from pyre.interfaces.managers.command_history import ICommandHistory
 from pyre.controllers.transformcontroller import TransformController
+import pyre.pyramid_registration
+import pyre.warp_export
+from pyre.integral_image import box_sums
 
+RefineProgressCallback = Callable[[int, int, float], bool]  # (iterations completed, total, seconds for the last iteration), return False to cancel
 
-def SaveRegisteredWarpedImage(fileFullPath: str, transform: nornir_imageregistration.ITransform, warpedImage: NDArray):
-    # registeredImage = assemble.WarpedImageToFixedSpace(transform, Config.FixedImageArray.Image.shape, Config.WarpedImageArray.Image)
-    registeredImage = AssembleHugeRegisteredWarpedImage(transform,
-                                                        pyre.state.currentStosConfig.FixedImageViewModel.Image.shape,
-                                                        pyre.state.currentStosConfig.WarpedImageViewModel.Image)
+_logger = logging.getLogger(__name__)
 
-    nornir_imageregistration.ImageSave(fileFullPath, registeredImage)
+
+def SaveRegisteredWarpedImage(fileFullPath: str,
+                              transform: nornir_imageregistration.ITransform,
+                              warpedImage: NDArray,
+                              fixedImageShape: tuple[int, int],
+                              progress: pyre.warp_export.ChunkCallback | None = None) -> bool:
+    """
+    Warp an image into the fixed image's space and save it.  Tiff output is streamed chunk by chunk.
+    :param progress: Called after each chunk, returning False cancels the export
+    :return: False if the export was cancelled
+    """
+    return pyre.warp_export.export_warped_image(fileFullPath, transform, fixedImageShape, warpedImage,
+                                                progress=progress)
 
 
 def AssembleHugeRegisteredWarpedImage(transform: nornir_imageregistration.ITransform, fixedImageShape: NDArray,
-                                      warpedImage: NDArray):
+                                      warpedImage: NDArray, chunk_size: int = 2048) -> NDArray:
     '''Cut image into tiles, assemble small chunks'''
-
-    return assemble.TransformImage(transform, fixedImageShape, warpedImage, CropUndefined=False)
+    fixedImageShape = (int(fixedImageShape[0]), int(fixedImageShape[1]))
+    chunks = pyre.warp_export.warp_chunks(transform, fixedImageShape, warpedImage, chunk_size=chunk_size)
+    return pyre.warp_export.assemble_chunks(chunks, fixedImageShape, warpedImage.dtype, chunk_size)
 
 
 def SyncWindows(LookAt, scale: float):
@@ -76,30 +92,47 @@ def RotateTranslateWarpedImage(source_image_key: str,
                                target_image_key: str,
                                settings: nornir_imageregistration.settings.StosBruteSettings,
                                LimitImageSize: bool = False,
+                               UsePyramid: bool = True,
+                               RefineWindow: int = 256,
                                image_manager: IImageManager = Provide[IContainer.image_manager]) -> ITransform | None:
+    """
+    Find a rigid transform from the source to the target image.
+    :param LimitImageSize: Run the brute search on smaller images
+    :param UsePyramid: Brute search a downsampled level of the image pyramid and refine at each finer level,
+    otherwise the brute search runs on the full images
+    :param RefineWindow: Size of the windows correlated when refining at each pyramid level
+    """
     largestdimension = 2047
     if LimitImageSize:
         largestdimension = 818
 
     if source_image_key not in image_manager:
-        print("Source image not loaded")
+        _logger.warning("Source image not loaded")
         return
 
     if target_image_key not in image_manager:
-        print("Target image not loaded")
+        _logger.warning("Target image not loaded")
         return
 
     source_image = image_manager[source_image_key]
     target_image = image_manager[target_image_key]
     settings._method = nornir_imageregistration.settings.SliceToSliceMethod.LogPolar
-    alignRecord = stos.SliceToSliceRigidRegistrationWithPreprocessedImages(source_image_data=source_image,
-                                                                           target_image_data=target_image,
-                                                                           settings=settings,
-                                                                           SingleThread=False,
-                                                                           Cluster=False,
-                                                                           )
+    if UsePyramid:
+        alignRecord = pyre.pyramid_registration.register_rigid(source_key=source_image_key,
+                                                               target_key=target_image_key,
+                                                               settings=settings,
+                                                               largest_dimension=largestdimension,
+                                                               refine_window=RefineWindow,
+                                                               image_manager=image_manager)
+    else:
+        alignRecord = stos.SliceToSliceRigidRegistrationWithPreprocessedImages(source_image_data=source_image,
+                                                                               target_image_data=target_image,
+                                                                               settings=settings,
+                                                                               SingleThread=False,
+                                                                               Cluster=False,
+                                                                               )
     # alignRecord = IrTools.alignment_record.AlignmentRecord((22.67, -4), 100, -132.5)
-    print("Alignment found: " + str(alignRecord))
+    _logger.info("Alignment found: %s", alignRecord)
     transform = alignRecord.ToImageTransform(source_image_shape=source_image.shape,
                                              target_image_shape=target_image.shape)
     return transform
@@ -109,70 +142,126 @@ def RotateTranslateWarpedImage(source_image_key: str,
     # pyre.state.currentStosConfig._transform_controller.transform)
 
 
-def GridRefineTransform(settings: nornir_imageregistration.settings.GridRefinement | None):
-    if settings is None:
-        return
-
-    try:
-        updatedTransform = nornir_imageregistration.RefineTransform(
-            pyre.state.currentStosConfig.TransformController.TransformModel,
-            settings=settings,
-            SaveImages=False,
-            SavePlots=True,
-            outputDir="C:\\Temp")
+def GridRefineTransform(transform: ITransform,
+                        source_image: nornir_imageregistration.ImagePermutationHelper,
+                        target_image: nornir_imageregistration.ImagePermutationHelper,
+                        num_iterations: int,
+                        cell_size: int,
+                        grid_spacing: int,
+                        angles_to_search: Iterable[float],
+                        progress: RefineProgressCallback | None = None,
+                        SavePlots: bool = False) -> ITransform | None:
+    """
+    Refine a transform into a grid transform one iteration at a time.  Intended to run on a background
+    thread, the alignments within each iteration are distributed by nornir_imageregistration's pools.
+    :param progress: Called after each iteration, returning False cancels the refinement
+    :param SavePlots: Write nornir's diagnostic plots to a temporary directory, for debugging
+    :return: The refined transform, or None if the refinement was cancelled
+    """
+    outputDir = None
+    if SavePlots:
+        outputDir = os.path.join(tempfile.gettempdir(), 'pyre_grid_refinement')
+        os.makedirs(outputDir, exist_ok=True)
+
+    with nornir_imageregistration.settings.GridRefinement.CreateWithPreprocessedImages(
+            source_img_data=source_image,
+            target_img_data=target_image,
+            num_iterations=1,
+            grid_spacing=grid_spacing,
+            cell_size=cell_size,
+            angles_to_search=angles_to_search) as settings:
+
+        for iteration in range(num_iterations):
+            start = time.perf_counter()
+            transform = nornir_imageregistration.RefineTransform(transform,
+                                                                 settings=settings,
+                                                                 SaveImages=False,
+                                                                 SavePlots=SavePlots,
+                                                                 outputDir=outputDir)
+            elapsed = time.perf_counter() - start
+            _logger.info("Grid refinement iteration %d of %d took %.1fs", iteration + 1, num_iterations, elapsed)
+
+            if progress is not None and not progress(iteration + 1, num_iterations, elapsed):
+                _logger.info("Grid refinement cancelled")
+                return None
 
-        pyre.state.currentStosConfig.TransformController.TransformModel = updatedTransform
-        # pyre.history.SaveState(pyre.state.currentStosConfig._transform_controller.SetPoints,
-    #                               pyre.state.currentStosConfig._transform_controller.points)
-    except Exception as e:
-        print(f"Exception running grid refinement:\n{e}")
-        raise
+    return transform
 
 
 @inject
 def LinearBlendTransform(blend_factor: float,
-                         command_history: ICommandHistory = Provide[IContainer.command_history]):
+                         command_history: ICommandHistory = Provide[IContainer.history_manager]):
     if not isinstance(pyre.state.currentStosConfig.Transform, nornir_imageregistration.transforms.IControlPoints):
-        print("Linear blend requires control point based transform")
+        _logger.warning("Linear blend requires control point based transform")
         return
 
-    command_history.SaveState(pyre.state.currentStosConfig.TransformController.__setattr__,
-                              'TransformModel',
-                              pyre.state.currentStosConfig.TransformController.TransformModel)
+    original_points = pyre.state.currentStosConfig.TransformController.CopyPoints()
 
     updated_transform = nornir_imageregistration.transforms.utils.BlendWithLinear(
         pyre.state.currentStosConfig.Transform,
         blend_factor, ignore_rotation=False)
 
     pyre.state.currentStosConfig.TransformController.TransformModel = updated_transform
-    print(f"Linear blend completed for blend value {blend_factor}")
-
-
-def either_roi_is_masked(transform: nornir_imageregistration.ITransform,
-                         target_mask: NDArray | None,
-                         source_mask: NDArray | None,
-                         target_controlpoint: nornir_imageregistration.PointLike,
-                         alignmentArea: nornir_imageregistration.AreaLike,
-                         ):
-    """Returns True if either mask is all False"""
-
-    if target_mask is not None and source_mask is not None:
-        target_mask_roi, source_mask_roi = nornir_imageregistration.local_distortion_correction.BuildAlignmentROIs(
-            transform=transform,
-            targetImage_param=target_mask,
-            sourceImage_param=source_mask,
-            target_image_stats=None,
-            source_image_stats=None,
-            target_controlpoint=target_controlpoint,
-            alignmentArea=alignmentArea)
-
-        if not numpy.any(target_mask_roi):
-            return True
-
-        if not numpy.any(source_mask_roi):
-            return True
-
-    return False
+    command_history.RecordPointEdit(pyre.state.currentStosConfig.TransformController, original_points)
+    _logger.info("Linear blend completed for blend value %g", blend_factor)
+
+
+_roi_border_samples = 8  # Samples along each edge of an ROI when mapping it into source space
+_roi_bounds_padding = 0.125  # Fraction of the mapped ROI's size its bounding box is grown by on each side
+
+
+def find_masked_rois(transform: nornir_imageregistration.ITransform,
+                     target_points: NDArray,
+                     alignmentArea: nornir_imageregistration.AreaLike,
+                     target_mask_table: NDArray | None,
+                     source_mask_table: NDArray | None) -> NDArray[numpy.bool_]:
+    """
+    Find the points where either alignment ROI is entirely masked, using summed-area tables of the masks.
+    The source ROI is tested over the bounding box of points along the target ROI's border mapped into
+    source space, padded by a fraction of its size.  A transform that bends sharply between border samples
+    can still map part of the ROI outside the padded box, so a point is occasionally reported although a
+    few unmasked source pixels fall inside its ROI.
+    :param target_points: (N,2) target space (Y,X) control point positions
+    :param target_mask_table: Summed-area table of the target mask, see ImageManager.mask_summed_area_table
+    :param source_mask_table: Summed-area table of the source mask
+    :return: (N,) True where either ROI is entirely masked
+    """
+    target_points = numpy.atleast_2d(numpy.asarray(target_points, dtype=numpy.float64))
+    masked = numpy.zeros(target_points.shape[0], dtype=bool)
+    if target_points.shape[0] == 0:
+        return masked
+
+    half_area = numpy.asarray(alignmentArea, dtype=numpy.float64) / 2.0
+    if target_mask_table is not None:
+        masked |= box_sums(target_mask_table, target_points - half_area, target_points + half_area) == 0
+
+    if source_mask_table is not None:
+        # Points along the border and the center of each target ROI mapped into source space
+        steps = numpy.linspace(-1.0, 1.0, _roi_border_samples + 1)[:-1]
+        ones = numpy.ones_like(steps)
+        border = numpy.concatenate((numpy.column_stack((-ones, steps)), numpy.column_stack((steps, ones)),
+                                    numpy.column_stack((ones, -steps)), numpy.column_stack((-steps, -ones))))
+        offsets = numpy.vstack((border, numpy.zeros((1, 2)))) * half_area
+        samples = (target_points[:, numpy.newaxis, :] + offsets[numpy.newaxis, :, :]).reshape(-1, 2)
+        mapped = numpy.asarray(transform.InverseTransform(samples), dtype=numpy.float64)
+        mapped = mapped.reshape(target_points.shape[0], offsets.shape[0], 2)
+
+        valid = numpy.all(numpy.isfinite(mapped), axis=2)[:, :, numpy.newaxis]
+        bottom_left = numpy.where(valid, mapped, numpy.inf).min(axis=1)
+        top_right = numpy.where(valid, mapped, -numpy.inf).max(axis=1)
+
+        # Allow for the ROI's border curving outward between samples
+        padding = (top_right - bottom_left) * _roi_bounds_padding
+        bottom_left -= padding
+        top_right += padding
+
+        # ROIs the transform cannot map are left for the registration to reject
+        mappable = numpy.all(numpy.isfinite(bottom_left), axis=1)
+        source_masked = numpy.zeros_like(masked)
+        source_masked[mappable] = box_sums(source_mask_table, bottom_left[mappable], top_right[mappable]) == 0
+        masked |= source_masked
+
+    return masked
 
 
 def StartAttemptAlignPoint(pool: nornir_pools.poolbase,
@@ -180,16 +269,12 @@ def StartAttemptAlignPoint(pool: nornir_pools.poolbase,
                            transform: nornir_imageregistration.ITransform,
                            target_image: NDArray,
                            source_image: NDArray,
-                           target_mask: NDArray | None,
-                           source_mask: NDArray | None,
                            target_image_stats: nornir_imageregistration.ImageStats,
                            source_image_stats: nornir_imageregistration.ImageStats,
                            target_controlpoint,
                            alignmentArea: NDArray | tuple[float, float],
                            anglesToSearch: Iterable[float]):
-    if either_roi_is_masked(transform, target_mask, source_mask, target_controlpoint, alignmentArea):
-        return None
-
+    """Masked points should be removed with find_masked_rois before alignment is attempted"""
     if pool is None:
         if nornir_imageregistration.in_debug_mode():
             pool = nornir_pools.GetGlobalSerialPool()
@@ -227,58 +312,42 @@ def FindIndiciesOutsideImage(points: NDArray, image: NDArray):
     return numpy.maximum(too_large, too_small)
 
 
-def ClearPointsOnMask(transform: nornir_imageregistration.ITransform, FixedMaskImage: NDArray,
-                      WarpedMaskImage: NDArray):
-    '''Remove all transform points that are positioned in the mask image'''
-
-    if FixedMaskImage is not None:
-        SourcePoints = transform.TransformModel.SourcePoints
-        NumPoints = SourcePoints.shape[0]
-        SourcePointIndicies = numpy.asarray(numpy.floor(SourcePoints), dtype=numpy.int32)
-
-        OutOfBounds = FindIndiciesOutsideImage(SourcePointIndicies, FixedMaskImage)
-
-        Indicies = numpy.asarray(range(0, len(OutOfBounds)), dtype=numpy.int32)
-
-        OutOfBoundsIndicies = Indicies[OutOfBounds]
-
-        SourcePointsAndIndex = numpy.hstack(
-            (SourcePoints, numpy.asarray(range(0, NumPoints), dtype=numpy.int32).reshape(NumPoints, 1))).astype(
-            numpy.int32, copy=False)
-
-        # transform.RemovePoints(OutOfBounds)
-        InBoundsPointsAndIndex = SourcePointsAndIndex[OutOfBounds == 0, :]
-
-        SourcePointsInMask = FixedMaskImage[InBoundsPointsAndIndex[:, 0], InBoundsPointsAndIndex[:, 1]]
-        SourcePointsToRemove = SourcePointsInMask == 0
-        MaskedPointIndicies = InBoundsPointsAndIndex[SourcePointsToRemove, 2]
-
-        AllMaskedIndicies = numpy.concatenate((OutOfBoundsIndicies, MaskedPointIndicies))
-        AllMaskedIndicies.sort()
-        transform.RemovePoints(AllMaskedIndicies)
-
-    if WarpedMaskImage is not None:
-        SourcePoints = transform.TransformModel.SourcePoints
-        NumPoints = SourcePoints.shape[0]
-        SourcePointIndicies = numpy.asarray(numpy.floor(SourcePoints), dtype=numpy.int32)
+def FindPointsOnMask(points: NDArray, MaskImage: NDArray | None) -> NDArray[numpy.bool_]:
+    '''
+    :param ndarray points: A nx2 array of coordinates in the image
+    :param ndarray MaskImage: A nxm mask image, zero where masked, or None
+    :return: An n array of bools, True where the point is outside the image or on a masked pixel
+    '''
+    if MaskImage is None:
+        return numpy.zeros(points.shape[0], dtype=bool)
 
-        OutOfBounds = FindIndiciesOutsideImage(SourcePointIndicies, WarpedMaskImage)
+    finite = numpy.all(numpy.isfinite(points), axis=1)
+    PointIndicies = numpy.floor(numpy.where(finite[:, numpy.newaxis], points, -1)).astype(numpy.intp)
+    culled = FindIndiciesOutsideImage(PointIndicies, MaskImage)
 
-        Indicies = numpy.asarray(range(0, len(OutOfBounds)), dtype=numpy.int32)
+    inside = ~culled
+    culled[inside] = MaskImage[PointIndicies[inside, 0], PointIndicies[inside, 1]] == 0
+    return culled
 
-        OutOfBoundsIndicies = Indicies[OutOfBounds]
 
-        SourcePointsAndIndex = numpy.hstack(
-            (SourcePoints, numpy.asarray(range(0, NumPoints), dtype=numpy.int32).reshape(NumPoints, 1))).astype(
-            numpy.int32, copy=False)
+def ClearPointsOnMask(transform_controller: TransformController,
+                      FixedMaskImage: NDArray | None,
+                      WarpedMaskImage: NDArray | None) -> int:
+    '''
+    Remove all transform points that are positioned in either mask image.  Both masks are tested
+    against the same points and every culled point is removed in one call, so the transform is
+    only rebuilt once.
+    :return: Number of points removed
+    '''
+    transform = transform_controller.TransformModel
+    if not isinstance(transform, nornir_imageregistration.IControlPoints):
+        return 0
 
-        # transform.RemovePoints(OutOfBounds)
-        InBoundsPointsAndIndex = SourcePointsAndIndex[OutOfBounds == 0, :]
+    culled = FindPointsOnMask(transform.TargetPoints, FixedMaskImage) | \
+             FindPointsOnMask(transform.SourcePoints, WarpedMaskImage)
 
-        SourcePointsInMask = WarpedMaskImage[InBoundsPointsAndIndex[:, 0], InBoundsPointsAndIndex[:, 1]]
-        SourcePointsToRemove = SourcePointsInMask == 0
-        MaskedPointIndicies = InBoundsPointsAndIndex[SourcePointsToRemove, 2]
+    MaskedIndicies = numpy.flatnonzero(culled)
+    if len(MaskedIndicies) > 0:
+        transform_controller.RemovePoints(MaskedIndicies)
 
-        AllMaskedIndicies = numpy.concatenate((OutOfBoundsIndicies, MaskedPointIndicies))
-        AllMaskedIndicies.sort()
-        transform.RemovePoints(AllMaskedIndicies)
+    return len(MaskedIndicies)
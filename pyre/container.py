@@ -1,5 +1,6 @@
 from __future__ import annotations
 import abc
+import logging
 import os
 import sys
 import pydantic
@@ -10,10 +11,11 @@ from dependency_injector import containers, providers
 from dependency_injector.providers import AbstractFactory, Factory, Dict, AbstractSingleton
 
 import nornir_imageregistration
-from pyre.interfaces.managers import (ICommandHistory, IControlPointActionMap, IGLContextManager, IImageLoader,
+from pyre.interfaces.managers import (ICommandHistory, IControlPointActionMap, IEditJournal, IGLContextManager, IImageLoader,
                                       IImageManager,
-                                      IMousePositionHistoryManager,
-                                      IRegionMap, ITransformControllerGLBufferManager, IImageViewModelManager,
+                                      IMousePositionHistoryManager, IProfiler,
+                                      IRegionMap, IRegistrationROICache, ITransformControllerGLBufferManager,
+                                      IImageViewModelManager,
                                       IWindowManager, IControlPointMapManager, ControlPointManagerKey, IActionMap)
 from pyre.interfaces.viewtype import ViewType
 from pyre.interfaces.action import ControlPointAction
@@ -25,6 +27,8 @@ from nornir_imageregistration.transforms.transform_type import TransformType
 
 ControlPointActionCommandMapType = Dict[ControlPointAction, AbstractFactory[ICommand]]
 
+_logger = logging.getLogger(__name__)
+
 
 def find_file_in_syspath(filename) -> Generator[str, None, None]:
     for directory in sys.path:
@@ -41,16 +45,16 @@ def load_yaml_settings() -> object:
         with open(cwd_config, 'r') as file:
             return yaml.load(file, Loader=yaml.FullLoader)
     except:
-        print("Failed to load configuration file: " + cwd_config)
+        _logger.warning("Failed to load configuration file: %s", cwd_config)
 
     for configuration in find_file_in_syspath('config.yaml'):
         try:
             with open(configuration, 'r') as file:
                 return yaml.load(file, Loader=yaml.FullLoader)
         except:
-            print("Failed to load configuration file: " + configuration)
+            _logger.warning("Failed to load configuration file: %s", configuration)
 
-    print(f"Failed to find config.yaml configuration file in {sys.path}")
+    _logger.warning("Failed to find config.yaml configuration file in %s", sys.path)
     return AppSettings()
 
 
@@ -61,15 +65,15 @@ def load_json_settings() -> AppSettings:
         return AppSettings.model_validate_json(cwd_config)
 
     except Exception as e:
-        print(f"Failed to load configuration file: {cwd_config}\n{e}")
+        _logger.warning("Failed to load configuration file: %s\n%s", cwd_config, e)
 
     for configuration in find_file_in_syspath('settings.json'):
         try:
             return AppSettings.parse_file(cwd_config)
         except:
-            print("Failed to load configuration file: " + configuration)
+            _logger.warning("Failed to load configuration file: %s", configuration)
 
-    print(f"Failed to find settings.json configuration file in {sys.path}")
+    _logger.warning("Failed to find settings.json configuration file in %s", sys.path)
     return AppSettings()
 
 
@@ -79,11 +83,15 @@ class IContainer(containers.DeclarativeContainer):
     logger: providers.Resource = None
 
     history_manager: providers.AbstractSingleton[ICommandHistory] = providers.AbstractSingleton(ICommandHistory)
-    region_map: providers.Factory[IRegionMap] = providers.AbstractFactory(IRegionMap)
+    region_map: providers.AbstractSingleton[IRegionMap] = providers.AbstractSingleton(IRegionMap)  # Shared by all views
     mouse_position_history: providers.AbstractSingleton[IMousePositionHistoryManager] = providers.AbstractSingleton(
         IMousePositionHistoryManager)
     command_history: providers.AbstractSingleton[ICommandHistory] = providers.AbstractSingleton(ICommandHistory)
+    edit_journal: providers.AbstractSingleton[IEditJournal] = providers.AbstractSingleton(IEditJournal)
+    profiler: providers.AbstractSingleton[IProfiler] = providers.AbstractSingleton(IProfiler)
     image_manager: providers.AbstractSingleton[IImageManager] = providers.AbstractSingleton(IImageManager)
+    roi_cache: providers.AbstractSingleton[IRegistrationROICache] = providers.AbstractSingleton(
+        IRegistrationROICache)
     transform_glbuffermanager: providers.AbstractSingleton[
         ITransformControllerGLBufferManager] = providers.AbstractSingleton(ITransformControllerGLBufferManager)
     imageviewmodel_manager: providers.AbstractSingleton[IImageViewModelManager] = providers.AbstractSingleton(
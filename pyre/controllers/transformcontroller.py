@@ -6,9 +6,12 @@ Created on Oct 19, 2012
 
 from __future__ import annotations
 
+import contextlib
 import copy
+import logging
 import math
-from typing import Callable, Sequence, Iterable
+import threading
+from typing import Callable, Iterable, NamedTuple, Sequence
 
 import numpy
 import numpy as np
@@ -20,9 +23,14 @@ from nornir_imageregistration import ImagePermutationHelper
 from nornir_imageregistration.transforms.base import IControlPoints
 import nornir_pools as pools
 import pyre.eventmanager
+import pyre.log
+from pyre.grid_index import GridIndex
 from pyre.interfaces.eventmanager import IEventManager
 from pyre.space import Space
 
+_logger = logging.getLogger(__name__)
+_per_edit = pyre.log.throttle()  # Points are set for every mouse motion event while dragging
+
 
 def CreateDefaultTransform(transform_type: nornir_imageregistration.transforms.TransformType,
                            FixedShape: NDArray | None = None,
@@ -65,7 +73,15 @@ def CreateDefaultMeshTransform(FixedShape=None, WarpedShape=None):
     # WarpedShape)
 
 
-TransformChangedCallback = Callable[['transform_controller'], None]
+class TransformChange(NamedTuple):
+    """The edits of a transform controller's points since its change listeners were last notified"""
+    version: int  # Version of the controller after the last edit
+    previous_version: int  # Version at the last notification, a listener that saw it only needs to update indices
+    indices: frozenset[int] | None  # Points that changed, None if any point may have changed or points were added
+
+
+# Parameter order is the transform controller, the change
+TransformChangedCallback = Callable[['transform_controller', TransformChange], None]
 
 # Parameter order is the transform controller, the old transform, the new transform
 TransformModelChangedCallback = Callable[['transform_controller',
@@ -87,6 +103,15 @@ class TransformController:
     ShowWarped: bool
     DefaultToForwardTransform: bool
     _selected_points: set[int] = set()
+    _preview_offset: NDArray[np.floating] | None = None
+    _version: int = 0
+    _notified_version: int = 0  # Version carried by the last change notification delivered to listeners
+    _dirty_indices: set[int] | None  # Points edited since the last notification, None if every point may have changed
+    _edit_indices: NDArray[np.integer] | None = None  # Points being edited while the transform fires change events
+    _change_lock: threading.Lock
+    _spatial_index: GridIndex | None = None
+    _spatial_index_version: int | None = None  # Version the spatial index was last updated at
+    _spatial_index_dirty: set[int] | None  # Points edited since the spatial index was updated, None if any may have
 
     @staticmethod
     def swap_columns_to_XY(input: NDArray[np.floating]) -> NDArray[np.floating]:
@@ -106,6 +131,27 @@ class TransformController:
     def selected_points(self, value: set[int]):
         self._selected_points = value
 
+    @property
+    def preview_offset(self) -> NDArray[np.floating] | None:
+        """
+        2x2 array of (Y,X) offsets views add to selected points while a drag is previewed, source space in the first
+        row and target space in the second.  None when no drag is being previewed.
+        """
+        return self._preview_offset
+
+    def SetPreviewOffset(self, offset: nornir_imageregistration.VectorLike | None, space: Space = Space.Source):
+        """
+        Draw the selected points offset in one space without editing the transform.  Views read the offset when
+        they draw, so no change event is fired.  Passing None ends the preview.
+        """
+        if offset is None:
+            self._preview_offset = None
+            return
+
+        preview_offset = np.zeros((2, 2), dtype=np.float64)
+        preview_offset[0 if space == Space.Source else 1, :] = offset
+        self._preview_offset = preview_offset
+
     @property
     def width(self) -> float | None:
         if isinstance(self.TransformModel, nornir_imageregistration.IDiscreteTransform):
@@ -127,27 +173,81 @@ class TransformController:
 
         return 0
 
+    @property
+    def version(self) -> int:
+        """Incremented whenever change listeners are notified.  Compare with a stored value to skip unchanged work."""
+        return self._version
+
+    @property
+    def spatial_index(self) -> GridIndex:
+        """
+        Index of the control points shared by every caller.  It indexes each point's segment from its source position
+        (tween 0) to its target position (tween 1), so one index answers queries in either space or any tween.  It is
+        brought up to date with the transform when first used after an edit.  Only the points edited since then are
+        moved, every point is compared only if points were added or removed or the edit did not say which changed.
+        """
+        if self._spatial_index is not None and self._spatial_index_version == self._version:
+            return self._spatial_index
+
+        with self._change_lock:
+            version = self._version
+            dirty = self._spatial_index_dirty
+            self._spatial_index_dirty = set()
+
+        if self._spatial_index is None:
+            self._spatial_index = GridIndex(self.SourcePoints, self.TargetPoints)
+        elif dirty is None or len(self._spatial_index) != self.NumPoints:
+            self._spatial_index.update(self.SourcePoints, self.TargetPoints)
+        elif len(dirty) > 0:
+            indices = np.fromiter(dirty, dtype=np.intp, count=len(dirty))
+            self._spatial_index.move(indices, self.SourcePoints[indices], self.TargetPoints[indices])
+        self._spatial_index_version = version
+
+        return self._spatial_index
+
+    def FindPointsWithin(self, ImagePoint: NDArray[np.floating], max_distance: float,
+                         tween: float | Space) -> NDArray[np.integer]:
+        """:return: Sorted indicies of control points within max_distance of the point at the tween"""
+        return self.spatial_index.query_ball_point(ImagePoint, max_distance, tween=float(tween))
+
+    @staticmethod
+    def _read_only(array: NDArray) -> NDArray:
+        """A view of the array that cannot be written through"""
+        view = array.view()
+        view.flags.writeable = False
+        return view
+
     @property
     def points(self) -> NDArray[np.floating]:
+        """
+        Read-only view of the control points.  The view tracks later edits of the transform, use CopyPoints to
+        keep a snapshot.
+        """
         if isinstance(self.TransformModel, nornir_imageregistration.IControlPoints):
-            return copy.deepcopy(self.TransformModel.points)
+            return self._read_only(self.TransformModel.points)
 
         return np.empty((0, 4))
 
     @property
     def SourcePoints(self) -> NDArray[np.floating]:
+        """Read-only view of the source points"""
         if isinstance(self.TransformModel, nornir_imageregistration.IControlPoints):
-            return copy.deepcopy(self.TransformModel.SourcePoints)
+            return self._read_only(self.TransformModel.SourcePoints)
 
         return np.empty((0, 2))
 
     @property
     def TargetPoints(self) -> NDArray[np.floating]:
+        """Read-only view of the target points"""
         if isinstance(self.TransformModel, nornir_imageregistration.IControlPoints):
-            return copy.deepcopy(self.TransformModel.TargetPoints)
+            return self._read_only(self.TransformModel.TargetPoints)
 
         return np.empty((0, 2))
 
+    def CopyPoints(self) -> NDArray[np.floating]:
+        """A writable copy of the control points, for restoring the transform later"""
+        return np.array(self.points)
+
     @property
     def WarpedTriangles(self) -> NDArray[np.integer] | None:
         """:return: The triangulation of the source space, or None if the transform does not support triangulation"""
@@ -184,6 +284,9 @@ class TransformController:
         old_transform = self._TransformModel
         self._TransformModel = value
 
+        # Points of the new model share nothing with the old model's index
+        self._spatial_index = None
+
         if self._TransformModel is not None:
             assert (isinstance(value, nornir_imageregistration.ITransformChangeEvents))
             self._TransformModel.AddOnChangeEventListener(self.OnTransformChanged)
@@ -219,23 +322,56 @@ class TransformController:
         # data structure creation as much as possible
         if self.NumPoints > 25:
             self._TransformModel.InitializeDataStructures()
-        self.FireOnChangeEvent()
+        self.FireOnChangeEvent(self._edit_indices)
 
-    def FireOnChangeEvent(self):
-        """Calls every function registered to be notified when the transform changes."""
+    @contextlib.contextmanager
+    def _editing(self, indicies: NDArray[np.integer]):
+        """Change events the transform fires inside the block are reported as edits of the indicies"""
+        self._edit_indices = indicies
+        try:
+            yield
+        finally:
+            self._edit_indices = None
+
+    def FireOnChangeEvent(self, indicies: Iterable[int] | None = None):
+        """
+        Notify every function registered to be notified when the transform changes.  The version is incremented
+        immediately, listeners are notified once per turn of the event loop with the indicies changed by every
+        edit since the last notification.
+        :param indicies: Points that changed, None if any point may have changed or points were added or removed
+        """
+        with self._change_lock:
+            self._version += 1
+            if indicies is None or self._dirty_indices is None:
+                self._dirty_indices = None
+            else:
+                self._dirty_indices.update(int(i) for i in np.atleast_1d(indicies))
+
+            if indicies is None or self._spatial_index_dirty is None:
+                self._spatial_index_dirty = None
+            else:
+                self._spatial_index_dirty.update(int(i) for i in np.atleast_1d(indicies))
+
+            change = TransformChange(version=self._version,
+                                     previous_version=self._notified_version,
+                                     indices=None if self._dirty_indices is None else frozenset(self._dirty_indices))
 
         # Calls every listener when the transform has changed in a way that a point may be mapped to a new position in the fixed space
         #        Pool = pools.GetGlobalThreadPool()
         # tlist = list()
-        if wx.App.Get() is None:
-            self.__OnChangeEventListeners.invoke(self)
-        else:
-            wx.CallAfter(self.__OnChangeEventListeners.invoke, self)
+        self.__OnChangeEventListeners.post(self, change)
         #    tlist.append(Pool.add_task("OnTransformChanged calling " + str(func), func))
 
         # for task in tlist:
         # task.wait()
 
+    def _on_change_delivered(self, transform_controller: TransformController, change: TransformChange):
+        """The first listener of every notification, starts collecting the edits for the next one"""
+        with self._change_lock:
+            self._notified_version = change.version
+            if self._version == change.version:
+                self._dirty_indices = set()
+
     def FireOnTransformModelChangeEvent(self, old: nornir_imageregistration.ITransform,
                                         new: nornir_imageregistration.ITransform):
         """Calls every function registered to be notified when the transform changes."""
@@ -243,10 +379,7 @@ class TransformController:
         # Calls every listener when the transform has changed in a way that a point may be mapped to a new position in the fixed space
         #        Pool = pools.GetGlobalThreadPool()
         # tlist = list()
-        if wx.App.Get() is None:
-            self.__OnTransformModelReplacedEventListeners.invoke(self, old, new)
-        else:
-            wx.CallAfter(self.__OnTransformModelReplacedEventListeners.invoke, self, old, new)
+        self.__OnTransformModelReplacedEventListeners.post(self, old, new)
         #    tlist.append(Pool.add_task("OnTransformChanged calling " + str(func), func))
 
         # for task in tlist:
@@ -270,7 +403,12 @@ class TransformController:
         self._id = self.debug_id
         TransformController.debug_id += 1
 
-        self.__OnChangeEventListeners = pyre.eventmanager.wxEventManager[TransformChangedCallback]()
+        self._dirty_indices = set()
+        self._spatial_index_dirty = None
+        self._change_lock = threading.Lock()
+        # Edits made before the event loop delivers a notification are merged into it
+        self.__OnChangeEventListeners = pyre.eventmanager.wxEventManager[TransformChangedCallback](coalesce=True)
+        self.__OnChangeEventListeners.add(self._on_change_delivered)
         self.__OnTransformModelReplacedEventListeners = pyre.eventmanager.wxEventManager[TransformChangedCallback]()
 
         self.DefaultToForwardTransform = DefaultToForwardTransform
@@ -294,6 +432,10 @@ class TransformController:
         else:
             raise ValueError(f"points parameter has unexpected type: {points.__class__}")
 
+        if not points.flags.writeable:
+            # The transform keeps the array and edits it in place
+            points = points.copy()
+
         if isinstance(self.TransformModel, IControlPoints):
             self.TransformModel.points = points
 
@@ -321,12 +463,20 @@ class TransformController:
         float | None, int | None]:
         if isinstance(self.TransformModel, IControlPoints):
             if space == Space.Target:
-                return self.TransformModel.NearestWarpedPoint(ImagePoint)
+                return self._NearestWarpedPoint(ImagePoint)
             else:
-                return self.TransformModel.NearestFixedPoint(ImagePoint)
+                return self._NearestFixedPoint(ImagePoint)
         else:
             return None, None
 
+    def _NearestWarpedPoint(self, ImagePoint: NDArray[np.floating]) -> tuple[float | None, int | None]:
+        """Same as the transform's NearestWarpedPoint, answered from the shared spatial index"""
+        return self.spatial_index.nearest(ImagePoint, tween=float(Space.Source))
+
+    def _NearestFixedPoint(self, ImagePoint: NDArray[np.floating]) -> tuple[float | None, int | None]:
+        """Same as the transform's NearestFixedPoint, answered from the shared spatial index"""
+        return self.spatial_index.nearest(ImagePoint, tween=float(Space.Target))
+
     def TranslateFixed(self, offset: nornir_imageregistration.VectorLike):
         self.TransformModel.TranslateFixed(offset)
 
@@ -356,12 +506,12 @@ class TransformController:
         if isinstance(self.TransformModel, nornir_imageregistration.ITransfomFlip):
             self.TransformModel.Flip()
         else:
-            print("Transform does not support flipping")
+            _logger.warning("Transform does not support flipping")
 
     def TryAddPoint(self, ImageX: float, ImageY: float, space: Space = Space.Source):
 
         if not isinstance(self.TransformModel, nornir_imageregistration.transforms.IControlPointAddRemove):
-            print("transform does not support add/remove control points")
+            _logger.warning("Transform does not support add/remove control points")
             return
 
         OppositePoint = None
@@ -378,22 +528,19 @@ class TransformController:
     def TryDeletePoint(self, ImageX: float, ImageY: float, maxDistance: float, space: Space = Space.Source):
 
         if not isinstance(self.TransformModel, nornir_imageregistration.transforms.IControlPointAddRemove):
-            print("transform does not support add/remove control points")
+            _logger.warning("Transform does not support add/remove control points")
             return
 
         NearestPoint = None
         index = None
         distance = 0
 
-        try:
-            if space == Space.Target and not self.ShowWarped:
-                distance, index = self.TransformModel.NearestWarpedPoint([ImageY, ImageX])
-            else:
-                distance, index = self.TransformModel.NearestFixedPoint([ImageY, ImageX])
-        except:
-            pass;
+        if space == Space.Target and not self.ShowWarped:
+            distance, index = self._NearestWarpedPoint([ImageY, ImageX])
+        else:
+            distance, index = self._NearestFixedPoint([ImageY, ImageX])
 
-        if distance > maxDistance:
+        if index is None or distance > maxDistance:
             return None
 
         self.TransformModel.RemovePoint(index)
@@ -402,14 +549,14 @@ class TransformController:
     def TryDeletePoints(self, indicies: np.ndarray[np.integer] | Sequence[int]):
 
         if not isinstance(self.TransformModel, nornir_imageregistration.transforms.IControlPointAddRemove):
-            print("transform does not support add/remove control points")
+            _logger.warning("Transform does not support add/remove control points")
             return
         index = self._ensure_numpy_friendly_index(indicies)
 
         try:
             self.TransformModel.RemovePoint(index)
         except ValueError:
-            print(f"Could not remove points {index}, does the transform have enough points remaining?")
+            _logger.warning("Could not remove points %s, does the transform have enough points remaining?", index)
             return False
 
         return True
@@ -429,11 +576,11 @@ class TransformController:
             return None
 
         if space == Space.Target and not self.ShowWarped:
-            Distance, index = self.TransformModel.NearestWarpedPoint([ImageY, ImageX])
+            Distance, index = self._NearestWarpedPoint([ImageY, ImageX])
         else:
-            Distance, index = self.TransformModel.NearestFixedPoint([ImageY, ImageX])
+            Distance, index = self._NearestFixedPoint([ImageY, ImageX])
 
-        if Distance > maxDistance:
+        if index is None or Distance > maxDistance:
             return None
 
         index = self.MovePoint(index, ImageDY, ImageDX)
@@ -488,87 +635,120 @@ class TransformController:
 
         index = self._ensure_numpy_friendly_index(index)
 
-        if space == Space.Target:
-            if isinstance(self.TransformModel, nornir_imageregistration.transforms.ITargetSpaceControlPointEdit):
-                index = self.TransformModel.UpdateTargetPointsByIndex(index, point)
-            elif isinstance(self.TransformModel, nornir_imageregistration.transforms.ISourceSpaceControlPointEdit):
-                new_source_point = self.TransformModel.InverseTransform([point])[0]
-                index = self.TransformModel.UpdateSourcePointsByIndex(index, new_source_point)
-            else:
-                raise ValueError("Transform does not support editing target points in either source or target space")
-        elif space == Space.Source:
-            if isinstance(self.TransformModel, nornir_imageregistration.transforms.ISourceSpaceControlPointEdit):
-                index = self.TransformModel.UpdateSourcePointsByIndex(index, point)
-            elif isinstance(self.TransformModel, nornir_imageregistration.transforms.ITargetSpaceControlPointEdit):
-                new_target_point = self.TransformModel.Transform([point])[0]
-                index = self.TransformModel.UpdateTargetPointsByIndex(index, new_target_point)
+        edited = np.atleast_1d(index)
+        with self._editing(edited):
+            if space == Space.Target:
+                if isinstance(self.TransformModel, nornir_imageregistration.transforms.ITargetSpaceControlPointEdit):
+                    index = self.TransformModel.UpdateTargetPointsByIndex(index, point)
+                elif isinstance(self.TransformModel, nornir_imageregistration.transforms.ISourceSpaceControlPointEdit):
+                    new_source_point = self.TransformModel.InverseTransform([point])[0]
+                    index = self.TransformModel.UpdateSourcePointsByIndex(index, new_source_point)
+                else:
+                    raise ValueError("Transform does not support editing target points in either source or target space")
+            elif space == Space.Source:
+                if isinstance(self.TransformModel, nornir_imageregistration.transforms.ISourceSpaceControlPointEdit):
+                    index = self.TransformModel.UpdateSourcePointsByIndex(index, point)
+                elif isinstance(self.TransformModel, nornir_imageregistration.transforms.ITargetSpaceControlPointEdit):
+                    new_target_point = self.TransformModel.Transform([point])[0]
+                    index = self.TransformModel.UpdateTargetPointsByIndex(index, new_target_point)
+                else:
+                    raise ValueError("Transform does not support editing target points in either source or target space")
             else:
-                raise ValueError("Transform does not support editing target points in either source or target space")
-        else:
-            raise ValueError(f"Unexpected value for space: {space}")
+                raise ValueError(f"Unexpected value for space: {space}")
+
+        if not np.array_equal(np.atleast_1d(index), edited):
+            # The transform reordered points, indices of other points may have changed too
+            self.FireOnChangeEvent()
 
-        print(f"Set point {str(index)} {str(point)}")
+        _logger.debug("Set point %s %s", index, point, extra=_per_edit)
 
         return index
 
     def MovePoint(self, index: int | list[int], ImageDX: float, ImageDY: float,
                   space: Space = Space.Source) -> int:
-
+        """Translate one or more points by the same offset, see MovePoints"""
         if not isinstance(self.TransformModel, nornir_imageregistration.transforms.IControlPoints):
             return index
 
         np_index = self._ensure_numpy_friendly_index(index)
+        moved = self.MovePoints(np.atleast_1d(np_index), (ImageDY, ImageDX), space=space)
 
-        original_point = self.GetPoints(np_index, space)
-        if original_point is None:
-            print(f"No point found for index {np_index}")
-            return index
+        if isinstance(index, Iterable):
+            return moved
+        else:
+            return int(moved[0])
 
-        point = original_point + numpy.array((ImageDY, ImageDX))
+    def MovePoints(self, indicies: set[int] | NDArray[np.integer] | Sequence[int],
+                   offsets: NDArray[np.floating] | nornir_imageregistration.VectorLike,
+                   space: Space = Space.Source) -> NDArray[np.integer]:
+        """
+        Translate several points in a single edit of the transform, so change listeners are notified once.
+        If the transform cannot edit points in the requested space the equivalent movement of the points in the
+        opposite space is computed for every point with one Transform or InverseTransform call.
+        :param offsets: A (Y,X) offset applied to every point or an Nx2 array with an offset for each point
+        :return: The indicies of the moved points, the transform may reorder points when they move
+        """
+        if isinstance(indicies, set):
+            np_index = np.fromiter(indicies, dtype=int, count=len(indicies))
+        else:
+            np_index = np.asarray(indicies, dtype=int).ravel()
+
+        if len(np_index) == 0 or not isinstance(self.TransformModel, nornir_imageregistration.transforms.IControlPoints):
+            return np_index
+
+        if np_index.min() < 0 or np_index.max() >= self.NumPoints:
+            _logger.warning("No point found for index %s", np_index)
+            return np_index
+
+        offsets = np.broadcast_to(np.asarray(offsets, dtype=np.float64).reshape(-1, 2), (len(np_index), 2))
+
+        if space == Space.Source:
+            original_points = self.TransformModel.SourcePoints[np_index]
+        else:
+            original_points = self.TransformModel.TargetPoints[np_index]
+
+        points = original_points + offsets
 
         if space == Space.Source:
             # This code is to manipulate transforms where source space points are fixed.  Instead we move the
             # target points in this case.
             if isinstance(self.TransformModel, nornir_imageregistration.transforms.ISourceSpaceControlPointEdit):
-                np_index = self.TransformModel.UpdateSourcePointsByIndex(np_index, point)
+                moved = self._update_points(self.TransformModel.UpdateSourcePointsByIndex, np_index, points)
             else:
-                # if not self.ShowWarped:
-                #     np_index = self.TransformModel.UpdateSourcePointsByPosition(original_point, point)
-                # else:
-                if isinstance(index, Iterable):
-                    if len(index) > 1:
-                        raise NotImplementedError("MovePoint does not support moving multiple points, but it should")
-
-                OldTargetPoint = \
-                    self.TransformModel.Transform([[point[0] - ImageDY, point[1] - ImageDX]])[0]
-                NewTargetPoint = self.TransformModel.Transform([point])[0]
+                OldTargetPoints = self.TransformModel.Transform(original_points)
+                NewTargetPoints = self.TransformModel.Transform(points)
 
-                Delta = OldTargetPoint - NewTargetPoint
-                FinalPoint = self.TransformModel.TargetPoints[np_index] + Delta
-                np_index = self.TransformModel.UpdateTargetPointsByIndex(np_index, FinalPoint)
+                Delta = OldTargetPoints - NewTargetPoints
+                FinalPoints = self.TransformModel.TargetPoints[np_index] + Delta
+                moved = self._update_points(self.TransformModel.UpdateTargetPointsByIndex, np_index, FinalPoints)
 
         else:
             if isinstance(self.TransformModel, nornir_imageregistration.transforms.ITargetSpaceControlPointEdit):
-                np_index = self.TransformModel.UpdateTargetPointsByIndex(np_index, point)
+                moved = self._update_points(self.TransformModel.UpdateTargetPointsByIndex, np_index, points)
             else:
-                # if not self.ShowWarped:
-                #     np_index = self.TransformModel.UpdateSourcePointsByPosition(original_point, point)
-                # else:
-                if isinstance(index, Iterable):
-                    if len(index) > 1:
-                        raise NotImplementedError("MovePoint does not support moving multiple points, but it should")
-
-                OldSourcePoint = \
-                    self.TransformModel.InverseTransform([[point[0] - ImageDY, point[1] - ImageDX]])[0]
-                NewSourcePoint = self.TransformModel.InverseTransform([point])[0]
-
-                Delta = OldSourcePoint - NewSourcePoint
-                FinalPoint = self.TransformModel.SourcePoints[np_index] + Delta
-                np_index = self.TransformModel.UpdateSourcePointsByIndex(np_index, FinalPoint)
+                OldSourcePoints = self.TransformModel.InverseTransform(original_points)
+                NewSourcePoints = self.TransformModel.InverseTransform(points)
+
+                Delta = OldSourcePoints - NewSourcePoints
+                FinalPoints = self.TransformModel.SourcePoints[np_index] + Delta
+                moved = self._update_points(self.TransformModel.UpdateSourcePointsByIndex, np_index, FinalPoints)
+
+        return moved
+
+    def _update_points(self,
+                       update: Callable[[int | NDArray[np.integer], NDArray[np.floating]], int | NDArray[np.integer]],
+                       np_index: NDArray[np.integer],
+                       points: NDArray[np.floating]) -> NDArray[np.integer]:
+        """Call one of the transform's Update*PointsByIndex methods, single points are passed as scalars"""
+        with self._editing(np_index):
+            if len(np_index) == 1:
+                result = update(int(np_index[0]), points[0])
+            else:
+                result = update(np_index, points)
 
-                # print(f'Dragged point {str(np_index)} {str(point)}')
+        moved = np.atleast_1d(np.asarray(result, dtype=int))
+        if not np.array_equal(moved, np_index):
+            # The transform reordered points, indices of other points may have changed too
+            self.FireOnChangeEvent()
 
-        if isinstance(index, Iterable) and not isinstance(np_index, Iterable):
-            return np.array([np_index], dtype=int)
-        else:
-            return np_index
+        return moved
@@ -1,5 +1,8 @@
-import inspect
-from typing import Any
+import logging
+import sys
+import threading
+import weakref
+from typing import Any, Callable, Hashable
 
 import wx
 import wx.lib.newevent
@@ -7,19 +10,48 @@ import wx.lib.newevent
 from pyre.interfaces import EventCallbackType, IEventManager
 from pyre.ui.events.invoke_on_main_thread_event import wxInvokeOnMainThreadEvent
 
+_logger = logging.getLogger(__name__)
+
+_skipped_modules = frozenset((__name__, 'typing'))  # Frames skipped when finding the class creating a manager
+
+
+def _listener_reference(func: Callable) -> Callable[[], Callable | None]:
+    """
+    A weak reference to a bound method, so registering a listener does not keep its object alive.  Other callables,
+    such as lambdas and functions, usually have no other owner and are referenced strongly.
+    """
+    if hasattr(func, '__self__') and hasattr(func, '__func__'):
+        return weakref.WeakMethod(func)
+
+    return lambda: func
+
 
 class wxEventManager(IEventManager[EventCallbackType]):
     """
-    Implements an event manager that uses wx post to invoke events on the main wx thread
+    Implements an event manager that uses wx post to invoke events on the main wx thread.
+
+    Listeners that are bound methods are held by weak reference and dropped once their object is collected.
+    A coalescing manager keeps at most one pending post for each source, the first positional argument, and
+    delivers the arguments of the latest post when the event loop reaches it.
     """
-    _listeners = list[EventCallbackType]
+    _listeners: list[Callable[[], EventCallbackType | None]]
     _event_type: Any
     _event_binder: wx.PyEventBinder
-    _description: str  # Description of the event manager to print in debug messages
+    _description: str | None  # Description of the event manager to print in debug messages
+    _coalesce: bool
+    _pending: dict[Hashable, tuple[tuple, dict]]  # Arguments of the pending post for each source
+    _pending_lock: threading.Lock
+
+    @property
+    def description(self) -> str | None:
+        return self._description
 
-    def __init__(self, description: str | None = None):
+    def __init__(self, description: str | None = None, coalesce: bool = False):
         self._listeners = []
         self._description = description if description is not None else self._get_invoking_class()
+        self._coalesce = coalesce
+        self._pending = {}
+        self._pending_lock = threading.Lock()
         # # self._event_type = wx.NewEventType()  # Create an event type for this instance of the manager
         # self._event_type, self._event_binder = wx.lib.newevent.NewEvent()
         #
@@ -30,24 +62,73 @@ class wxEventManager(IEventManager[EventCallbackType]):
 
     @staticmethod
     def _get_invoking_class() -> str | None:
-        """Get the class name of the object that invoked the method that invoked this function"""
-        frame = inspect.stack()[2]
-        local_vars = frame.frame.f_locals
-        caller_instance = local_vars.get('self', None)
+        """Get the class name of the object that created this manager, without formatting the stack"""
+        frame = sys._getframe(1)
+        while frame is not None and frame.f_globals.get('__name__') in _skipped_modules:
+            frame = frame.f_back
+
+        if frame is None:
+            return None
+
+        caller_instance = frame.f_locals.get('self', None)
         return caller_instance.__class__.__name__ if caller_instance is not None else None
 
     def add(self, func: EventCallbackType):
-        self._listeners.append(func)
+        self._listeners.append(_listener_reference(func))
 
     def remove(self, func: EventCallbackType):
-        self._listeners.remove(func)
+        for i, reference in enumerate(self._listeners):
+            if reference() == func:
+                del self._listeners[i]
+                return
+
+        raise ValueError(f"{func} is not a listener of {self._description}")
 
     def invoke(self, *args, **kwargs):
-        print(f'wxEventManager.invoke {self._description} args={args} kwargs={kwargs}')
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug("invoke %s with %d args, %d listeners", self._description, len(args), len(self._listeners))
+
         if wx.IsMainThread():
-            for listener in self._listeners:
+            alive = []
+            for reference in self._listeners:
+                listener = reference()
+                if listener is not None:
+                    alive.append(listener)
+
+            if len(alive) != len(self._listeners):
+                self._listeners = [reference for reference in self._listeners if reference() is not None]
+
+            for listener in alive:
                 listener(*args, **kwargs)
         else:
             # If we are not on the main thread, invoke the event on the main thread
             event = wxInvokeOnMainThreadEvent(obj=self, args=args, kwargs=kwargs)
             wx.PostEvent(wx.GetApp().GetTopWindow(), event)
+
+    def post(self, *args, **kwargs):
+        """Invoke the listeners on a later turn of the wx event loop, or now if there is no wx app"""
+        if wx.App.Get() is None:
+            self.invoke(*args, **kwargs)
+            return
+
+        if not self._coalesce:
+            wx.CallAfter(self.invoke, *args, **kwargs)
+            return
+
+        key = id(args[0]) if len(args) > 0 else None
+        with self._pending_lock:
+            already_pending = key in self._pending
+            self._pending[key] = (args, kwargs)
+
+        if already_pending:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug("coalesced post of %s", self._description)
+            return
+
+        wx.CallAfter(self._invoke_pending, key)
+
+    def _invoke_pending(self, key: Hashable):
+        with self._pending_lock:
+            args, kwargs = self._pending.pop(key)
+
+        self.invoke(*args, **kwargs)
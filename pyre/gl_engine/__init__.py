@@ -1,5 +1,5 @@
 from .helpers import check_for_error, get_gl_type_size, get_dtype_for_gl_type
-from .interfaces import IBuffer, IIndexBuffer, IVAO
+from .interfaces import IBuffer, IGLContext, IIndexBuffer, IVAO
 from pyre.gl_engine.shaders.shader_base import BaseShader
 from . import shaders as shaders, textures, vertex_attribute, vertexarraylayout
 from .dynamic_vao import DynamicVAO
@@ -7,7 +7,8 @@ from .framebuffer import FrameBuffer
 from .gl_buffer import GLBuffer, GLIndexBuffer
 from .helpers import check_for_error, get_gl_type_size
 from .instanced_vao import InstancedVAO
-from .interfaces import IBuffer, IIndexBuffer, IVAO
+from .offscreen_context import OffscreenBackend, OffscreenGLContext
+from .interfaces import IBuffer, IGLContext, IIndexBuffer, IVAO
 from .shader_vao import ShaderVAO
 from .textures import (create_grayscale_texture, create_rgba_texture, create_rgba_texture_array,
                        read_grayscale_texture, read_rgba_texture, get_texture_array_length)
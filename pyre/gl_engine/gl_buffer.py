@@ -96,6 +96,31 @@ class GLBuffer(IBuffer):
         gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
         check_for_error()
 
+    def update_rows(self, indices: NDArray[np.integer], rows: NDArray[np.floating]):
+        """Replace rows of the data, uploading each run of consecutive rows with one call"""
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        if len(indices) == 0:
+            return
+
+        order = np.argsort(indices)
+        indices = indices[order]
+        self._data[indices] = np.asarray(rows)[order]
+
+        row_nbytes = self._data.nbytes // len(self._data)
+        run_starts = np.concatenate(([0], np.flatnonzero(np.diff(indices) != 1) + 1))
+        run_ends = np.concatenate((run_starts[1:], [len(indices)]))
+
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, self.buffer)
+        check_for_error()
+        for run_start, run_end in zip(run_starts.tolist(), run_ends.tolist()):
+            first = int(indices[run_start])
+            block = np.ascontiguousarray(self._data[first:first + run_end - run_start])
+            gl.glBufferSubData(gl.GL_ARRAY_BUFFER, first * row_nbytes, block.nbytes, block)
+            check_for_error()
+
+        gl.glBindBuffer(gl.GL_ARRAY_BUFFER, 0)
+        check_for_error()
+
     def __del__(self):
         if self._buffer is not None:
             gl.glDeleteBuffers(1, [self._buffer])
@@ -58,3 +58,18 @@ class IFloatInstanceBuffer(IBuffer):
     def data(self) -> NDArray[np.floating]:
         """The data in the buffer"""
         raise NotImplementedError()
+
+
+class IGLContext(ABC):
+    """An OpenGL context that is not owned by a wx window, such as an offscreen context."""
+
+    @abstractmethod
+    def activate(self):
+        """Make this context current on the calling thread"""
+        raise NotImplementedError()
+
+    @property
+    @abstractmethod
+    def size(self) -> tuple[int, int]:
+        """Size of the drawable surface (height, width)"""
+        raise NotImplementedError()
@@ -0,0 +1,199 @@
+"""
+OpenGL contexts that render without a window.  Used for batch rendering on machines
+without a display and for benchmarks that must run without a GPU.
+
+PyOpenGL selects its platform when OpenGL is first imported.  Set the PYOPENGL_PLATFORM
+environment variable to 'egl' or 'osmesa' before importing pyre to use these contexts.
+"""
+import ctypes
+from enum import Enum
+import os
+
+from OpenGL import GL as gl
+import numpy as np
+from numpy.typing import NDArray
+
+from pyre.gl_engine.interfaces import IGLContext
+
+
+class OffscreenBackend(Enum):
+    EGL = 'egl'  # EGL pbuffer surface, hardware accelerated where a driver is available
+    OSMesa = 'osmesa'  # Mesa software rasterizer rendering into client memory
+
+    @staticmethod
+    def from_environment() -> 'OffscreenBackend':
+        """The backend matching the PyOpenGL platform, defaults to EGL"""
+        platform = os.environ.get('PYOPENGL_PLATFORM', '').lower()
+        if platform == OffscreenBackend.OSMesa.value:
+            return OffscreenBackend.OSMesa
+        return OffscreenBackend.EGL
+
+
+class OffscreenGLContext(IGLContext):
+    """
+    An OpenGL 4.5 core context with an offscreen default framebuffer.  Framebuffer 0
+    refers to the offscreen surface, so views that render to the default framebuffer
+    work unmodified.  Contexts share objects with the first offscreen context created.
+    """
+    _shared: 'OffscreenGLContext | None' = None
+
+    _backend: OffscreenBackend
+    _size: tuple[int, int]  # (height, width)
+
+    _egl_display = None
+    _egl_config = None
+    _egl_surface = None
+    _egl_context = None
+
+    _osmesa_context = None
+    _osmesa_buffer: NDArray[np.uint8] | None = None
+
+    @property
+    def backend(self) -> OffscreenBackend:
+        return self._backend
+
+    @property
+    def size(self) -> tuple[int, int]:
+        return self._size
+
+    def __init__(self, size: tuple[int, int], backend: OffscreenBackend | None = None):
+        """
+        :param size: Size of the offscreen surface (height, width)
+        :param backend: Context backend, defaults to the PyOpenGL platform in use
+        """
+        self._backend = OffscreenBackend.from_environment() if backend is None else backend
+        self._size = (int(size[0]), int(size[1]))
+
+        if self._backend == OffscreenBackend.EGL:
+            self._create_egl_context()
+        elif self._backend == OffscreenBackend.OSMesa:
+            self._create_osmesa_context()
+        else:
+            raise NotImplementedError()
+
+        if OffscreenGLContext._shared is None:
+            OffscreenGLContext._shared = self
+
+        self.activate()
+
+    def _create_egl_context(self):
+        from OpenGL import EGL
+
+        self._egl_display = EGL.eglGetDisplay(EGL.EGL_DEFAULT_DISPLAY)
+        major, minor = EGL.EGLint(), EGL.EGLint()
+        if not EGL.eglInitialize(self._egl_display, ctypes.pointer(major), ctypes.pointer(minor)):
+            raise RuntimeError("Unable to initialize EGL display")
+
+        config_attribs = [EGL.EGL_SURFACE_TYPE, EGL.EGL_PBUFFER_BIT,
+                          EGL.EGL_RED_SIZE, 8,
+                          EGL.EGL_GREEN_SIZE, 8,
+                          EGL.EGL_BLUE_SIZE, 8,
+                          EGL.EGL_ALPHA_SIZE, 8,
+                          EGL.EGL_DEPTH_SIZE, 16,
+                          EGL.EGL_RENDERABLE_TYPE, EGL.EGL_OPENGL_BIT,
+                          EGL.EGL_NONE]
+        config = EGL.EGLConfig()
+        num_configs = EGL.EGLint()
+        if not EGL.eglChooseConfig(self._egl_display, (EGL.EGLint * len(config_attribs))(*config_attribs),
+                                   ctypes.pointer(config), 1, ctypes.pointer(num_configs)) or num_configs.value < 1:
+            raise RuntimeError("No EGL configuration supports offscreen OpenGL rendering")
+        self._egl_config = config
+
+        self._egl_surface = self._create_egl_surface()
+
+        EGL.eglBindAPI(EGL.EGL_OPENGL_API)
+        context_attribs = [EGL.EGL_CONTEXT_MAJOR_VERSION, 4,
+                           EGL.EGL_CONTEXT_MINOR_VERSION, 5,
+                           EGL.EGL_CONTEXT_OPENGL_PROFILE_MASK, EGL.EGL_CONTEXT_OPENGL_CORE_PROFILE_BIT,
+                           EGL.EGL_NONE]
+        share = OffscreenGLContext._shared._egl_context if OffscreenGLContext._shared is not None else EGL.EGL_NO_CONTEXT
+        self._egl_context = EGL.eglCreateContext(self._egl_display, self._egl_config, share,
+                                                 (EGL.EGLint * len(context_attribs))(*context_attribs))
+        if self._egl_context == EGL.EGL_NO_CONTEXT:
+            raise RuntimeError("Unable to create EGL OpenGL context")
+
+    def _create_egl_surface(self):
+        from OpenGL import EGL
+
+        height, width = self._size
+        pbuffer_attribs = [EGL.EGL_WIDTH, width,
+                           EGL.EGL_HEIGHT, height,
+                           EGL.EGL_NONE]
+        surface = EGL.eglCreatePbufferSurface(self._egl_display, self._egl_config,
+                                              (EGL.EGLint * len(pbuffer_attribs))(*pbuffer_attribs))
+        if surface == EGL.EGL_NO_SURFACE:
+            raise RuntimeError("Unable to create EGL pbuffer surface")
+        return surface
+
+    def _create_osmesa_context(self):
+        from OpenGL import osmesa
+
+        attribs = [osmesa.OSMESA_FORMAT, osmesa.OSMESA_RGBA,
+                   osmesa.OSMESA_DEPTH_BITS, 16,
+                   osmesa.OSMESA_PROFILE, osmesa.OSMESA_CORE_PROFILE,
+                   osmesa.OSMESA_CONTEXT_MAJOR_VERSION, 4,
+                   osmesa.OSMESA_CONTEXT_MINOR_VERSION, 5,
+                   0]
+        share = OffscreenGLContext._shared._osmesa_context if OffscreenGLContext._shared is not None else None
+        self._osmesa_context = osmesa.OSMesaCreateContextAttribs(attribs, share)
+        if not self._osmesa_context:
+            raise RuntimeError("Unable to create OSMesa OpenGL context")
+
+        self._osmesa_buffer = np.zeros((self._size[0], self._size[1], 4), dtype=np.uint8)
+
+    def activate(self):
+        """Make this context current on the calling thread"""
+        height, width = self._size
+        if self._backend == OffscreenBackend.EGL:
+            from OpenGL import EGL
+            if not EGL.eglMakeCurrent(self._egl_display, self._egl_surface, self._egl_surface, self._egl_context):
+                raise RuntimeError("Unable to make EGL context current")
+        else:
+            from OpenGL import osmesa
+            if not osmesa.OSMesaMakeCurrent(self._osmesa_context, self._osmesa_buffer, gl.GL_UNSIGNED_BYTE, width,
+                                            height):
+                raise RuntimeError("Unable to make OSMesa context current")
+
+    def resize(self, size: tuple[int, int]):
+        """Replace the offscreen surface with one of a new size (height, width)"""
+        size = (int(size[0]), int(size[1]))
+        if size == self._size:
+            return
+
+        self._size = size
+        if self._backend == OffscreenBackend.EGL:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._egl_display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self._egl_display, self._egl_surface)
+            self._egl_surface = self._create_egl_surface()
+        else:
+            self._osmesa_buffer = np.zeros((size[0], size[1], 4), dtype=np.uint8)
+
+        self.activate()
+
+    def read_pixels(self) -> NDArray[np.uint8]:
+        """Read the default framebuffer as a (height, width, 4) RGBA array with row 0 at the top"""
+        height, width = self._size
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        data = gl.glReadPixels(0, 0, width, height, gl.GL_RGBA, gl.GL_UNSIGNED_BYTE)
+        pixels = np.frombuffer(data, dtype=np.uint8).reshape((height, width, 4))
+        return np.flipud(pixels)
+
+    def release(self):
+        """Destroy the context and its surface"""
+        if OffscreenGLContext._shared is self:
+            OffscreenGLContext._shared = None
+
+        if self._egl_context is not None:
+            from OpenGL import EGL
+            EGL.eglMakeCurrent(self._egl_display, EGL.EGL_NO_SURFACE, EGL.EGL_NO_SURFACE, EGL.EGL_NO_CONTEXT)
+            EGL.eglDestroySurface(self._egl_display, self._egl_surface)
+            EGL.eglDestroyContext(self._egl_display, self._egl_context)
+            self._egl_context = None
+            self._egl_surface = None
+        elif self._osmesa_context is not None:
+            from OpenGL import osmesa
+            osmesa.OSMesaDestroyContext(self._osmesa_context)
+            self._osmesa_context = None
+            self._osmesa_buffer = None
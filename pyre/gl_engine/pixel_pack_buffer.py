@@ -0,0 +1,89 @@
+import ctypes
+
+from OpenGL import GL as gl
+import numpy as np
+from numpy.typing import NDArray
+
+from pyre.gl_engine.helpers import check_for_error
+
+
+class PixelPackBuffer:
+    """
+    Reads pixels from the bound read framebuffer into a pixel buffer object without stalling
+    the pipeline.  begin_read issues the copy, end_read waits for it to complete and maps the
+    result into client memory.  Alternate between several buffers so the GPU renders the next
+    frame while the previous one is transferred.
+    """
+    _buffer: int | None = None
+    _capacity: int  # Size of the buffer in bytes
+    _fence = None  # Sync object signaled when the pending read completes
+    _shape: tuple[int, int, int] | None  # (height, width, channels) of the pending read
+
+    @property
+    def pending(self) -> bool:
+        """True if a read has been started and not yet retrieved"""
+        return self._shape is not None
+
+    def __init__(self):
+        self._capacity = 0
+        self._shape = None
+        self._buffer = gl.glGenBuffers(1)
+        check_for_error()
+
+    def begin_read(self, width: int, height: int, pixel_format: int = gl.GL_RGBA):
+        """Start an asynchronous copy of the lower-left width x height pixels of the read framebuffer"""
+        if self.pending:
+            raise RuntimeError("Previous read has not been retrieved with end_read")
+
+        channels = 4 if pixel_format == gl.GL_RGBA else 3 if pixel_format == gl.GL_RGB else 1
+        nbytes = width * height * channels
+
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self._buffer)
+        if nbytes > self._capacity:
+            gl.glBufferData(gl.GL_PIXEL_PACK_BUFFER, nbytes, None, gl.GL_STREAM_READ)
+            self._capacity = nbytes
+
+        gl.glPixelStorei(gl.GL_PACK_ALIGNMENT, 1)
+        gl.glReadPixels(0, 0, width, height, pixel_format, gl.GL_UNSIGNED_BYTE, ctypes.c_void_p(0))
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+        check_for_error()
+
+        self._fence = gl.glFenceSync(gl.GL_SYNC_GPU_COMMANDS_COMPLETE, 0)
+        self._shape = (height, width, channels)
+
+    def end_read(self) -> NDArray[np.uint8]:
+        """Wait for the pending read and return a copy of the pixels.  Row 0 is the bottom row of the framebuffer."""
+        if not self.pending:
+            raise RuntimeError("No read is pending")
+
+        gl.glClientWaitSync(self._fence, gl.GL_SYNC_FLUSH_COMMANDS_BIT, gl.GL_TIMEOUT_IGNORED)
+        gl.glDeleteSync(self._fence)
+        self._fence = None
+
+        shape = self._shape
+        self._shape = None
+        nbytes = shape[0] * shape[1] * shape[2]
+
+        gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, self._buffer)
+        try:
+            address = gl.glMapBufferRange(gl.GL_PIXEL_PACK_BUFFER, 0, nbytes, gl.GL_MAP_READ_BIT)
+            mapped = (ctypes.c_ubyte * nbytes).from_address(address)
+            pixels = np.frombuffer(mapped, dtype=np.uint8).reshape(shape).copy()
+            gl.glUnmapBuffer(gl.GL_PIXEL_PACK_BUFFER)
+        finally:
+            gl.glBindBuffer(gl.GL_PIXEL_PACK_BUFFER, 0)
+
+        check_for_error()
+        return pixels
+
+    def free(self):
+        if self._fence is not None:
+            gl.glDeleteSync(self._fence)
+            self._fence = None
+
+        if self._buffer is not None:
+            gl.glDeleteBuffers(1, [self._buffer])
+            self._buffer = None
+
+    def __del__(self):
+        self.free()
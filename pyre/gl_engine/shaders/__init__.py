@@ -2,6 +2,7 @@ from .color_shader import ColorShader
 from .controlpointset_shader import ControlPointSetShader
 from .overlay_shader import OverlayShader
 from .pointset_shader import PointSetShader
+from .program_cache import ProgramCache, default_cache_dir
 from .texture_shader import TextureShader
 from .transform_shader import TransformShader
 
@@ -14,8 +15,10 @@ controlpointset_shader = ControlPointSetShader()  # Type: ControlPointSetShader
 overlay_shader = OverlayShader()  # Type: OverlayShader | None
 
 
-def InitializeShaders():
-    """This must be called after the OpenGL Context is created"""
+def InitializeShaders(cache_dir: str | None = None):
+    """This must be called after the OpenGL Context is created
+    :param cache_dir: Directory to cache linked program binaries in, defaults to default_cache_dir()
+    """
     global __initialized
     global texture_shader
     global color_shader
@@ -24,10 +27,11 @@ def InitializeShaders():
     global controlpointset_shader
 
     if not __initialized:
-        color_shader.initialize_gl_objects()
-        texture_shader.initialize_gl_objects()
-        transform_shader.initialize_gl_objects()
-        pointset_shader.initialize_gl_objects()
-        controlpointset_shader.initialize_gl_objects()
-        overlay_shader.initialize_gl_objects()
+        program_cache = ProgramCache(cache_dir if cache_dir is not None else default_cache_dir())
+        color_shader.initialize_gl_objects(program_cache)
+        texture_shader.initialize_gl_objects(program_cache)
+        transform_shader.initialize_gl_objects(program_cache)
+        pointset_shader.initialize_gl_objects(program_cache)
+        controlpointset_shader.initialize_gl_objects(program_cache)
+        overlay_shader.initialize_gl_objects(program_cache)
         __initialized = True
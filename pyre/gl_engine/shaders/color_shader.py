@@ -1,3 +1,5 @@
+import logging
+
 from OpenGL import GL as gl
 import numpy as np
 from numpy._typing import NDArray
@@ -8,6 +10,8 @@ from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, Verte
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
 
+_logger = logging.getLogger(__name__)
+
 _color_vertex_shader_program = """
         #version 330
         uniform float tween; //The fractional amount of the tween between source and target space
@@ -36,10 +40,8 @@ class ColorShader(BaseShader):
     Colors fragments with a constant color, used for testing
     """
 
-    _source_pos_location = None
-    _target_pos_location = None
-    _tween_location = None
-    _model_view_projection_matrix_location = None
+    _attribute_names = ('vertex_source_position', 'vertex_target_position')
+    _uniform_names = ('tween', 'model_view_projection_matrix')
 
     def __init__(self):
         """initialize the static class.  This must be called AFTER the OpenGL context is created."""
@@ -55,36 +57,19 @@ class ColorShader(BaseShader):
 
     @property
     def source_pos_location(self) -> int:
-        if self._source_pos_location is None:
-            self._source_pos_location = gl.glGetAttribLocation(self.program, "vertex_source_position")
-            if self._source_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._source_pos_location
+        return self.attribute_location("vertex_source_position")
 
     @property
     def target_pos_location(self) -> int:
-        if self._target_pos_location is None:
-            self._target_pos_location = gl.glGetAttribLocation(self.program, "vertex_target_position")
-            if self._target_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._target_pos_location
+        return self.attribute_location("vertex_target_position")
 
     @property
     def tween_location(self) -> int:
-        if self._tween_location is None:
-            self._tween_location = gl.glGetUniformLocation(self.program, "tween")
-            if self._tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._tween_location
+        return self.uniform_location("tween")
 
     @property
     def model_view_projection_matrix(self) -> int:
-        if self._model_view_projection_matrix_location is None:
-            self._model_view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                                  "model_view_projection_matrix")
-            if self._model_view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._model_view_projection_matrix_location
+        return self.uniform_location("model_view_projection_matrix")
 
     def draw(self, model_view_proj_matrix: NDArray[np.floating], vertex_array_object: ShaderVAO, tween: float):
         """Draws the texture using the vertex and index buffers."""
@@ -100,9 +85,10 @@ class ColorShader(BaseShader):
                                   model_view_proj_matrix.astype(np.float32))
             check_for_error()
 
-            status = gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER)
-            if status != gl.GL_FRAMEBUFFER_COMPLETE:
-                print("Framebuffer is not complete")
+            # Checking the framebuffer waits for the driver, only done when it is logged
+            if _logger.isEnabledFor(logging.DEBUG) and \
+                    gl.glCheckFramebufferStatus(gl.GL_FRAMEBUFFER) != gl.GL_FRAMEBUFFER_COMPLETE:
+                _logger.debug("Framebuffer is not complete")
 
             gl.glDrawElements(gl.GL_TRIANGLES, vertex_array_object.num_elements, gl.GL_UNSIGNED_SHORT, None)
         finally:
@@ -6,15 +6,20 @@ from numpy._typing import NDArray
 
 from pyre.gl_engine import check_for_error
 from pyre.gl_engine.instanced_vao import InstancedVAO
+from pyre.gl_engine.shaders.program_cache import ProgramCache
 from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, VertexShader
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
 
+_no_offset = np.zeros((2, 2), dtype=np.float32)
+
 _controlpointset_vertex_shader_program = """
         #version 450
         uniform float tween; //The fractional amount of the tween between source and target space
         uniform mat4 view_projection_matrix;
         uniform float scale; //The scale of the points
+        uniform vec2 selected_source_offset; //Added to the source position of selected points while a drag is previewed
+        uniform vec2 selected_target_offset; //Added to the target position of selected points while a drag is previewed
         out vec2 frag_texture_coordinate;
         in vec3 vertex_position; // Verticies for a square centered at the origin 
         in vec2 vertex_texture_coordinate;
@@ -42,8 +47,9 @@ _controlpointset_vertex_shader_program = """
         }
 
         void main(){ 
-            vec3 blended_offset_pos = mix(vec3(point_source_offset, 1),
-                                   vec3(point_target_offset, 1),
+            float selected = step(0.5, texture_index);
+            vec3 blended_offset_pos = mix(vec3(point_source_offset + (selected * selected_source_offset), 1),
+                                   vec3(point_target_offset + (selected * selected_target_offset), 1),
                                    tween);
             mat4 translate_matrix;
             translate_matrix = BuildScaleTranslation(scale, blended_offset_pos);
@@ -77,19 +83,14 @@ class ControlPointSetShader(BaseShader):
     This shader renders a set of points with a texture centered on each point
     """
 
-    _texture_sampler_location: int | None = None
+    _attribute_names = ('vertex_position', 'vertex_texture_coordinate', 'point_source_offset', 'point_target_offset',
+                        'texture_index')
+    _uniform_names = ('texture_sampler', 'tween', 'scale', 'view_projection_matrix', 'selected_source_offset',
+                      'selected_target_offset')
 
-    _vertex_location: int | None = None
-    _vertex_texture_location: int | None = None
-    _point_source_offset_location: int | None = None
-    _point_target_offset_location: int | None = None
-    _tween_location: int | None = None
-    _scale_location: int | None = None
-    _view_projection_matrix_location: int | None = None
     _attributes: Sequence[VertexAttribute] | None = None
     _vertex_layout: VertexArrayLayout | None = None
     _pointset_layout: VertexArrayLayout | None = None
-    _texture_index_location: int | None = None  # Index of the texture the instance should use
 
     @property
     def vertex_layout(self) -> VertexArrayLayout:
@@ -135,89 +136,68 @@ class ControlPointSetShader(BaseShader):
 
         self._fragment_shader = FragmentShader(_controlpointset_fragment_shader_program)
 
-    def initialize_gl_objects(self):
-        super().initialize_gl_objects()
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        super().initialize_gl_objects(program_cache)
 
     @property
     def texture_index_location(self) -> int:
-        if self._texture_index_location is None:
-            self._texture_index_location = gl.glGetAttribLocation(self.program, "texture_index")
-            if self._texture_index_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._texture_index_location
+        return self.attribute_location("texture_index")
 
     @property
     def vertex_location(self) -> int:
-        if self._vertex_location is None:
-            self._vertex_location = gl.glGetAttribLocation(self.program, "vertex_position")
-            if self._vertex_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._vertex_location
+        return self.attribute_location("vertex_position")
 
     @property
     def texture_coord_location(self) -> int:
-        if self._vertex_texture_location is None:
-            self._vertex_texture_location = gl.glGetAttribLocation(self.program, "vertex_texture_coordinate")
-            if self._vertex_texture_location == -1:
-                raise ValueError("Could not find texture coordinate attribute")
-        return self._vertex_texture_location
+        return self.attribute_location("vertex_texture_coordinate")
 
     @property
     def point_source_offset_location(self) -> int:
-        if self._point_source_offset_location is None:
-            self._point_source_offset_location = gl.glGetAttribLocation(self.program, "point_source_offset")
-            if self._point_source_offset_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._point_source_offset_location
+        return self.attribute_location("point_source_offset")
 
     @property
     def point_target_offset_location(self) -> int:
-        if self._point_target_offset_location is None:
-            self._point_target_offset_location = gl.glGetAttribLocation(self.program, "point_target_offset")
-            if self._point_target_offset_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._point_target_offset_location
+        return self.attribute_location("point_target_offset")
 
     @property
     def texture_sampler(self):
-        if self._texture_sampler_location is None:
-            self._texture_sampler_location = gl.glGetUniformLocation(self.program, "texture_sampler")
-            if self._texture_sampler_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._texture_sampler_location
+        return self.uniform_location("texture_sampler")
 
     @property
     def tween_location(self) -> int:
-        if self._tween_location is None:
-            self._tween_location = gl.glGetUniformLocation(self.program, "tween")
-            if self._tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._tween_location
+        return self.uniform_location("tween")
 
     @property
     def scale_location(self) -> int:
-        if self._scale_location is None:
-            self._scale_location = gl.glGetUniformLocation(self.program, "scale")
-            if self._scale_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._scale_location
+        return self.uniform_location("scale")
+
+    @property
+    def selected_source_offset_location(self) -> int:
+        return self.uniform_location("selected_source_offset")
+
+    @property
+    def selected_target_offset_location(self) -> int:
+        return self.uniform_location("selected_target_offset")
 
     @property
     def model_view_projection_matrix_location(self) -> int:
-        if self._view_projection_matrix_location is None:
-            self._view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                            "view_projection_matrix")
-            if self._view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._view_projection_matrix_location
+        return self.uniform_location("view_projection_matrix")
 
     def draw(self, model_view_proj_matrix: NDArray[np.floating],
              texture: int,
              vao: InstancedVAO,
              num_instances: int,
              scale: float,
-             tween: float):
-        """Draws the texture using the vertex and index buffers."""
+             tween: float,
+             selected_offset: NDArray[np.floating] | None = None):
+        """
+        Draws the texture using the vertex and index buffers.
+        :param selected_offset: 2x2 array of (X,Y) offsets added to selected points, source space in the first row
+        and target space in the second.  None draws every point at its position.
+        """
+        if selected_offset is None:
+            selected_offset = _no_offset
+
         try:
             gl.glUseProgram(self.program)
             check_for_error()
@@ -234,6 +214,10 @@ class ControlPointSetShader(BaseShader):
             check_for_error()
             gl.glUniform1f(self.scale_location, scale)
             check_for_error()
+            gl.glUniform2f(self.selected_source_offset_location, *selected_offset[0])
+            check_for_error()
+            gl.glUniform2f(self.selected_target_offset_location, *selected_offset[1])
+            check_for_error()
             gl.glUniformMatrix4fv(self.model_view_projection_matrix_location, 1, False,
                                   model_view_proj_matrix.astype(np.float32))
             check_for_error()
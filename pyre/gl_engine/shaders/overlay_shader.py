@@ -11,6 +11,7 @@ from numpy._typing import NDArray
 
 from pyre.gl_engine import check_for_error
 from pyre.gl_engine.shader_vao import ShaderVAO
+from pyre.gl_engine.shaders.program_cache import ProgramCache
 from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, VertexShader, bind_texture
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
@@ -71,16 +72,11 @@ class OverlayShader(BaseShader):
     This is a shader that has a pair of verticies and textures for source/target space and can tween between them
     """
 
-    _source_texture_location: int | None = None
-    _target_texture_location: int | None = None
+    _attribute_names = ('vertex_position', 'vertex_texture_coordinate')
+    _uniform_names = ('source_texture', 'target_texture', 'model_view_projection_matrix', 'source_channel_blend',
+                      'target_channel_blend')
 
-    _source_channel_blend_location: int | None = None
-    _target_channel_blend_location: int | None = None
-
-    _vertex_position_location = None
     _target_pos_location = None
-    _texture_coord_location = None
-    _model_view_projection_matrix_location = None
     _attributes: Sequence[VertexAttribute] | None = None
 
     _fragment_shaders: dict[OverlayType, int]
@@ -103,8 +99,8 @@ class OverlayShader(BaseShader):
 
         self._programs = {}
 
-    def initialize_gl_objects(self):
-        super().initialize_gl_objects()
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        super().initialize_gl_objects(program_cache)
 
         # for overlay_type, fragment_shader in self._fragment_shaders.items():
         #    self._programs[overlay_type] = glshaders.compileProgram(self._vertex_shader.shader, fragment_shader)
@@ -115,62 +111,31 @@ class OverlayShader(BaseShader):
 
     @property
     def vertex_position_location(self) -> int:
-        if self._vertex_position_location is None:
-            self._vertex_position_location = gl.glGetAttribLocation(self.program, "vertex_position")
-            if self._vertex_position_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._vertex_position_location
+        return self.attribute_location("vertex_position")
 
     @property
     def texture_coord_location(self) -> int:
-        if self._texture_coord_location is None:
-            self._texture_coord_location = gl.glGetAttribLocation(self.program, "vertex_texture_coordinate")
-            if self._texture_coord_location == -1:
-                raise ValueError("Could not find texture coordinate attribute")
-        return self._texture_coord_location
+        return self.attribute_location("vertex_texture_coordinate")
 
     @property
     def source_texture_location(self):
-        if self._source_texture_location is None:
-            self._source_texture_location = gl.glGetUniformLocation(self.program, "source_texture")
-            if self._source_texture_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._source_texture_location
+        return self.uniform_location("source_texture")
 
     @property
     def target_texture_location(self):
-        if self._target_texture_location is None:
-            self._target_texture_location = gl.glGetUniformLocation(self.program, "target_texture")
-            if self._target_texture_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._target_texture_location
+        return self.uniform_location("target_texture")
 
     @property
     def model_view_projection_matrix_location(self) -> int:
-        if self._model_view_projection_matrix_location is None:
-            self._model_view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                                  "model_view_projection_matrix")
-            if self._model_view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._model_view_projection_matrix_location
+        return self.uniform_location("model_view_projection_matrix")
 
     @property
     def source_channel_blend_location(self) -> int:
-        if self._source_channel_blend_location is None:
-            self._source_channel_blend_location = gl.glGetUniformLocation(self.program,
-                                                                          "source_channel_blend")
-            if self._source_channel_blend_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._source_channel_blend_location
+        return self.uniform_location("source_channel_blend")
 
     @property
     def target_channel_blend_location(self) -> int:
-        if self._target_channel_blend_location is None:
-            self._target_channel_blend_location = gl.glGetUniformLocation(self.program,
-                                                                          "target_channel_blend")
-            if self._target_channel_blend_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._target_channel_blend_location
+        return self.uniform_location("target_channel_blend")
 
     def create_vao(self) -> ShaderVAO:
         """
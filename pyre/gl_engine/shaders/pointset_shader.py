@@ -6,6 +6,7 @@ from numpy._typing import NDArray
 
 from pyre.gl_engine import check_for_error
 from pyre.gl_engine.instanced_vao import InstancedVAO
+from pyre.gl_engine.shaders.program_cache import ProgramCache
 from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, VertexShader
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
@@ -49,14 +50,9 @@ class PointSetShader(BaseShader):
     This shader renders a set of points with a texture centered on each point
     """
 
-    _texture_sampler_location: int | None = None
+    _attribute_names = ('vertex_position', 'vertex_texture_coordinate', 'point_source_offset', 'point_target_offset')
+    _uniform_names = ('texture_sampler', 'tween', 'view_projection_matrix')
 
-    _vertex_location: int | None = None
-    _vertex_texture_location: int | None = None
-    _point_source_offset_location: int | None = None
-    _point_target_offset_location: int | None = None
-    _tween_location: int | None = None
-    _view_projection_matrix_location: int | None = None
     _attributes: Sequence[VertexAttribute] | None = None
     _vertex_layout: VertexArrayLayout | None = None
     _pointset_layout: VertexArrayLayout | None = None
@@ -92,65 +88,36 @@ class PointSetShader(BaseShader):
         self._vertex_shader = VertexShader(_pointset_vertex_shader_program)
         self._fragment_shader = FragmentShader(_pointset_fragment_shader_program)
 
-    def initialize_gl_objects(self):
-        super().initialize_gl_objects()
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        super().initialize_gl_objects(program_cache)
 
     @property
     def vertex_location(self) -> int:
-        if self._vertex_location is None:
-            self._vertex_location = gl.glGetAttribLocation(self.program, "vertex_position")
-            if self._vertex_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._vertex_location
+        return self.attribute_location("vertex_position")
 
     @property
     def texture_coord_location(self) -> int:
-        if self._vertex_texture_location is None:
-            self._vertex_texture_location = gl.glGetAttribLocation(self.program, "vertex_texture_coordinate")
-            if self._vertex_texture_location == -1:
-                raise ValueError("Could not find texture coordinate attribute")
-        return self._vertex_texture_location
+        return self.attribute_location("vertex_texture_coordinate")
 
     @property
     def point_source_offset_location(self) -> int:
-        if self._point_source_offset_location is None:
-            self._point_source_offset_location = gl.glGetAttribLocation(self.program, "point_source_offset")
-            if self._point_source_offset_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._point_source_offset_location
+        return self.attribute_location("point_source_offset")
 
     @property
     def point_target_offset_location(self) -> int:
-        if self._point_target_offset_location is None:
-            self._point_target_offset_location = gl.glGetAttribLocation(self.program, "point_target_offset")
-            if self._point_target_offset_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._point_target_offset_location
+        return self.attribute_location("point_target_offset")
 
     @property
     def texture_sampler(self):
-        if self._texture_sampler_location is None:
-            self._texture_sampler_location = gl.glGetUniformLocation(self.program, "texture_sampler")
-            if self._texture_sampler_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._texture_sampler_location
+        return self.uniform_location("texture_sampler")
 
     @property
     def tween_location(self) -> int:
-        if self._tween_location is None:
-            self._tween_location = gl.glGetUniformLocation(self.program, "tween")
-            if self._tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._tween_location
+        return self.uniform_location("tween")
 
     @property
     def model_view_projection_matrix_location(self) -> int:
-        if self._view_projection_matrix_location is None:
-            self._view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                            "view_projection_matrix")
-            if self._view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._view_projection_matrix_location
+        return self.uniform_location("view_projection_matrix")
 
     def draw(self, model_view_proj_matrix: NDArray[np.floating],
              texture: int,
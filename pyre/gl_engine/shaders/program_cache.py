@@ -0,0 +1,170 @@
+"""
+Caches linked shader program binaries on disk so they do not need to be compiled
+from GLSL source every time an OpenGL context is created.
+"""
+import hashlib
+import logging
+import os
+import struct
+import tempfile
+
+from OpenGL import GL as gl
+from OpenGL.error import GLError
+import numpy as np
+
+_header_format = '<I'  # Binary format enum written ahead of the program binary
+_header_size = struct.calcsize(_header_format)
+
+
+def default_cache_dir() -> str:
+    """The directory program binaries are written to when no directory is configured"""
+    return os.path.join(os.path.expanduser('~'), '.pyre', 'shader_cache')
+
+
+def _gl_string(name: int) -> str:
+    value = gl.glGetString(name)
+    if value is None:
+        return ''
+    return value.decode('utf-8', errors='replace') if isinstance(value, bytes) else str(value)
+
+
+def link_program(shaders: list[int], retrievable: bool = False) -> int:
+    """
+    Link compiled shaders into a program.
+    :param shaders: Compiled shader objects to attach
+    :param retrievable: Set the hint that the program binary will be read back with glGetProgramBinary
+    """
+    program = gl.glCreateProgram()
+    for shader in shaders:
+        gl.glAttachShader(program, shader)
+
+    if retrievable:
+        gl.glProgramParameteri(program, gl.GL_PROGRAM_BINARY_RETRIEVABLE_HINT, gl.GL_TRUE)
+
+    gl.glLinkProgram(program)
+    if gl.glGetProgramiv(program, gl.GL_LINK_STATUS) != gl.GL_TRUE:
+        info = gl.glGetProgramInfoLog(program)
+        gl.glDeleteProgram(program)
+        raise RuntimeError(f"Shader program link failure: {info}")
+
+    for shader in shaders:
+        gl.glDetachShader(program, shader)
+
+    return program
+
+
+class ProgramCache:
+    """
+    Stores linked program binaries on disk, keyed by the driver vendor/renderer/version
+    and a hash of the shader sources.  Falls back to compiling when the driver does
+    not support program binaries or the cached binary is rejected.
+    """
+    _cache_dir: str | None
+    _driver_key: str | None = None
+    _supported: bool | None = None
+
+    @property
+    def cache_dir(self) -> str | None:
+        """Directory binaries are stored in, None disables the disk cache"""
+        return self._cache_dir
+
+    @property
+    def supported(self) -> bool:
+        """True if the current context can save and load program binaries.  Requires a current context."""
+        if self._supported is None:
+            try:
+                num_formats = gl.glGetIntegerv(gl.GL_NUM_PROGRAM_BINARY_FORMATS)
+                self._supported = int(np.asarray(num_formats).flat[0]) > 0
+            except Exception as e:
+                logging.getLogger(__name__).info(f"Program binaries unsupported: {e}")
+                self._supported = False
+
+        return self._supported
+
+    def __init__(self, cache_dir: str | None = None):
+        self._cache_dir = cache_dir
+
+    def _get_driver_key(self) -> str:
+        if self._driver_key is None:
+            self._driver_key = '|'.join((_gl_string(gl.GL_VENDOR),
+                                         _gl_string(gl.GL_RENDERER),
+                                         _gl_string(gl.GL_VERSION),
+                                         _gl_string(gl.GL_SHADING_LANGUAGE_VERSION)))
+        return self._driver_key
+
+    def key(self, sources: list[str]) -> str:
+        """The cache key for a program built from the sources on the current driver"""
+        h = hashlib.sha256(self._get_driver_key().encode('utf-8'))
+        for source in sources:
+            h.update(b'\0')
+            h.update(source.encode('utf-8'))
+        return h.hexdigest()
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self._cache_dir, key + '.bin')
+
+    def load(self, sources: list[str]) -> int | None:
+        """Create a program from a cached binary, or return None if no usable binary exists"""
+        if self._cache_dir is None or not self.supported:
+            return None
+
+        path = self._path(self.key(sources))
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+        except OSError:
+            return None
+
+        if len(data) <= _header_size:
+            return None
+
+        (binary_format,) = struct.unpack_from(_header_format, data)
+        binary = np.frombuffer(data, dtype=np.uint8, offset=_header_size)
+
+        program = gl.glCreateProgram()
+        try:
+            gl.glProgramBinary(program, binary_format, binary, binary.shape[0])
+            linked = gl.glGetProgramiv(program, gl.GL_LINK_STATUS) == gl.GL_TRUE
+        except GLError as e:
+            # Some drivers raise GL_INVALID_ENUM for a binary format they no longer accept
+            logging.getLogger(__name__).info(f"Cached shader program binary rejected: {e}")
+            linked = False
+
+        if not linked:
+            # Driver updates invalidate binaries, discard it and recompile
+            gl.glDeleteProgram(program)
+            self._remove(path)
+            return None
+
+        return program
+
+    def save(self, program: int, sources: list[str]):
+        """Write the binary of a linked program to the cache.  Failures are logged and ignored."""
+        if self._cache_dir is None or not self.supported:
+            return
+
+        try:
+            length = int(gl.glGetProgramiv(program, gl.GL_PROGRAM_BINARY_LENGTH))
+            if length <= 0:
+                return
+
+            written = np.zeros(1, dtype=np.int32)
+            binary_format = np.zeros(1, dtype=np.uint32)
+            binary = np.empty(length, dtype=np.uint8)
+            gl.glGetProgramBinary(program, length, written, binary_format, binary)
+
+            os.makedirs(self._cache_dir, exist_ok=True)
+            fd, temp_path = tempfile.mkstemp(dir=self._cache_dir, suffix='.tmp')
+            with os.fdopen(fd, 'wb') as f:
+                f.write(struct.pack(_header_format, int(binary_format[0])))
+                f.write(binary[:int(written[0])].tobytes())
+            os.replace(temp_path, self._path(self.key(sources)))
+        except Exception as e:
+            logging.getLogger(__name__).warning(f"Unable to cache shader program binary: {e}")
+
+    @staticmethod
+    def _remove(path: str):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
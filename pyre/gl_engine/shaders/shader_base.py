@@ -4,6 +4,7 @@ from OpenGL import GL as gl
 from OpenGL.GL import shaders as glshaders
 
 from pyre.gl_engine.helpers import check_for_error
+from pyre.gl_engine.shaders.program_cache import ProgramCache, link_program
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
 
 
@@ -36,6 +37,11 @@ class VertexShader:
     def shader(self) -> int:
         return self._shader
 
+    @property
+    def source(self) -> str:
+        """GLSL source of the shader"""
+        return self._program
+
     def __init__(self, vertex_shader_program: str):
         self._program = vertex_shader_program
 
@@ -58,6 +64,11 @@ class FragmentShader:
     def shader(self) -> int:
         return self._shader
 
+    @property
+    def source(self) -> str:
+        """GLSL source of the shader"""
+        return self._program
+
     def __init__(self, vertex_shader_program: str):
         self._program = vertex_shader_program
 
@@ -79,13 +90,54 @@ class BaseShader(ABC):
 
     _vertex_layout: VertexArrayLayout
 
-    def initialize_gl_objects(self):
-        """Compile the shaders and programs.  Override for different behavior"""
-        self._vertex_shader.initialize_gl_objects()
-        self._fragment_shader.initialize_gl_objects()
+    _attribute_names: tuple[str, ...] = ()  # Attribute names resolved into the slot table after linking
+    _uniform_names: tuple[str, ...] = ()  # Uniform names resolved into the slot table after linking
+    _attribute_slots: dict[str, int] | None = None
+    _uniform_slots: dict[str, int] | None = None
 
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        """Compile the shaders and programs.  Override for different behavior
+        :param program_cache: If provided, the linked program is loaded from or saved to the cache
+        """
         if self._program is None:
-            self._program = glshaders.compileProgram(self._vertex_shader.shader, self._fragment_shader.shader)
+            sources = [self._vertex_shader.source, self._fragment_shader.source]
+            if program_cache is not None:
+                self._program = program_cache.load(sources)
+
+            if self._program is None:
+                self._vertex_shader.initialize_gl_objects()
+                self._fragment_shader.initialize_gl_objects()
+                self._program = link_program([self._vertex_shader.shader, self._fragment_shader.shader],
+                                             retrievable=program_cache is not None)
+                if program_cache is not None:
+                    program_cache.save(self._program, sources)
+
+        self._resolve_slots()
+
+    def _resolve_slots(self):
+        """Look up attribute and uniform locations once so draw calls do not query the driver"""
+        self._attribute_slots = {name: gl.glGetAttribLocation(self._program, name) for name in self._attribute_names}
+        self._uniform_slots = {name: gl.glGetUniformLocation(self._program, name) for name in self._uniform_names}
+
+    def attribute_location(self, name: str) -> int:
+        """Location of a vertex attribute from the slot table"""
+        if self._attribute_slots is None:
+            raise ValueError("Shaders have not been initialized")
+
+        location = self._attribute_slots.get(name, -1)
+        if location == -1:
+            raise ValueError(f"Could not find attribute {name}")
+        return location
+
+    def uniform_location(self, name: str) -> int:
+        """Location of a uniform from the slot table"""
+        if self._uniform_slots is None:
+            raise ValueError("Shaders have not been initialized")
+
+        location = self._uniform_slots.get(name, -1)
+        if location == -1:
+            raise ValueError(f"Could not find uniform {name}")
+        return location
 
     @property
     def vertex_layout(self) -> VertexArrayLayout:
@@ -6,6 +6,7 @@ import numpy as np
 from numpy._typing import NDArray
 
 from pyre.gl_engine import IVAO, check_for_error
+from pyre.gl_engine.shaders.program_cache import ProgramCache
 from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, VertexShader
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
@@ -45,13 +46,9 @@ class TextureShader(BaseShader):
     This is a static class to contain our shaders. It is a singleton.
     """
 
-    _texture_location: int | None = None
+    _attribute_names = ('vertex_source_position', 'vertex_target_position', 'vertex_texture_coordinate')
+    _uniform_names = ('texture_sampler', 'tween', 'model_view_projection_matrix')
 
-    _source_pos_location = None
-    _target_pos_location = None
-    _texture_coord_location = None
-    _tween_location = None
-    _model_view_projection_matrix_location = None
     _attributes: Sequence[VertexAttribute] | None = None
 
     def __init__(self):
@@ -67,57 +64,32 @@ class TextureShader(BaseShader):
         self._vertex_shader = VertexShader(_texture_vertex_shader_program)
         self._fragment_shader = FragmentShader(_texture_fragment_shader_program)
 
-    def initialize_gl_objects(self):
-        super().initialize_gl_objects()
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        super().initialize_gl_objects(program_cache)
 
     @property
     def source_pos_location(self) -> int:
-        if self._source_pos_location is None:
-            self._source_pos_location = gl.glGetAttribLocation(self.program, "vertex_source_position")
-            if self._source_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._source_pos_location
+        return self.attribute_location("vertex_source_position")
 
     @property
     def target_pos_location(self) -> int:
-        if self._target_pos_location is None:
-            self._target_pos_location = gl.glGetAttribLocation(self.program, "vertex_target_position")
-            if self._target_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._target_pos_location
+        return self.attribute_location("vertex_target_position")
 
     @property
     def texture_coord_location(self) -> int:
-        if self._texture_coord_location is None:
-            self._texture_coord_location = gl.glGetAttribLocation(self.program, "vertex_texture_coordinate")
-            if self._texture_coord_location == -1:
-                raise ValueError("Could not find texture coordinate attribute")
-        return self._texture_coord_location
+        return self.attribute_location("vertex_texture_coordinate")
 
     @property
     def texture_location(self):
-        if self._texture_location is None:
-            self._texture_location = gl.glGetUniformLocation(self.program, "texture_sampler")
-            if self._texture_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._texture_location
+        return self.uniform_location("texture_sampler")
 
     @property
     def tween_location(self) -> int:
-        if self._tween_location is None:
-            self._tween_location = gl.glGetUniformLocation(self.program, "tween")
-            if self._tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._tween_location
+        return self.uniform_location("tween")
 
     @property
     def model_view_projection_matrix_location(self) -> int:
-        if self._model_view_projection_matrix_location is None:
-            self._model_view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                                  "model_view_projection_matrix")
-            if self._model_view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._model_view_projection_matrix_location
+        return self.uniform_location("model_view_projection_matrix")
 
     def draw(self, model_view_proj_matrix: NDArray[np.floating], texture: int, vertex_array_object: IVAO,
              tween: float):
@@ -6,6 +6,7 @@ from numpy._typing import NDArray
 
 from pyre.gl_engine import check_for_error
 from pyre.gl_engine.shader_vao import ShaderVAO
+from pyre.gl_engine.shaders.program_cache import ProgramCache
 from pyre.gl_engine.shaders.shader_base import BaseShader, FragmentShader, VertexShader, bind_texture
 from pyre.gl_engine.vertex_attribute import VertexAttribute
 from pyre.gl_engine.vertexarraylayout import VertexArrayLayout
@@ -49,15 +50,9 @@ class TransformShader(BaseShader):
     This is a shader that has a pair of verticies and textures for source/target space and can tween between them
     """
 
-    _source_texture_location: int | None = None
-    _target_texture_location: int | None = None
+    _attribute_names = ('vertex_source_position', 'vertex_target_position', 'vertex_texture_coordinate')
+    _uniform_names = ('source_texture', 'target_texture', 'vert_tween', 'texture_tween', 'model_view_projection_matrix')
 
-    _source_pos_location = None
-    _target_pos_location = None
-    _texture_coord_location = None
-    _vertex_tween_location = None
-    _texture_tween_location = None
-    _model_view_projection_matrix_location = None
     _attributes: Sequence[VertexAttribute] | None = None
 
     def __init__(self):
@@ -73,73 +68,40 @@ class TransformShader(BaseShader):
         self._vertex_shader = VertexShader(_transform_vertex_shader_program)
         self._fragment_shader = FragmentShader(_transform_fragment_shader_program)
 
-    def initialize_gl_objects(self):
-        super().initialize_gl_objects()
+    def initialize_gl_objects(self, program_cache: ProgramCache | None = None):
+        super().initialize_gl_objects(program_cache)
 
     @property
     def source_pos_location(self) -> int:
-        if self._source_pos_location is None:
-            self._source_pos_location = gl.glGetAttribLocation(self.program, "vertex_source_position")
-            if self._source_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._source_pos_location
+        return self.attribute_location("vertex_source_position")
 
     @property
     def target_pos_location(self) -> int:
-        if self._target_pos_location is None:
-            self._target_pos_location = gl.glGetAttribLocation(self.program, "vertex_target_position")
-            if self._target_pos_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._target_pos_location
+        return self.attribute_location("vertex_target_position")
 
     @property
     def texture_coord_location(self) -> int:
-        if self._texture_coord_location is None:
-            self._texture_coord_location = gl.glGetAttribLocation(self.program, "vertex_texture_coordinate")
-            if self._texture_coord_location == -1:
-                raise ValueError("Could not find texture coordinate attribute")
-        return self._texture_coord_location
+        return self.attribute_location("vertex_texture_coordinate")
 
     @property
     def source_texture_location(self):
-        if self._source_texture_location is None:
-            self._source_texture_location = gl.glGetUniformLocation(self.program, "source_texture")
-            if self._source_texture_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._source_texture_location
+        return self.uniform_location("source_texture")
 
     @property
     def target_texture_location(self):
-        if self._target_texture_location is None:
-            self._target_texture_location = gl.glGetUniformLocation(self.program, "target_texture")
-            if self._target_texture_location == -1:
-                raise ValueError("Could not find texture_sampler attribute")
-        return self._target_texture_location
+        return self.uniform_location("target_texture")
 
     @property
     def vertex_tween_location(self) -> int:
-        if self._vertex_tween_location is None:
-            self._vertex_tween_location = gl.glGetUniformLocation(self.program, "vert_tween")
-            if self._vertex_tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._vertex_tween_location
+        return self.uniform_location("vert_tween")
 
     @property
     def texture_tween_location(self) -> int:
-        if self._texture_tween_location is None:
-            self._texture_tween_location = gl.glGetUniformLocation(self.program, "texture_tween")
-            if self._texture_tween_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._texture_tween_location
+        return self.uniform_location("texture_tween")
 
     @property
     def model_view_projection_matrix_location(self) -> int:
-        if self._model_view_projection_matrix_location is None:
-            self._model_view_projection_matrix_location = gl.glGetUniformLocation(self.program,
-                                                                                  "model_view_projection_matrix")
-            if self._model_view_projection_matrix_location == -1:
-                raise ValueError("Could not find attribute")
-        return self._model_view_projection_matrix_location
+        return self.uniform_location("model_view_projection_matrix")
 
     def draw(self, model_view_proj_matrix: NDArray[np.floating], source_texture: int, target_texture: int,
              vertex_array_object: ShaderVAO,
@@ -1,9 +1,13 @@
+import logging
+
 import OpenGL.GL as gl
 import numpy as np
 from numpy.typing import NDArray
 
 import nornir_imageregistration
 
+_logger = logging.getLogger(__name__)
+
 
 #
 # def TextureForGrayscaleImage(image: NDArray[np.floating]):
@@ -52,8 +56,9 @@ def _configure_mipmaps(image_shape: NDArray[np.integer] | tuple[int, int], targe
     gl.glTexParameteri(target, gl.GL_TEXTURE_MAX_LEVEL, num_levels)
     gl.glGenerateMipmap(target)
 
-    max_level = gl.glGetTexParameteriv(target, gl.GL_TEXTURE_MAX_LEVEL)
-    print(f"Maximum mipmap level: {max_level}")
+    if _logger.isEnabledFor(logging.DEBUG):
+        # Reading the parameter back waits for the driver, only done when it is logged
+        _logger.debug("Maximum mipmap level: %s", gl.glGetTexParameteriv(target, gl.GL_TEXTURE_MAX_LEVEL))
 
 
 def create_grayscale_texture(image: NDArray[np.uint8]) -> int:
@@ -0,0 +1,277 @@
+"""
+A uniform grid hash of 2D points for hit testing points that are edited often.
+
+Each entry is a point that moves along a segment, from its source space position at tween 0 to
+its target space position at tween 1.  Queries at tween 0 and 1 use a grid of the positions in
+that space, where every entry is in a single cell.  Queries at other tweens use a grid of the
+segments, where an entry is stored in every cell its segment's bounding box overlaps, so "points
+within r of p at tween t" is answered from the cells the query circle overlaps without rebuilding
+anything.  The segment grid's cells are sized from the segment lengths and it is only built once
+an intermediate tween is queried.  Moving a point only touches the cells of its old and new
+positions.  Entries whose segments would cover many cells are kept in a short overflow list that
+every query of the segment grid tests directly.
+"""
+from __future__ import annotations
+
+import math
+
+import numpy as np
+from numpy.typing import NDArray
+
+_points_per_cell = 4  # Average number of points per cell the cell size is chosen for
+_max_cells_per_entry = 16  # Entries whose segment covers more cells than this go to the overflow list
+_rebuild_fraction = 0.25  # Rebuild instead of moving points when more than this fraction of points changed
+_invalid_cell = -(2 ** 52)  # Cell coordinate for points that are not finite
+_max_nearest_expansions = 32  # Times a nearest point search doubles its radius before testing every entry
+
+
+class _Grid:
+    """Entries bucketed into square cells, each entry is in every cell the bounding box of its segment overlaps"""
+    cell_size: float
+    _low: NDArray[np.int64]  # (N,2) first cell covered by each entry's segment
+    _high: NDArray[np.int64]  # (N,2) last cell covered by each entry's segment
+    _cells: dict[tuple[int, int], set[int]]  # Entry indices in each occupied cell
+    _overflow: set[int]  # Entries with long segments, tested by every query
+
+    def __init__(self, cell_size: float, start: NDArray[np.floating], end: NDArray[np.floating]):
+        self.cell_size = float(cell_size)
+        self._low, self._high = self._cell_ranges(start, end)
+        self._cells = {}
+        self._overflow = set()
+
+        if len(start) == 0:
+            return
+
+        # Entries covering a single cell are the common case, group them by cell in one sort
+        single = np.all(self._low == self._high, axis=1)
+        single_indices = np.flatnonzero(single)
+        if len(single_indices) > 0:
+            keys = self._low[single_indices]
+            order = np.lexsort((keys[:, 1], keys[:, 0]))
+            sorted_keys = keys[order]
+            starts = np.flatnonzero(np.any(np.diff(sorted_keys, axis=0) != 0, axis=1)) + 1
+            for group, key in zip(np.split(single_indices[order], starts),
+                                  sorted_keys[np.concatenate(([0], starts))].tolist()):
+                self._cells[tuple(key)] = set(group.tolist())
+
+        for index in np.flatnonzero(~single).tolist():
+            self._insert(index, self._low[index].tolist(), self._high[index].tolist())
+
+    def _cell_ranges(self, start: NDArray[np.floating], end: NDArray[np.floating]) -> tuple[
+        NDArray[np.int64], NDArray[np.int64]]:
+        """First and last cells covered by the bounding box of each segment"""
+        low = np.floor(np.minimum(start, end) / self.cell_size)
+        high = np.floor(np.maximum(start, end) / self.cell_size)
+        invalid = ~np.all(np.isfinite(low) & np.isfinite(high), axis=1)
+        low[invalid] = _invalid_cell
+        high[invalid] = _invalid_cell
+        return low.astype(np.int64), high.astype(np.int64)
+
+    @staticmethod
+    def _cell_count(low: NDArray[np.int64], high: NDArray[np.int64]) -> NDArray[np.int64]:
+        return np.prod(high - low + 1, axis=-1)
+
+    def _insert(self, index: int, low: list[int], high: list[int]):
+        if (high[0] - low[0] + 1) * (high[1] - low[1] + 1) > _max_cells_per_entry:
+            self._overflow.add(index)
+            return
+
+        for y in range(low[0], high[0] + 1):
+            for x in range(low[1], high[1] + 1):
+                self._cells.setdefault((y, x), set()).add(index)
+
+    def _remove(self, index: int, low: list[int], high: list[int]):
+        if index in self._overflow:
+            self._overflow.discard(index)
+            return
+
+        for y in range(low[0], high[0] + 1):
+            for x in range(low[1], high[1] + 1):
+                cell = self._cells[(y, x)]
+                cell.discard(index)
+                if len(cell) == 0:
+                    del self._cells[(y, x)]
+
+    def move(self, indices: NDArray[np.intp], start: NDArray[np.floating], end: NDArray[np.floating]):
+        """Update the segments of existing entries, only entries that changed cells touch the grid"""
+        low, high = self._cell_ranges(start, end)
+        changed = np.any((low != self._low[indices]) | (high != self._high[indices]), axis=1)
+
+        for index, new_low, new_high in zip(indices[changed].tolist(), low[changed].tolist(),
+                                            high[changed].tolist()):
+            self._remove(index, self._low[index].tolist(), self._high[index].tolist())
+            self._insert(index, new_low, new_high)
+
+        self._low[indices] = low
+        self._high[indices] = high
+
+    def candidates(self, point: NDArray[np.floating], r: float, num_entries: int) -> NDArray[np.intp]:
+        """:return: Indices of entries that may be within r of point, a superset of the answer"""
+        low = np.floor((point - r) / self.cell_size).astype(np.int64)
+        high = np.floor((point + r) / self.cell_size).astype(np.int64)
+
+        if int(self._cell_count(low, high)) >= len(self._cells):
+            # The circle covers more cells than are occupied, testing every entry is cheaper
+            return np.arange(num_entries)
+
+        found = [self._cells[(y, x)]
+                 for y in range(low[0], high[0] + 1)
+                 for x in range(low[1], high[1] + 1)
+                 if (y, x) in self._cells]
+        return np.fromiter(self._overflow.union(*found), dtype=np.intp)
+
+
+class GridIndex:
+    """Spatial index of (Y,X) points interpolated between a start and end position, bucketed into square cells"""
+    _cell_size: float
+    _start: NDArray[np.floating]  # (N,2) positions at tween 0
+    _end: NDArray[np.floating]  # (N,2) positions at tween 1
+    _start_grid: _Grid  # Positions at tween 0
+    _end_grid: _Grid  # Positions at tween 1
+    _segment_grid: _Grid | None  # Segments from start to end, built when an intermediate tween is first queried
+
+    @property
+    def cell_size(self) -> float:
+        """Width of a cell of the tween 0 and 1 grids"""
+        return self._cell_size
+
+    def __len__(self) -> int:
+        return len(self._start)
+
+    def __init__(self, start: NDArray[np.floating], end: NDArray[np.floating] | None = None,
+                 cell_size: float | None = None):
+        """
+        :param start: (N,2) positions at tween 0
+        :param end: (N,2) positions at tween 1, the same as start if None
+        :param cell_size: Width of a grid cell, estimated from the density of the points if None
+        """
+        self.rebuild(start, end, cell_size)
+
+    @staticmethod
+    def estimate_cell_size(points: NDArray[np.floating]) -> float:
+        """A cell size that places about _points_per_cell points in each cell of the points' bounding box"""
+        finite = points[np.all(np.isfinite(points), axis=1)]
+        if len(finite) < 2:
+            return 1.0
+
+        height, width = np.maximum(np.ptp(finite, axis=0), 1.0)
+        return max(math.sqrt((height * width * _points_per_cell) / len(finite)), 1.0)
+
+    def _estimate_segment_cell_size(self) -> float:
+        """
+        The larger of the point cell size and the median extent of the segments, so a typical segment
+        overlaps at most four cells instead of going to the overflow list
+        """
+        extents = np.max(np.abs(self._end - self._start), axis=1)
+        extents = extents[np.isfinite(extents)]
+        if len(extents) == 0:
+            return self._cell_size
+
+        return max(self._cell_size, float(np.median(extents)))
+
+    def positions(self, tween: float) -> NDArray[np.floating]:
+        """Positions of every entry at a tween"""
+        tween = float(tween)
+        if tween == 0:
+            return self._start.copy()
+        elif tween == 1:
+            return self._end.copy()
+
+        return self._start * (1.0 - tween) + self._end * tween
+
+    def _grid(self, tween: float) -> _Grid:
+        """The grid that answers queries at a tween"""
+        if tween == 0:
+            return self._start_grid
+        elif tween == 1:
+            return self._end_grid
+
+        if self._segment_grid is None:
+            self._segment_grid = _Grid(self._estimate_segment_cell_size(), self._start, self._end)
+        return self._segment_grid
+
+    def rebuild(self, start: NDArray[np.floating], end: NDArray[np.floating] | None = None,
+                cell_size: float | None = None):
+        """Index a new set of entries"""
+        self._start = np.array(start, dtype=np.float64).reshape(-1, 2)
+        self._end = self._start.copy() if end is None else np.array(end, dtype=np.float64).reshape(-1, 2)
+        if cell_size is None:
+            cell_size = self.estimate_cell_size(np.vstack((self._start, self._end)))
+        self._cell_size = float(cell_size)
+        self._start_grid = _Grid(self._cell_size, self._start, self._start)
+        self._end_grid = _Grid(self._cell_size, self._end, self._end)
+        self._segment_grid = None
+
+    def move(self, indices: NDArray[np.integer] | list[int],
+             start: NDArray[np.floating],
+             end: NDArray[np.floating] | None = None):
+        """Update the positions of existing entries, only entries that changed cells touch the grids"""
+        indices = np.asarray(indices, dtype=np.intp).ravel()
+        start = np.asarray(start, dtype=np.float64).reshape(-1, 2)
+        end = start if end is None else np.asarray(end, dtype=np.float64).reshape(-1, 2)
+
+        self._start_grid.move(indices, start, start)
+        self._end_grid.move(indices, end, end)
+        if self._segment_grid is not None:
+            self._segment_grid.move(indices, start, end)
+
+        self._start[indices] = start
+        self._end[indices] = end
+
+    @staticmethod
+    def _changed(new: NDArray[np.floating], old: NDArray[np.floating]) -> NDArray[np.bool_]:
+        different = (new != old) & ~(np.isnan(new) & np.isnan(old))
+        return np.any(different, axis=1)
+
+    def update(self, start: NDArray[np.floating], end: NDArray[np.floating] | None = None) -> int:
+        """
+        Bring the index up to date with a new copy of the same entries.  Entries that moved are moved in the
+        grid, the index is rebuilt if the number of entries changed or most entries moved.
+        :return: Number of entries that changed
+        """
+        start = np.asarray(start, dtype=np.float64).reshape(-1, 2)
+        end = start if end is None else np.asarray(end, dtype=np.float64).reshape(-1, 2)
+        if len(start) != len(self._start):
+            self.rebuild(start, end)
+            return len(start)
+
+        changed = np.flatnonzero(self._changed(start, self._start) | self._changed(end, self._end))
+        if len(changed) > len(start) * _rebuild_fraction:
+            self.rebuild(start, end)
+        elif len(changed) > 0:
+            self.move(changed, start[changed], end[changed])
+
+        return len(changed)
+
+    def query_ball_point(self, point: NDArray[np.floating], r: float, tween: float = 0.0) -> NDArray[np.intp]:
+        """:return: Sorted indices of entries within r of point at the tween"""
+        point = np.asarray(point, dtype=np.float64).reshape(2)
+        tween = float(tween)
+        candidates = self._grid(tween).candidates(point, r, len(self._start))
+        if len(candidates) == 0:
+            return candidates
+
+        positions = self._start[candidates] * (1.0 - tween) + self._end[candidates] * tween
+        distance_squared = np.sum((positions - point) ** 2, axis=1)
+        return np.sort(candidates[distance_squared <= r * r])
+
+    def nearest(self, point: NDArray[np.floating], tween: float = 0.0) -> tuple[float | None, int | None]:
+        """:return: (distance, index) of the entry nearest to point at the tween, or (None, None) if there are none"""
+        point = np.asarray(point, dtype=np.float64).reshape(2)
+        tween = float(tween)
+        radius = self._grid(tween).cell_size
+        for _ in range(_max_nearest_expansions):
+            candidates = self.query_ball_point(point, radius, tween)
+            if len(candidates) > 0:
+                break
+            radius *= 2
+        else:
+            candidates = np.arange(len(self._start))
+
+        positions = self._start[candidates] * (1.0 - tween) + self._end[candidates] * tween
+        distances = np.sqrt(np.sum((positions - point) ** 2, axis=1))
+        if len(distances) == 0 or not np.any(np.isfinite(distances)):
+            return None, None
+
+        i_nearest = int(np.nanargmin(distances))
+        return float(distances[i_nearest]), int(candidates[i_nearest])
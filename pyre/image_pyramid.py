@@ -0,0 +1,36 @@
+"""
+Downsampled copies of images for coarse-to-fine registration.  Level 0 is the full resolution
+image and each level halves the size of the one before it.
+"""
+import math
+
+import numpy as np
+from numpy.typing import NDArray
+
+import nornir_imageregistration
+
+
+def _block_mean(image: NDArray) -> NDArray[np.float32]:
+    """Average each 2x2 block of pixels, a trailing odd row or column is dropped"""
+    height, width = image.shape[0] // 2, image.shape[1] // 2
+    blocks = np.asarray(image[:height * 2, :width * 2], dtype=np.float32).reshape(height, 2, width, 2)
+    return blocks.mean(axis=(1, 3))
+
+
+def downsample(permutations: nornir_imageregistration.ImagePermutationHelper) -> nornir_imageregistration.ImagePermutationHelper:
+    """Half resolution copy of an image and its mask.  A pixel stays unmasked if most of its block was unmasked."""
+    image = _block_mean(permutations.Image)
+    mask = permutations.BlendedMask
+    if mask is not None:
+        mask = _block_mean(np.asarray(mask) != 0) >= 0.5
+
+    return nornir_imageregistration.ImagePermutationHelper(image, mask)
+
+
+def level_for_size(shape: tuple[int, int] | NDArray, largest_dimension: int) -> int:
+    """Smallest pyramid level whose largest dimension is no larger than largest_dimension"""
+    largest = max(int(shape[0]), int(shape[1]))
+    if largest <= largest_dimension:
+        return 0
+
+    return int(math.ceil(math.log2(largest / largest_dimension)))
@@ -0,0 +1,36 @@
+"""
+Summed-area tables for answering "does this box contain any unmasked pixel" in constant time.
+"""
+import numpy as np
+from numpy.typing import NDArray
+
+
+def summed_area_table(mask: NDArray) -> NDArray[np.integer]:
+    """
+    Build the summed-area table of a mask.  The table has an extra leading row and column of zeros
+    so table[y, x] is the count of nonzero mask pixels in mask[:y, :x].
+    """
+    height, width = mask.shape
+    dtype = np.uint32 if height * width < np.iinfo(np.uint32).max else np.int64
+    table = np.zeros((height + 1, width + 1), dtype=dtype)
+    np.cumsum(np.asarray(mask) != 0, axis=0, dtype=dtype, out=table[1:, 1:])
+    np.cumsum(table[1:, 1:], axis=1, dtype=dtype, out=table[1:, 1:])
+    return table
+
+
+def box_sums(table: NDArray[np.integer], bottom_left: NDArray, top_right: NDArray) -> NDArray[np.int64]:
+    """
+    Count the nonzero mask pixels inside boxes.  Boxes are clipped to the mask.
+    :param table: Summed-area table from summed_area_table
+    :param bottom_left: (N,2) array of inclusive (Y,X) box minimums
+    :param top_right: (N,2) array of exclusive (Y,X) box maximums
+    :return: (N,) count of nonzero pixels in each box
+    """
+    limits = np.array(table.shape, dtype=np.int64) - 1
+    y0, x0 = np.clip(np.floor(bottom_left).astype(np.int64), 0, limits).T
+    y1, x1 = np.clip(np.ceil(top_right).astype(np.int64), 0, limits).T
+
+    y1 = np.maximum(y0, y1)
+    x1 = np.maximum(x0, x1)
+
+    return (table[y1, x1].astype(np.int64) - table[y0, x1] - table[y1, x0] + table[y0, x0]).astype(np.int64)
@@ -24,3 +24,8 @@ class IEventManager(ABC, Generic[EventCallbackType]):
     def invoke(self, *args, **kwargs):
         """Invoke an event"""
         raise NotImplementedError()
+
+    @abc.abstractmethod
+    def post(self, *args, **kwargs):
+        """Invoke an event later, from the main thread's event loop"""
+        raise NotImplementedError()
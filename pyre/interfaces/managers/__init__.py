@@ -2,11 +2,14 @@
 
 from .buffertype import BufferType, GLBufferCollection
 from .command_history import ICommandHistory
+from .edit_journal import IEditJournal
 from .gl_context_manager import IGLContextManager
 from .image_manager import (IImageLoader, IImageManager, ImageManagerChangeCallback)
 from ..named_tuples import ImageLoadResult
 from .mousepositionhistorymanager import IMousePositionHistoryManager, MousePositionHistoryChangedCallbackEvent
+from .profiler import IProfiler, ProfileReport
 from .region_manager import IRegion, IRegionMap
+from .roi_cache import IRegistrationROICache, ROICacheKey
 from .transformcontroller_glbuffer_manager import ITransformControllerGLBufferManager
 from .buffertype import BufferType, GLBufferCollection
 from .window_manager import IWindowManager, WindowManagerChangeCallback
@@ -1,5 +1,8 @@
 import abc
 
+import numpy as np
+from numpy.typing import NDArray
+
 
 class ICommandHistory(abc.ABC):
     """Interface to a command history"""
@@ -16,6 +19,21 @@ class ICommandHistory(abc.ABC):
            Data is the data to pass to the recovery function"""
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def RecordPointEdit(self, transform_controller, original_points: NDArray[np.floating],
+                        replaces_version: int | None = None):
+        """
+        Record the change from original_points to the transform controller's current points as one undo step
+        :param replaces_version: Version an earlier record of the same edit was made at.  If that record is still
+        the last entry it is replaced, so an edit applied in stages stays one undo step.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def Clear(self):
+        """Remove every entry from the history"""
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def Undo(self):
         """Undo the last command"""
@@ -28,5 +46,5 @@ class ICommandHistory(abc.ABC):
 
     @abc.abstractmethod
     def RestoreState(self, index: int = None):
-        """Replace current points with points from undo history"""
+        """Undo or redo until index entries of the history are applied"""
         raise NotImplementedError()
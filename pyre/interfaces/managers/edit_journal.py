@@ -0,0 +1,47 @@
+import abc
+
+
+class IEditJournal(abc.ABC):
+    """
+    Persists every edit of a transform controller as it happens, so the session can be restored after a crash
+    """
+
+    @property
+    @abc.abstractmethod
+    def path(self) -> str:
+        """Full path of this session's journal file"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def replay(self, transform_controller, stos_filename: str | None) -> int:
+        """
+        Restore the transform recorded in the newest journal left by a session that did not exit cleanly.
+        Journals of sessions that are still running, and journals that are not replayed, are left in place.
+        :param stos_filename: The stos file loaded at startup, a journal is only replayed if it was recorded
+        against the same file
+        :return: Number of journal records applied, 0 if there was nothing to restore
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def attach(self, transform_controller, stos_filename: str | None):
+        """
+        Start this session's journal from the transform's current state and record its edits from now on.  A
+        journal restored by replay is removed once its edits are in the new journal.
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def set_stos_filename(self, stos_filename: str | None):
+        """Record that the session now edits a different stos file"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def flush(self):
+        """Block until every recorded edit is written and synced to disk"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def close(self):
+        """Stop recording and delete the journal, called when the session exits cleanly"""
+        raise NotImplementedError()
@@ -3,7 +3,10 @@ from typing import Callable
 
 import wx.glcanvas
 
-GLContextCreatedCallback = Callable[[wx.glcanvas.GLContext], None]
+from pyre.gl_engine.interfaces import IGLContext
+
+GLContext = wx.glcanvas.GLContext | IGLContext  # Window contexts and offscreen contexts are managed identically
+GLContextCreatedCallback = Callable[[GLContext], None]
 
 
 class IGLContextManager(ABC):
@@ -12,8 +15,9 @@ class IGLContextManager(ABC):
     the context so subscribers can create GL resources."""
 
     @abstractmethod
-    def add_context(self, context: wx.glcanvas.GLContext):
-        """Add a context to the context manager. This should be called by the GLCanvas when a context is created."""
+    def add_context(self, context: GLContext):
+        """Add a context to the context manager. This should be called by the GLCanvas or an offscreen
+        renderer when a context is created.  The context must be current when this is called."""
         raise NotImplementedError()
 
     @abstractmethod
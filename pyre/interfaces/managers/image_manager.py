@@ -56,6 +56,16 @@ class IImageManager(abc.ABC):
     def __contains__(self, key: str) -> bool:
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def mask_summed_area_table(self, key: str) -> NDArray | None:
+        """:return: The summed-area table of the image's BlendedMask, or None if the image has no mask"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def pyramid_level(self, key: str, level: int) -> nornir_imageregistration.ImagePermutationHelper:
+        """:return: The image downsampled by 2**level, levels are built on first use and cached"""
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def add_change_event_listener(self, func: ImageManagerChangeCallback):
         raise NotImplementedError()
@@ -0,0 +1,38 @@
+import abc
+from typing import NamedTuple
+
+
+class ProfileReport(NamedTuple):
+    """Results of a profiling session"""
+    paths: list[str]  # Files the profile was written to
+    duration: float  # Seconds the profiler ran
+    subsystem_seconds: dict[str, float]  # Sampled time attributed to each subsystem, most expensive first
+
+
+class IProfiler(abc.ABC):
+    """
+    A profiler that can be started and stopped while the application runs
+    """
+
+    @property
+    @abc.abstractmethod
+    def is_running(self) -> bool:
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def start(self):
+        """Begin collecting samples, does nothing if the profiler is running"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def stop(self) -> ProfileReport | None:
+        """Stop collecting samples and write the profile.  :return: None if the profiler was not running"""
+        raise NotImplementedError()
+
+    def toggle(self) -> ProfileReport | None:
+        """Start the profiler if it is stopped, otherwise stop it and return the report"""
+        if self.is_running:
+            return self.stop()
+
+        self.start()
+        return None
@@ -1,4 +1,5 @@
 from __future__ import annotations
+from typing import Iterable
 from numpy.typing import NDArray
 import numpy as np
 import abc
@@ -48,6 +49,21 @@ class IRegionMap(abc.ABC):
         """
         raise NotImplementedError()
 
+    @abc.abstractmethod
+    def add_many(self, objs: Iterable[IRegion]) -> list[int]:
+        """
+        Add several objects to the searchable regions.  If the map is empty the index is bulk loaded.
+        :return: A unique key for each object
+        """
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def update(self, key: int) -> bool:
+        """Re-index an object after its bounding box changed
+        :return: True if the object was found
+        """
+        raise NotImplementedError()
+
     @abc.abstractmethod
     def tryremove(self, key: int) -> bool:
         """Remove an object from the searchable regions
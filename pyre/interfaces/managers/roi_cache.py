@@ -0,0 +1,40 @@
+import abc
+from typing import NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class ROICacheKey(NamedTuple):
+    """Identifies a cached region of interest used for point registration"""
+    space: str  # 'target' for the target region, 'source' for the source region warped into target space
+    index: int  # Control point index
+    geometry: bytes  # Digest of the region's position and how the transform maps it
+
+
+class IRegistrationROICache(abc.ABC):
+    """Caches registration regions of interest between registration runs"""
+
+    @property
+    @abc.abstractmethod
+    def nbytes(self) -> int:
+        """Bytes of cached data"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def get(self, key: ROICacheKey) -> NDArray[np.floating] | None:
+        """:return: The cached region or None if it is not cached"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def put(self, key: ROICacheKey, value: NDArray[np.floating]):
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def invalidate_points(self, indices: set[int] | list[int]):
+        """Remove every entry for the control point indices, called when the points move"""
+        raise NotImplementedError()
+
+    @abc.abstractmethod
+    def clear(self):
+        raise NotImplementedError()
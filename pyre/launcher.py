@@ -24,8 +24,7 @@ matplotlib.use('wxAgg')
 
 import wx
 
-import nornir_shared.misc
-from pyre.interfaces.managers import IImageViewModelManager, IWindowManager
+from pyre.interfaces.managers import IEditJournal, IImageViewModelManager, IProfiler, IWindowManager
 from pyre.interfaces.managers.image_manager import IImageManager
 import pyre.ui
 import pyre.gl_engine.shaders as shaders
@@ -40,6 +39,8 @@ from pyre.settings import AppSettings
 
 app = None
 
+_logger = logging.getLogger(__name__)
+
 
 def ProcessArgs():
     # conflict_handler = 'resolve' replaces old arguments with new if both use the same option flag
@@ -93,26 +94,24 @@ def ProcessArgs():
     return parser
 
 
-__profiler = None
-
-
-def StartProfilerCheck():
-    if 'PROFILE' in os.environ:
-        profile_val = os.environ['PROFILE']
-        if len(profile_val) > 0 and profile_val != '0':
-            import cProfile
-            print("Starting profiler because PROFILE environment variable is defined")
-            __profiler = cProfile.Profile()
-            __profiler.enable()
+@inject
+def StartProfilerCheck(profiler: IProfiler = Provide[IContainer.profiler]):
+    """Profile the whole session if the PROFILE environment variable is set, profiling can also be toggled
+    from the Operations menu"""
+    profile_val = os.environ.get('PROFILE', '')
+    if len(profile_val) > 0 and profile_val != '0':
+        _logger.info("Starting profiler because PROFILE environment variable is defined")
+        profiler.start()
 
 
-def EndProfilerCheck():
-    if not __profiler is None:
-        __profiler.dump_stats(r"C:\Temp\pyre.profile")
+@inject
+def EndProfilerCheck(profiler: IProfiler = Provide[IContainer.profiler]):
+    """Write the profile if the profiler is still running when the session ends"""
+    profiler.stop()
 
 
 def OnImageAdded(action, key, value):
-    print("Image added: " + key)
+    _logger.info("Image added: %s", key)
 
 
 def readme(path) -> str:
@@ -133,13 +132,14 @@ def build_container() -> IContainer:
     stos_container = StosContainer()
     readme_path = settings.readme
     stos_container.config.readme.from_value(readme(readme_path))
+    stos_container.config.logging.from_value(settings.logging)
     stos_container.init_resources()
     container_interface.override(stos_container)
     container_interface.action_command_map.override(stos_container.action_command_map)
 
     # Ensure we intialize the shaders and textures before anyone can subscribe to context creation events
     glcontext_manager = stos_container.glcontext_manager()
-    glcontext_manager.add_glcontext_added_event_listener(lambda context: shaders.InitializeShaders())
+    glcontext_manager.add_glcontext_added_event_listener(lambda context: shaders.InitializeShaders(settings.shader_cache_dir))
     glcontext_manager.add_glcontext_added_event_listener(
         lambda context: pyre.resources.point_textures.PointTextures.LoadTextures())
 
@@ -175,29 +175,28 @@ def SaveSettings(settings_provider: Provider[AppSettings] = Provide[IContainer.s
     with open(output_file, 'w') as file:
         file.write(json)
 
-    print(f"Saved settings to {output_file}")
+    _logger.info("Saved settings to %s", output_file)
 
 
 @inject
 def Run(image_manager: IImageManager = Provide[IContainer.image_manager],
         imageviewmodel_manager: IImageViewModelManager = Provide[IContainer.imageviewmodel_manager],
         window_manager: IWindowManager = Provide[IContainer.window_manager],
-        stos_transform_controller: pyre.state.TransformController = Provide[IContainer.transform_controller]
+        stos_transform_controller: pyre.state.TransformController = Provide[IContainer.transform_controller],
+        edit_journal: IEditJournal = Provide[IContainer.edit_journal]
         ):
     global app
-    print("Starting Pyre")
+    _logger.info("Starting Pyre")
 
     StartProfilerCheck()
 
-    nornir_shared.misc.SetupLogging(OutputPath=os.path.join(os.curdir, "PyreLogs"), Level=logging.WARNING)
-
     pyre.state.currentStosConfig = pyre.state.StosState(transform_controller=stos_transform_controller,
                                                         image_manager=image_manager,
                                                         imageviewmodel_manager=imageviewmodel_manager)
     pyre.state.currentMosaicConfig = pyre.state.MosaicState()
 
     readmetxt = resource_paths.README()
-    print(readmetxt)
+    _logger.info(readmetxt)
 
     args = ProcessArgs()
     arg_values = args.parse_args()
@@ -216,13 +215,17 @@ def Run(image_manager: IImageManager = Provide[IContainer.image_manager],
 
     wx.CallAfter(pyre.state.UpdateSettingsFromArguments, arg_values)
     wx.CallAfter(pyre.state.InitializeStateFromSettings, stos_transform_controller)
+    wx.CallAfter(pyre.state.RestoreEditJournal, stos_transform_controller)
 
     # app.MainLoop()
 
     loop = asyncio.get_event_loop()
     loop.run_until_complete(app.MainLoop())
 
-    print("Exiting main loop")
+    _logger.info("Exiting main loop")
+
+    # Only a clean exit discards the journal, it is replayed at the next start if the session crashed
+    edit_journal.close()
 
     EndProfilerCheck()
 
@@ -0,0 +1,211 @@
+"""
+Logging configuration for pyre.
+
+Modules log to their own logger, logging.getLogger(__name__), with %-style arguments so messages are only
+formatted when a handler keeps them.  The console only shows warnings by default.  Every record at or above
+the ring buffer level is also kept in memory, and the buffer is written to a file in the log directory when
+an error is logged or an exception is not handled, so the lead up to a failure can be read without running
+with verbose console output.
+
+Messages logged for every mouse or transform event pass extra=throttle() to be rate limited by call site.
+"""
+from __future__ import annotations
+
+import collections
+import datetime
+import logging
+import os
+import sys
+import threading
+from typing import TextIO
+
+from pyre.settings import LoggingSettings
+
+_format = '%(asctime)s %(levelname)-7s %(name)s: %(message)s'
+_dump_filename = 'pyre-recent.log'
+
+_ring_buffer: RingBufferHandler | None = None
+
+
+def throttle(interval: float = 1.0, burst: int = 1) -> dict:
+    """
+    Logging extra arguments that limit a call site to burst records every interval seconds.  The first record
+    after a quiet interval reports how many were suppressed.
+    """
+    return {'rate_limit': (interval, burst)}
+
+
+class RateLimitFilter(logging.Filter):
+    """Drops records from call sites logging faster than the rate limit in their extra arguments"""
+    _lock: threading.Lock
+    _sites: dict[tuple[str, int], list]  # [window start, records in window, suppressed] for each call site
+
+    def __init__(self):
+        super().__init__()
+        self._lock = threading.Lock()
+        self._sites = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate_limit = getattr(record, 'rate_limit', None)
+        if rate_limit is None:
+            return True
+
+        # The filter is shared by every handler, a record is only counted by the first
+        passed = getattr(record, 'rate_limit_passed', None)
+        if passed is not None:
+            return passed
+
+        record.rate_limit_passed = self._passes(record, rate_limit)
+        return record.rate_limit_passed
+
+    def _passes(self, record: logging.LogRecord, rate_limit: tuple[float, int]) -> bool:
+        interval, burst = rate_limit
+        key = (record.pathname, record.lineno)
+        now = record.created
+        with self._lock:
+            site = self._sites.get(key)
+            if site is None or now - site[0] >= interval:
+                suppressed = 0 if site is None else site[2]
+                self._sites[key] = [now, 1, 0]
+            elif site[1] < burst:
+                site[1] += 1
+                suppressed = 0
+            else:
+                site[2] += 1
+                return False
+
+        if suppressed > 0:
+            record.msg = f"{record.msg} ({suppressed} similar messages suppressed)"
+        return True
+
+
+class RingBufferHandler(logging.Handler):
+    """Keeps the most recent formatted records in memory and writes them to a file when an error is logged"""
+    _records: collections.deque[str]
+    _dump_path: str | None
+
+    @property
+    def dump_path(self) -> str | None:
+        return self._dump_path
+
+    def __init__(self, capacity: int, dump_path: str | None, level: int = logging.NOTSET):
+        super().__init__(level)
+        self._records = collections.deque(maxlen=capacity)
+        self._dump_path = dump_path
+
+    def emit(self, record: logging.LogRecord):
+        try:
+            # Formatted now, the arguments may be changed or released before the buffer is dumped
+            self._records.append(self.format(record))
+        except Exception:
+            self.handleError(record)
+            return
+
+        if record.levelno >= logging.ERROR:
+            self.dump()
+
+    def records(self) -> list[str]:
+        with self.lock:
+            return list(self._records)
+
+    def write(self, stream: TextIO):
+        for line in self.records():
+            stream.write(line)
+            stream.write('\n')
+
+    def dump(self) -> str | None:
+        """Write the buffered records to the dump file.  :return: The file written, None if there is none"""
+        if self._dump_path is None:
+            return None
+
+        try:
+            with open(self._dump_path, 'w', encoding='utf-8') as output:
+                output.write(f"Most recent pyre log records at {datetime.datetime.now().isoformat()}\n")
+                self.write(output)
+        except OSError:
+            return None
+
+        return self._dump_path
+
+
+def _level(name: str | int) -> int:
+    return name if isinstance(name, int) else logging.getLevelName(name.upper())
+
+
+def _log_dir(settings: LoggingSettings) -> str | None:
+    log_dir = settings.log_dir if settings.log_dir is not None else os.path.join(os.path.expanduser('~'), '.pyre',
+                                                                                  'logs')
+    try:
+        os.makedirs(log_dir, exist_ok=True)
+    except OSError:
+        return None
+
+    return log_dir
+
+
+def _excepthook(exc_type, exc_value, exc_traceback):
+    logging.getLogger('pyre').critical("Unhandled exception", exc_info=(exc_type, exc_value, exc_traceback))
+    sys.__excepthook__(exc_type, exc_value, exc_traceback)
+
+
+def configure_logging(settings: LoggingSettings | None = None):
+    """Install the console, file and ring buffer handlers on the root logger"""
+    global _ring_buffer
+    if settings is None:
+        settings = LoggingSettings()
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+        handler.close()
+
+    formatter = logging.Formatter(_format)
+    rate_limit = RateLimitFilter()
+    log_dir = _log_dir(settings)
+
+    console = logging.StreamHandler(sys.stderr)
+    console.setLevel(_level(settings.console_level))
+    console.setFormatter(formatter)
+    console.addFilter(rate_limit)
+    root.addHandler(console)
+
+    if settings.file_level is not None and log_dir is not None:
+        file_handler = logging.FileHandler(os.path.join(log_dir, 'pyre.log'), mode='w', encoding='utf-8')
+        file_handler.setLevel(_level(settings.file_level))
+        file_handler.setFormatter(formatter)
+        file_handler.addFilter(rate_limit)
+        root.addHandler(file_handler)
+
+    _ring_buffer = None
+    if settings.ring_buffer_size > 0:
+        dump_path = os.path.join(log_dir, _dump_filename) if log_dir is not None else None
+        _ring_buffer = RingBufferHandler(settings.ring_buffer_size, dump_path, _level(settings.ring_buffer_level))
+        _ring_buffer.setFormatter(formatter)
+        _ring_buffer.addFilter(rate_limit)
+        root.addHandler(_ring_buffer)
+
+    # Records below every handler's level are discarded by the logger before they are created
+    levels = [handler.level for handler in root.handlers]
+    root.setLevel(min(levels) if len(levels) > 0 else logging.WARNING)
+
+    for name, level in settings.levels.items():
+        logging.getLogger(name).setLevel(_level(level))
+
+    logging.captureWarnings(True)
+    sys.excepthook = _excepthook
+
+
+def dump_recent(stream: TextIO | None = None) -> str | None:
+    """
+    Write the records in the ring buffer to a stream, or to the dump file in the log directory if stream is None
+    :return: Path of the dump file if one was written
+    """
+    if _ring_buffer is None:
+        return None
+
+    if stream is not None:
+        _ring_buffer.write(stream)
+        return None
+
+    return _ring_buffer.dump()
+
@@ -0,0 +1,106 @@
+"""
+Registers many control points in parallel.  The source and target images are placed in
+shared memory once per registration.  Each worker process attaches to them and crops its
+own regions of interest, so a task only pickles the transform, the point and the search
+settings instead of both full images.
+"""
+from __future__ import annotations
+
+from typing import Iterable, NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+import nornir_imageregistration
+from nornir_imageregistration import ImagePermutationHelper
+import nornir_pools
+import pyre.common
+from pyre.shared_array import SharedArray, SharedArrayHandle, attach
+
+
+class RegistrationImageHandles(NamedTuple):
+    """Shared memory handles for the images a registration worker needs"""
+    target_image: SharedArrayHandle
+    source_image: SharedArrayHandle
+
+
+class PointAlignmentResult(NamedTuple):
+    """Result of aligning one control point in a worker"""
+    index: int  # Index of the control point
+    record: nornir_imageregistration.AlignmentRecord | None
+
+
+def align_point(images: RegistrationImageHandles,
+                index: int,
+                transform: nornir_imageregistration.ITransform,
+                target_image_stats: nornir_imageregistration.ImageStats,
+                source_image_stats: nornir_imageregistration.ImageStats,
+                target_controlpoint: NDArray,
+                alignmentArea: NDArray | tuple[float, float],
+                anglesToSearch: Iterable[float]) -> PointAlignmentResult:
+    """Align one control point against images in shared memory.  Runs in a worker process."""
+    with attach(images.target_image) as target_image, attach(images.source_image) as source_image:
+        # Regions of interest are cropped here, the serial pool runs the alignment in this worker.
+        # Masked points are filtered before tasks are queued.
+        task = pyre.common.StartAttemptAlignPoint(pool=nornir_pools.GetGlobalSerialPool(),
+                                                  task_description=f"Align Pyre Point {index}",
+                                                  transform=transform,
+                                                  target_image=target_image,
+                                                  source_image=source_image,
+                                                  target_image_stats=target_image_stats,
+                                                  source_image_stats=source_image_stats,
+                                                  target_controlpoint=target_controlpoint,
+                                                  alignmentArea=alignmentArea,
+                                                  anglesToSearch=anglesToSearch)
+        return PointAlignmentResult(index, task.wait_return())
+
+
+class SharedRegistrationImages:
+    """
+    Shared memory copies of the images used to register points between a source and target image.
+    Use as a context manager, the shared memory is released on exit.
+    """
+    _shared: list[SharedArray]
+    _handles: RegistrationImageHandles
+    _target_image_stats: nornir_imageregistration.ImageStats
+    _source_image_stats: nornir_imageregistration.ImageStats
+
+    @property
+    def handles(self) -> RegistrationImageHandles:
+        return self._handles
+
+    def __init__(self, source: ImagePermutationHelper, target: ImagePermutationHelper):
+        self._shared = []
+        self._target_image_stats = target.Stats
+        self._source_image_stats = source.Stats
+        self._handles = RegistrationImageHandles(target_image=self._share(target.ImageWithMaskAsNoise),
+                                                 source_image=self._share(source.ImageWithMaskAsNoise))
+
+    def _share(self, array: NDArray) -> SharedArrayHandle:
+        shared = SharedArray(np.asarray(array))
+        self._shared.append(shared)
+        return shared.handle
+
+    def start_align_point(self,
+                          pool: nornir_pools.poolbase,
+                          index: int,
+                          transform: nornir_imageregistration.ITransform,
+                          target_controlpoint: NDArray,
+                          alignmentArea: NDArray | tuple[float, float],
+                          anglesToSearch: Iterable[float]):
+        """Queue alignment of a control point, the task returns a PointAlignmentResult"""
+        return pool.add_task(f"Align Pyre Point {index}", align_point,
+                             self._handles, index, transform,
+                             self._target_image_stats, self._source_image_stats,
+                             target_controlpoint, alignmentArea, anglesToSearch)
+
+    def close(self):
+        for shared in self._shared:
+            shared.close()
+        self._shared.clear()
+
+    def __enter__(self) -> SharedRegistrationImages:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
@@ -0,0 +1,151 @@
+"""
+Coarse-to-fine rigid registration of a source image onto a target image.
+
+The brute force log-polar search runs once on a downsampled level of each image's pyramid.
+The result is then refined at every finer level by warping a few small windows of the source
+through the current estimate, phase correlating them against the same windows of the target
+and trying a shrinking set of angles around the current angle.  Only the windows are ever
+resampled, so the cost of refinement does not depend on the size of the full images.
+"""
+from __future__ import annotations
+
+import logging
+
+import numpy as np
+from numpy.typing import NDArray
+import scipy.ndimage
+
+import nornir_imageregistration
+from nornir_imageregistration import ImagePermutationHelper
+import nornir_imageregistration.stos_brute as stos
+import pyre.batch_registration
+from pyre.image_pyramid import level_for_size
+from pyre.interfaces.managers import IImageManager
+
+_logger = logging.getLogger(__name__)
+
+_windows_per_axis = 3  # Refinement windows are placed on a grid at 1/4, 1/2 and 3/4 of the target image
+_initial_angle_step = 1.0  # Degrees either side of the current angle tried at the first refinement level
+_min_angle_step = 0.125  # The angle step halves at each finer level down to this
+
+
+def _window_origins(shape: tuple[int, int], window: int) -> NDArray[np.int64]:
+    """(Y,X) origins of the refinement windows, clipped so each window lies inside the image"""
+    fractions = np.arange(1, _windows_per_axis + 1) / (_windows_per_axis + 1)
+    ys = np.clip((fractions * shape[0]).astype(np.int64) - window // 2, 0, shape[0] - window)
+    xs = np.clip((fractions * shape[1]).astype(np.int64) - window // 2, 0, shape[1] - window)
+    return np.array([(y, x) for y in ys for x in xs], dtype=np.int64)
+
+
+def _warp_windows(source: NDArray,
+                  transform: nornir_imageregistration.ITransform,
+                  origins: NDArray,
+                  window: int,
+                  scale: int) -> NDArray[np.float32]:
+    """
+    Sample windows of a downsampled source image warped into target space
+    :param origins: (N,2) target space origins of the windows at the downsampled level
+    :param scale: Downsample factor of the level, the transform maps full resolution coordinates
+    """
+    ys, xs = np.mgrid[0:window, 0:window]
+    offsets = np.column_stack((ys.ravel(), xs.ravel())).astype(np.float64)
+    windows = np.empty((len(origins), window, window), dtype=np.float32)
+    for i, origin in enumerate(origins):
+        target_points = (offsets + origin) * scale
+        source_points = np.asarray(transform.InverseTransform(target_points), dtype=np.float64) / scale
+        source_points[~np.isfinite(source_points)] = -1
+        windows[i] = scipy.ndimage.map_coordinates(source, source_points.T, order=1, mode='constant',
+                                                   cval=0).reshape((window, window))
+    return windows
+
+
+def _scale_record(record: nornir_imageregistration.AlignmentRecord,
+                  scale: int) -> nornir_imageregistration.AlignmentRecord:
+    """Express a record found on a downsampled level in full resolution pixels"""
+    return nornir_imageregistration.AlignmentRecord(peak=tuple(np.asarray(record.peak, dtype=np.float64) * scale),
+                                                    weight=record.weight,
+                                                    angle=record.angle)
+
+
+def refine_level(record: nornir_imageregistration.AlignmentRecord,
+                 source: ImagePermutationHelper,
+                 target: ImagePermutationHelper,
+                 source_shape: tuple[int, int],
+                 target_shape: tuple[int, int],
+                 scale: int,
+                 window: int,
+                 angle_step: float) -> nornir_imageregistration.AlignmentRecord:
+    """
+    Refine a full resolution rigid alignment on one pyramid level
+    :param source: Source image at the level
+    :param target: Target image at the level
+    :param source_shape: Full resolution source shape
+    :param target_shape: Full resolution target shape
+    :param scale: Downsample factor of the level
+    :param window: Size of the correlated windows, reduced to fit small levels
+    :param angle_step: Degrees either side of the current angle to try
+    """
+    target_image = np.asarray(target.ImageWithMaskAsNoise)
+    window = min(window, *target_image.shape)
+    origins = _window_origins(target_image.shape, window)
+
+    engine = pyre.batch_registration.BatchPhaseCorrelation(alignment_area=(window, window), angles=[0])
+    target_windows = np.stack([target_image[y:y + window, x:x + window] for y, x in origins]).astype(np.float32)
+    target_ffts = engine.target_ffts(target_windows)
+
+    best = None
+    for angle in (record.angle - angle_step, record.angle, record.angle + angle_step):
+        candidate = nornir_imageregistration.AlignmentRecord(peak=record.peak, weight=record.weight, angle=angle)
+        transform = candidate.ToImageTransform(source_image_shape=source_shape, target_image_shape=target_shape)
+        source_windows = _warp_windows(np.asarray(source.ImageWithMaskAsNoise), transform, origins, window, scale)
+        peaks, weights = engine.correlate(target_ffts, engine.rotated_source_ffts(source_windows))
+
+        # The median ignores windows that landed on featureless or masked areas
+        weight = float(np.median(weights[:, 0]))
+        if best is None or weight > best.weight:
+            offset = np.median(peaks[:, 0], axis=0) * scale
+            best = nornir_imageregistration.AlignmentRecord(peak=tuple(np.asarray(record.peak) + offset),
+                                                            weight=weight,
+                                                            angle=angle)
+
+    return best
+
+
+def register_rigid(source_key: str,
+                   target_key: str,
+                   settings: nornir_imageregistration.settings.StosBruteSettings,
+                   largest_dimension: int,
+                   refine_window: int,
+                   image_manager: IImageManager) -> nornir_imageregistration.AlignmentRecord:
+    """
+    Rigidly align two images in the image manager, coarse to fine
+    :param largest_dimension: The brute search runs on the first pyramid level no larger than this
+    :param refine_window: Size of the windows correlated at each finer level
+    :return: The alignment in full resolution pixels
+    """
+    source_shape = tuple(image_manager[source_key].shape)
+    target_shape = tuple(image_manager[target_key].shape)
+    coarsest = max(level_for_size(source_shape, largest_dimension), level_for_size(target_shape, largest_dimension))
+
+    record = stos.SliceToSliceRigidRegistrationWithPreprocessedImages(
+        source_image_data=image_manager.pyramid_level(source_key, coarsest),
+        target_image_data=image_manager.pyramid_level(target_key, coarsest),
+        settings=settings,
+        SingleThread=False,
+        Cluster=False)
+    record = _scale_record(record, 2 ** coarsest)
+    _logger.info("Coarse alignment at 1/%d scale: %s", 2 ** coarsest, record)
+
+    angle_step = _initial_angle_step
+    for level in range(coarsest - 1, -1, -1):
+        record = refine_level(record,
+                              source=image_manager.pyramid_level(source_key, level),
+                              target=image_manager.pyramid_level(target_key, level),
+                              source_shape=source_shape,
+                              target_shape=target_shape,
+                              scale=2 ** level,
+                              window=refine_window,
+                              angle_step=angle_step)
+        angle_step = max(angle_step / 2, _min_angle_step)
+
+    return record
@@ -2,11 +2,12 @@ import logging
 import os
 import pyre
 
+_logger = logging.getLogger(__name__)
+
 
 def ResourcePath() -> str:
-    Logger = logging.getLogger("resources")
     rpath = os.path.join(pyre.__path__[0], 'resources')
-    Logger.info('Resources path: ' + rpath)
+    _logger.debug('Resources path: %s', rpath)
     return rpath
 
 
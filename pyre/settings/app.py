@@ -38,9 +38,21 @@ class AngleSearchRange(BaseModel):
 class PointRegistrationSettings(BaseModel):
     alignment_area: int = 128
     angle_search_range: AngleSearchRange = AngleSearchRange.zero()  # field(default_factory=AngleSearchRange)
-
-    def __init__(self, alignment_area: int = 256, angle_search_range: AngleSearchRange = AngleSearchRange.zero()):
-        super().__init__(alignment_area=alignment_area, angle_search_range=angle_search_range)
+    # Register multiple points with batched FFTs instead of one task per point.  Off until
+    # scripts/check_batch_registration.py shows it agrees with single point registration on real sections.
+    batched_fft: bool = False
+    fft_batch_size: int = 64  # Maximum point/angle correlations computed in one batched FFT
+    # Memory for regions of interest kept between registration runs.  Each point keeps a float32 target and source
+    # region, 2 * alignment_area ** 2 * 4 bytes, 512KB at the default 256 area, so 1024MB holds about 2000 points.
+    roi_cache_megabytes: int = 1024
+    async_registration: bool = True  # Register multiple points in the background, applying results as they arrive
+
+    def __init__(self, alignment_area: int = 256, angle_search_range: AngleSearchRange = AngleSearchRange.zero(),
+                 batched_fft: bool = False, fft_batch_size: int = 64, roi_cache_megabytes: int = 1024,
+                 async_registration: bool = True):
+        super().__init__(alignment_area=alignment_area, angle_search_range=angle_search_range,
+                         batched_fft=batched_fft, fft_batch_size=fft_batch_size,
+                         roi_cache_megabytes=roi_cache_megabytes, async_registration=async_registration)
 
     @property
     def alignment_area_shape(self) -> NDArray[int]:
@@ -65,6 +77,11 @@ class StosSettings(BaseModel):
                                             angle_step_size=2.5))  # field(default_factory=PointRegistrationSettings)
     brute_registration: StosBruteSettings = StosBruteSettings(
         method=nornir_imageregistration.settings.SliceToSliceMethod.LogPolar)  # field(default_factory=StosBruteSettings)
+    rigid_pyramid: bool = True  # Brute search a downsampled image, then refine at each finer pyramid level
+    rigid_refine_window: int = 256  # Size of the windows correlated at each pyramid level during refinement
+    undo_depth: int = 500  # Maximum number of edits kept in the undo history
+    undo_history_megabytes: int = 256  # Memory for point edits kept in the undo history
+    edit_journal: bool = True  # Journal edits to disk so unsaved work can be restored after a crash
     point_registration: PointRegistrationSettings = PointRegistrationSettings()  # Used when the user selects a single point to register
     source_image: ImageAndMaskPath | None = None  # The last source image loaded by the user
     target_image: ImageAndMaskPath | None = None  # The last target image loaded by the user
@@ -90,9 +107,28 @@ class UISettings(BaseModel):
         str, str] = {}  # field(default_factory=dict)  # Paths to try replacing when searching for files
 
 
+class LoggingSettings(BaseModel):
+    console_level: str = "WARNING"  # Least severe level printed to the console
+    file_level: str | None = None  # Least severe level written to pyre.log in the log directory, None for no file
+    ring_buffer_level: str = "INFO"  # Least severe level kept in memory and written out when an error is logged
+    ring_buffer_size: int = 2000  # Number of recent records kept in memory, 0 to disable
+    log_dir: str | None = None  # Directory for log files, None uses ~/.pyre/logs
+    levels: dict[str, str] = {}  # Levels of individual loggers, such as {"pyre.commands": "DEBUG"}
+
+
+class ProfilerSettings(BaseModel):
+    output_dir: str | None = None  # Directory profiles are written to, None uses ~/.pyre/profiles
+    sample_interval_ms: float = 5.0  # Milliseconds between stack samples
+    all_threads: bool = True  # Sample worker threads running pyre code as well as the UI thread
+
+
 class AppSettings(BaseModel):
     debug: bool = False
     readme: str = "README.txt"
+    shader_cache_dir: str | None = None  # Directory for cached shader program binaries, None uses ~/.pyre/shader_cache
+    journal_dir: str | None = None  # Directory for the crash recovery edit journal, None uses ~/.pyre/journal
+    logging: LoggingSettings = LoggingSettings()
+    profiler: ProfilerSettings = ProfilerSettings()
 
     ui: UISettings = UISettings()  # field(default_factory=UISettings)
     stos: StosSettings = StosSettings()  # field(default_factory=StosSettings)
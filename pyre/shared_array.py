@@ -0,0 +1,79 @@
+"""
+Numpy arrays placed in shared memory so worker processes can read them without the array
+being pickled for every task.  The owning process creates a SharedArray and passes its
+picklable handle to workers, which attach to it by name.
+"""
+from __future__ import annotations
+
+from contextlib import contextmanager
+from multiprocessing import shared_memory
+from typing import Generator, NamedTuple
+
+import numpy as np
+from numpy.typing import NDArray
+
+
+class SharedArrayHandle(NamedTuple):
+    """Everything a worker process needs to attach to a SharedArray"""
+    name: str  # Name of the shared memory block
+    shape: tuple[int, ...]
+    dtype: str  # numpy dtype string
+
+
+class SharedArray:
+    """
+    Owns a copy of an array in shared memory.  The memory is released by close(), workers
+    must be finished with the array before the owner closes it.
+    """
+    _shm: shared_memory.SharedMemory | None
+    _handle: SharedArrayHandle
+
+    @property
+    def handle(self) -> SharedArrayHandle:
+        return self._handle
+
+    def __init__(self, array: NDArray):
+        array = np.ascontiguousarray(array)
+        self._shm = shared_memory.SharedMemory(create=True, size=max(array.nbytes, 1))
+        self._handle = SharedArrayHandle(self._shm.name, tuple(array.shape), array.dtype.str)
+
+        shared = np.ndarray(array.shape, dtype=array.dtype, buffer=self._shm.buf)
+        shared[:] = array
+        del shared
+
+    def close(self):
+        """Release the shared memory"""
+        if self._shm is None:
+            return
+
+        self._shm.close()
+        self._shm.unlink()
+        self._shm = None
+
+    def __enter__(self) -> SharedArray:
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+@contextmanager
+def attach(handle: SharedArrayHandle | None) -> Generator[NDArray | None, None, None]:
+    """
+    Attach to a SharedArray from a worker process.  The array is only valid inside the with block,
+    copy anything that must outlive it.  A None handle yields None.
+    """
+    if handle is None:
+        yield None
+        return
+
+    shm = shared_memory.SharedMemory(name=handle.name)
+    try:
+        array = np.ndarray(handle.shape, dtype=handle.dtype, buffer=shm.buf)
+        yield array
+        del array
+    finally:
+        shm.close()
@@ -1,3 +1,5 @@
+import logging
+
 import nornir_imageregistration.transforms
 import pyre.settings
 import os
@@ -20,6 +22,8 @@ from ..settings import ImageAndMaskPath
 # The global gl_context_manager
 
 
+_logger = logging.getLogger(__name__)
+
 currentStosConfig = None  # type: StosState
 currentMosaicConfig = None  # type: MosaicState
 
@@ -76,3 +80,18 @@ def InitializeStateFromSettings(stos_transform_controller: TransformController,
         if settings.stos.source_image is not None and settings.stos.source_image.image_fullpath is not None:
             image_loader.load_image_into_manager(ViewType.Source, settings.stos.source_image.image_fullpath,
                                                  mask_path=settings.stos.source_image.mask_fullpath)
+
+
+@inject
+def RestoreEditJournal(stos_transform_controller: TransformController,
+                       edit_journal: pyre.interfaces.managers.IEditJournal = Provide[IContainer.edit_journal],
+                       settings: pyre.settings.AppSettings = Provide[IContainer.settings]):
+    """Replay the edit journal left by a session that crashed, then journal this session's edits"""
+    if not settings.stos.edit_journal:
+        return
+
+    num_records = edit_journal.replay(stos_transform_controller, settings.stos.stos_filename)
+    if num_records > 0:
+        _logger.warning("Restored unsaved edits from %d edit journal records", num_records)
+
+    edit_journal.attach(stos_transform_controller, settings.stos.stos_filename)
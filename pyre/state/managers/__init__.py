@@ -1,9 +1,12 @@
 """Contains implementations of state objects"""
 from .command_history import CommandHistory
+from .edit_journal import EditJournal
 from .gl_context_manager import GLContextManager
 from .image_manager import ImageManager
 from .mousepositionhistorymanager import MousePositionHistoryManager
+from .profiler import SamplingProfiler
 from .region_manager import RegionMap
+from .roi_cache import RegistrationROICache
 from .transformcontroller_glbuffer_manager import TransformControllerGLBufferManager
 from .window_manager import WindowManager
 from .image_viewmodel_manager import ImageViewModelManager
@@ -3,65 +3,300 @@ Created on Apr 10, 2013
 
 @author: u0388504
 """
+from __future__ import annotations
 
+import logging
+from typing import Callable
+
+from dependency_injector.wiring import Provide, inject
+import numpy as np
+from numpy.typing import NDArray
+
+import pyre
+from pyre.container import IContainer
 from pyre.interfaces.managers.command_history import ICommandHistory
+from pyre.settings import AppSettings
+
+_logger = logging.getLogger(__name__)
+
+_sparse_fraction = 0.5  # Edits changing more than this fraction of the rows are stored as one contiguous block
+_checkpoint_interval = 32  # A full copy of the points is kept after every this many point edits
+
+
+def _rows_changed(a: NDArray[np.floating], b: NDArray[np.floating]) -> NDArray[np.bool_]:
+    """True for each row that differs between two arrays of the same shape, NaN compares equal to NaN"""
+    different = (a != b) & ~(np.isnan(a) & np.isnan(b))
+    return np.any(different, axis=1)
+
+
+def _first_changed(a: NDArray[np.floating], b: NDArray[np.floating]) -> int:
+    """Number of leading rows that are equal in both arrays"""
+    changed = np.flatnonzero(_rows_changed(a, b))
+    return int(changed[0]) if len(changed) > 0 else len(a)
+
+
+class PointDelta:
+    """
+    The rows of a control point array changed by one edit.  Edits that move a few points store only the indices and
+    values of those rows.  Edits that add, remove or move most points store the block of rows between the first and
+    last row that changed.
+    """
+    indices: NDArray[np.intp] | None  # Changed rows, None if the delta is a block of rows
+    start: int  # First row of the block
+    before: NDArray[np.floating]  # Rows before the edit
+    after: NDArray[np.floating]  # Rows after the edit
+    count_before: int  # Number of points before the edit
+    count_after: int  # Number of points after the edit
+
+    @property
+    def nbytes(self) -> int:
+        indices_bytes = 0 if self.indices is None else self.indices.nbytes
+        return indices_bytes + self.before.nbytes + self.after.nbytes
+
+    def __init__(self, indices: NDArray[np.intp] | None, start: int,
+                 before: NDArray[np.floating], after: NDArray[np.floating],
+                 count_before: int, count_after: int):
+        self.indices = indices
+        self.start = start
+        self.before = before
+        self.after = after
+        self.count_before = count_before
+        self.count_after = count_after
+
+    @staticmethod
+    def between(before: NDArray[np.floating], after: NDArray[np.floating]) -> PointDelta | None:
+        """:return: The delta that turns before into after, None if they are equal"""
+        if before.shape == after.shape:
+            changed = np.flatnonzero(_rows_changed(before, after))
+            if len(changed) == 0:
+                return None
+
+            if len(changed) <= len(before) * _sparse_fraction:
+                return PointDelta(changed, 0, before[changed], after[changed], len(before), len(after))
+
+        common = min(len(before), len(after))
+        start = _first_changed(before[:common], after[:common])
+        # Matching trailing rows are found by comparing the arrays back to front
+        end_offset = _first_changed(before[::-1][:common - start], after[::-1][:common - start])
+        return PointDelta(None, start,
+                          before[start:len(before) - end_offset].copy(),
+                          after[start:len(after) - end_offset].copy(),
+                          len(before), len(after))
+
+    def matches(self, points: NDArray[np.floating], forward: bool) -> bool:
+        """True if points are in the state this delta leaves them in when applied forward or backward"""
+        count, rows = (self.count_after, self.after) if forward else (self.count_before, self.before)
+        if len(points) != count:
+            return False
+
+        current = points[self.indices] if self.indices is not None else points[self.start:self.start + len(rows)]
+        return not np.any(_rows_changed(current, rows))
+
+    def apply(self, points: NDArray[np.floating], forward: bool) -> NDArray[np.floating]:
+        """:return: A copy of the points with the delta redone if forward is True, otherwise undone"""
+        old, new = (self.before, self.after) if forward else (self.after, self.before)
+        if self.indices is not None:
+            result = np.array(points)
+            result[self.indices] = new
+            return result
+
+        return np.concatenate((points[:self.start], new, points[self.start + len(old):]), axis=0)
+
+
+class PointEditEntry:
+    """A point edit in the history and, periodically, a full copy of the points after it"""
+    transform_controller: pyre.viewmodels.TransformController
+    delta: PointDelta
+    version: int  # Version of the transform controller when the edit was recorded
+    checkpoint: NDArray[np.floating] | None
+
+    @property
+    def nbytes(self) -> int:
+        checkpoint_bytes = 0 if self.checkpoint is None else self.checkpoint.nbytes
+        return self.delta.nbytes + checkpoint_bytes
+
+    def __init__(self, transform_controller: pyre.viewmodels.TransformController, delta: PointDelta,
+                 checkpoint: NDArray[np.floating] | None = None):
+        self.transform_controller = transform_controller
+        self.delta = delta
+        self.version = transform_controller.version
+        self.checkpoint = checkpoint
+
+
+class RecoveryEntry:
+    """A function that restores the state before an edit.  It can be undone but not redone."""
+    recoveryfunc: Callable
+    args: tuple
+    kwargs: dict
+
+    nbytes = 0
+
+    def __init__(self, recoveryfunc: Callable, args: tuple, kwargs: dict):
+        self.recoveryfunc = recoveryfunc
+        self.args = args
+        self.kwargs = kwargs
 
 
 class CommandHistory(ICommandHistory):
-    """Saves and returns objects along with indicies"""
+    """
+    Undo history of transform edits.  Point edits are stored as the rows they changed, with a full copy of the points
+    after every _checkpoint_interval edits.  Undo and redo apply the deltas to the current points.  If the points were
+    changed outside the history the state is rebuilt from the nearest checkpoint instead.
+    """
+    _entries: list[PointEditEntry | RecoveryEntry]
+    _position: int  # Number of entries that are applied, the next undo reverts _entries[_position - 1]
+    _edits_since_checkpoint: int
+    _nbytes: int
+    _max_depth: int
+    _max_bytes: int
+
+    @property
+    def HistoryDepth(self) -> int:
+        return len(self._entries)
 
     @property
-    def HistoryDepth(self):
-        return len(self.History)
+    def nbytes(self) -> int:
+        return self._nbytes
 
-    def __init__(self):
-        self.History = []
-        self.HistoryIndex = 0
+    @inject
+    def __init__(self, settings: AppSettings = Provide[IContainer.settings]):
+        self._max_depth = settings.stos.undo_depth
+        self._max_bytes = settings.stos.undo_history_megabytes * 1024 * 1024
+        self.Clear()
+
+    def Clear(self):
+        self._entries = []
+        self._position = 0
+        self._edits_since_checkpoint = _checkpoint_interval - 1  # The first edit is checkpointed
+        self._nbytes = 0
+
+    def _append(self, entry: PointEditEntry | RecoveryEntry):
+        """Add an entry after the current position, discarding entries that were undone and the oldest entries
+        that no longer fit"""
+        for discarded in self._entries[self._position:]:
+            self._nbytes -= discarded.nbytes
+        del self._entries[self._position:]
+
+        self._entries.append(entry)
+        self._nbytes += entry.nbytes
+        self._position = len(self._entries)
+
+        while len(self._entries) > 1 and (len(self._entries) > self._max_depth or self._nbytes > self._max_bytes):
+            self._nbytes -= self._entries.pop(0).nbytes
+            self._position -= 1
 
     def SaveState(self, recoveryfunc, *args, **kwargs):
         """Copy the transform points into the undo history.
            Data is the data to pass to the recovery function"""
+        self._append(RecoveryEntry(recoveryfunc, args, kwargs))
+
+    def RecordPointEdit(self, transform_controller: pyre.viewmodels.TransformController,
+                        original_points: NDArray[np.floating],
+                        replaces_version: int | None = None):
+        """Record the change from original_points to the transform's current points as one undo step"""
+        points = transform_controller.CopyPoints()
+        delta = PointDelta.between(np.asarray(original_points), points)
+        if delta is None:
+            return
 
-        if args is None:
-            args = []
-        if kwargs is None:
-            kwargs = {}
+        last = self._entries[self._position - 1] if self._position > 0 else None
+        if isinstance(last, PointEditEntry) and last.transform_controller is transform_controller and \
+                last.version in (transform_controller.version, replaces_version):
+            # Nothing changed since the last edit was recorded, so this edit started before it and contains it.
+            # This happens when a command finishes after a command it queued, such as adding a point and dragging it,
+            # or when a command records its edit each time it applies part of it.
+            self._position -= 1
 
-        assert (isinstance(kwargs, dict))
+        self._edits_since_checkpoint += 1
+        checkpoint = None
+        if self._edits_since_checkpoint >= _checkpoint_interval:
+            checkpoint = points
+            self._edits_since_checkpoint = 0
 
-        if self.HistoryIndex > 0:
-            del self.History[0:self.HistoryIndex]
-            self.HistoryIndex = 0
+        self._append(PointEditEntry(transform_controller, delta, checkpoint))
 
-        self.History.insert(0, (recoveryfunc, args, kwargs))
+    def _points_after(self, position: int) -> NDArray[np.floating] | None:
+        """Rebuild the points as they were with the first position entries applied from the nearest checkpoint"""
+        checkpoints = [i for i, entry in enumerate(self._entries)
+                       if isinstance(entry, PointEditEntry) and entry.checkpoint is not None]
+        if len(checkpoints) == 0:
+            return None
 
-        if len(self.History) > 15:
-            del self.History[-1]
+        # Entry i's checkpoint holds the points with i + 1 entries applied
+        nearest = min(checkpoints, key=lambda i: abs(i + 1 - position))
+        points = self._entries[nearest].checkpoint
+        applied = nearest + 1
+        while applied != position:
+            forward = applied < position
+            entry = self._entries[applied if forward else applied - 1]
+            if isinstance(entry, PointEditEntry):
+                if not entry.delta.matches(points, not forward):
+                    return None
+                points = entry.delta.apply(points, forward)
+            applied += 1 if forward else -1
+
+        return points
+
+    def _apply(self, entry: PointEditEntry, forward: bool, position: int) -> bool:
+        """Redo or undo a point edit, leaving position entries applied.  :return: True if the points were restored"""
+        transform_controller = entry.transform_controller
+        points = transform_controller.points
+        if entry.delta.matches(points, not forward):
+            restored = entry.delta.apply(points, forward)
+        else:
+            restored = self._points_after(position)
+            if restored is None:
+                _logger.warning("Points were changed outside the undo history and no checkpoint can restore them")
+                return False
+
+        transform_controller.SetPoints(restored)
+        # A command finishing after an undo or redo never contains the restored entry
+        entry.version = -1
+        return True
 
     def Undo(self):
-        self.HistoryIndex -= 1
-        self.RestoreState(self.HistoryIndex)
+        if self._position == 0:
+            _logger.info("Nothing to undo")
+            return
 
-    def Redo(self):
-        self.HistoryIndex += 1
-        self.RestoreState(self.HistoryIndex)
+        entry = self._entries[self._position - 1]
+        if isinstance(entry, RecoveryEntry):
+            entry.recoveryfunc(*entry.args, **entry.kwargs)
+        elif not self._apply(entry, False, self._position - 1):
+            return
 
-    def RestoreState(self, index=None):
-        """Replace current points with points from undo history"""
+        self._position -= 1
 
-        if len(self.History) <= 0:
+    def Redo(self):
+        if self._position >= len(self._entries):
+            _logger.info("Nothing to redo")
             return
 
-        if index is None:
-            index = 0
+        entry = self._entries[self._position]
+        if isinstance(entry, RecoveryEntry):
+            _logger.info("The next step in the history cannot be redone")
+            return
+        elif not self._apply(entry, True, self._position + 1):
+            return
+
+        self._position += 1
 
-        if index < 0:
-            index = 0
-        if index >= len(self.History):
-            index = len(self.History) - 1
+    def RestoreState(self, index: int = None):
+        """Undo or redo until index entries are applied"""
+        if index is None:
+            index = len(self._entries)
 
-        print("Restore State #" + str(index))
+        index = min(max(index, 0), len(self._entries))
+        _logger.debug("Restore State #%d", index)
 
-        (recoveryfunction, args, kwargs) = self.History[index]
+        while self._position > index:
+            position = self._position
+            self.Undo()
+            if self._position == position:
+                return
 
-        recoveryfunction(*args, **kwargs)
+        while self._position < index:
+            position = self._position
+            self.Redo()
+            if self._position == position:
+                return
@@ -5,12 +5,13 @@ from pyre.command_interfaces import ICommand
 from pyre.interfaces.managers.command_queue import ICommandQueue
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class CommandQueue(ICommandQueue):
     _queue: list[ICommand]
     _lock: threading.Lock
     _event: threading.Event
-    _logger: logging.Logger
 
     @inject
     def __init__(self):
@@ -21,24 +22,24 @@ class CommandQueue(ICommandQueue):
     def put(self, command: ICommand):
         with self._lock:
             self._queue.append(command)
-            logging.info(f'CommandQueue.put {command}')
+            _logger.debug('CommandQueue.put %s', command)
             self.event.set()
 
     def clear(self):
         with self._lock:
             self._queue.clear()
-            logging.info(f'CommandQueue.clear()')
+            _logger.debug('CommandQueue.clear()')
             self.event.clear()
 
     def get(self) -> ICommand | None:
         with self._lock:
             if len(self._queue) == 0:
                 self.event.clear()
-                logging.info(f'CommandQueue.get: No commands in queue')
+                _logger.debug('CommandQueue.get: No commands in queue')
                 return None
 
             value = self._queue.pop(0)
-            logging.info(f'CommandQueue.get -> {value}')
+            _logger.debug('CommandQueue.get -> %s', value)
             return value
 
     def wait(self, timeout=None):
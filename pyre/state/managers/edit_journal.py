@@ -0,0 +1,507 @@
+"""
+Crash recovery journal of transform edits.
+
+The journal is an append-only file of records, each a header, a payload and a CRC32.  A transform
+record holds the whole transform, written when the session starts or the transform is replaced.
+Point edits after it are written as the rows they changed.  Records are written to a memory
+mapping of the file by a background thread and synced to disk in batches, so the UI thread only
+copies the points when an edit is committed.  Replay stops at the first incomplete or corrupt
+record, which is where a crash interrupted the writer.
+
+Every session writes its own journal, named for the time it started and its process id, and holds a lock on a
+file beside it while it runs.  A journal whose lock can be taken was left by a session that crashed.  Journals
+that are not replayed, because they were recorded for another stos file, are left in place for a later start.
+"""
+from __future__ import annotations
+
+import datetime
+import glob
+import json
+import logging
+import mmap
+import os
+import queue
+import struct
+import threading
+import time
+import zlib
+
+from dependency_injector.wiring import Provide, inject
+import numpy as np
+from numpy.typing import NDArray
+
+import nornir_imageregistration
+import pyre
+from pyre.container import IContainer
+from pyre.interfaces.managers.edit_journal import IEditJournal
+from pyre.settings import AppSettings
+from pyre.state.managers.command_history import PointDelta, _rows_changed
+
+_logger = logging.getLogger(__name__)
+
+_magic = b'PYREJRNL'
+_file_header = struct.Struct('<8sI')  # Magic, format version
+_format_version = 1
+_record_header = struct.Struct('<IIQ')  # Kind, payload length, sequence number
+_record_crc = struct.Struct('<I')
+_delta_header = struct.Struct('<qqqq')  # First row of a block or -1 for indexed rows, rows replaced, points after, rows
+
+_end_of_journal = 0  # Unwritten space in the mapping is zero, so a zero kind ends the journal
+_transform_record = 1  # JSON with the stos filename and the transform's ITK string
+_points_record = 2  # Every control point, written when the journal is compacted
+_delta_record = 3  # Rows changed by one edit
+
+_chunk_bytes = 4 * 1024 * 1024  # The file grows by this much when the mapping is full
+_compact_bytes = 64 * 1024 * 1024  # The journal is rewritten as one snapshot when it grows past this
+_sync_interval = 0.5  # Seconds between syncing written records to disk
+_journal_prefix = 'stos_session'
+_journal_suffix = '.journal'
+_lock_suffix = '.lock'
+
+
+def default_journal_dir() -> str:
+    return os.path.join(os.path.expanduser('~'), '.pyre', 'journal')
+
+
+def _try_lock(path: str):
+    """
+    Take an exclusive lock on a file, created if missing, without waiting.  The lock is released when the
+    returned file is closed, or by the operating system if the process dies.
+    :return: The open file holding the lock, None if another process holds it
+    """
+    file = open(path, 'a+b')
+    try:
+        if os.name == 'nt':
+            import msvcrt
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_NBLCK, 1)
+        else:
+            import fcntl
+            fcntl.flock(file.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+    except OSError:
+        file.close()
+        return None
+
+    return file
+
+
+def _remove(path: str):
+    try:
+        os.remove(path)
+    except FileNotFoundError:
+        pass
+    except OSError as e:
+        _logger.warning("Could not remove %s: %s", path, e)
+
+
+def _encode_record(kind: int, sequence: int, payload: bytes) -> bytes:
+    header = _record_header.pack(kind, len(payload), sequence)
+    return header + payload + _record_crc.pack(zlib.crc32(payload, zlib.crc32(header)))
+
+
+def _encode_delta(delta: PointDelta) -> bytes:
+    rows = np.ascontiguousarray(delta.after, dtype=np.float64)
+    if delta.indices is not None:
+        header = _delta_header.pack(-1, len(delta.indices), delta.count_after, len(rows))
+        return header + np.ascontiguousarray(delta.indices, dtype=np.int64).tobytes() + rows.tobytes()
+
+    return _delta_header.pack(delta.start, len(delta.before), delta.count_after, len(rows)) + rows.tobytes()
+
+
+def _apply_delta(points: NDArray[np.floating], payload: bytes) -> NDArray[np.floating]:
+    start, replaced, count_after, num_rows = _delta_header.unpack_from(payload)
+    offset = _delta_header.size
+    if start < 0:
+        indices = np.frombuffer(payload, dtype=np.int64, count=num_rows, offset=offset)
+        offset += indices.nbytes
+    rows = np.frombuffer(payload, dtype=np.float64, count=num_rows * 4, offset=offset).reshape(num_rows, 4)
+
+    if start < 0:
+        points = np.array(points)
+        points[indices] = rows
+    else:
+        points = np.concatenate((points[:start], rows, points[start + replaced:]), axis=0)
+
+    if len(points) != count_after:
+        raise ValueError(f"Journal edit left {len(points)} points, expected {count_after}")
+
+    return points
+
+
+def _read_records(path: str) -> list[tuple[int, bytes]]:
+    """:return: (kind, payload) of every intact record in the journal"""
+    with open(path, 'rb') as file:
+        data = file.read()
+
+    if len(data) < _file_header.size:
+        return []
+
+    magic, version = _file_header.unpack_from(data)
+    if magic != _magic or version != _format_version:
+        _logger.warning("%s is not a version %d pyre edit journal", path, _format_version)
+        return []
+
+    records = []
+    offset = _file_header.size
+    while offset + _record_header.size <= len(data):
+        kind, length, sequence = _record_header.unpack_from(data, offset)
+        if kind == _end_of_journal:
+            break
+
+        payload_start = offset + _record_header.size
+        end = payload_start + length + _record_crc.size
+        if end > len(data):
+            break
+
+        payload = data[payload_start:payload_start + length]
+        (crc,) = _record_crc.unpack_from(data, payload_start + length)
+        if crc != zlib.crc32(payload, zlib.crc32(data[offset:payload_start])):
+            _logger.warning("Edit journal record %d is incomplete, later edits are lost", sequence)
+            break
+
+        records.append((kind, payload))
+        offset = end
+
+    return records
+
+
+class EditJournal(IEditJournal):
+    """
+    Writes the edits of a transform controller to a memory mapped journal on a background thread.  The UI thread
+    queues a copy of the points when the transform changes, the writer diffs it against the previous copy and
+    appends the changed rows.
+    """
+    _path: str
+    _lock = None  # Open lock file of this session's journal, held while attached
+    _replayed: tuple[str, object] | None  # (path, open lock file) of the crashed session's journal restored
+    _transform_controller: pyre.viewmodels.TransformController | None
+    _stos_filename: str | None
+    _recorded_version: int  # Last transform controller version queued for writing
+    _queue: queue.SimpleQueue
+    _writer: threading.Thread | None
+
+    # Only used by the writer thread once attached
+    _file = None
+    _mmap: mmap.mmap | None
+    _offset: int  # Where the next record is written
+    _sequence: int
+    _points: NDArray[np.floating]  # Points after the last written record
+    _transform_payload: bytes  # Payload of the last transform record, rewritten when compacting
+
+    @property
+    def path(self) -> str:
+        return self._path
+
+    @inject
+    def __init__(self, settings: AppSettings = Provide[IContainer.settings]):
+        journal_dir = settings.journal_dir if settings.journal_dir is not None else default_journal_dir()
+        started = datetime.datetime.now().strftime('%Y%m%d-%H%M%S')
+        self._path = os.path.join(journal_dir, f'{_journal_prefix}-{started}-{os.getpid()}{_journal_suffix}')
+        self._replayed = None
+        self._transform_controller = None
+        self._stos_filename = None
+        self._recorded_version = -1
+        self._queue = queue.SimpleQueue()
+        self._writer = None
+        self._mmap = None
+
+    def _orphaned_journals(self) -> list[tuple[str, object]]:
+        """:return: (path, open lock file) of journals left by sessions that are not running, newest first"""
+        pattern = os.path.join(os.path.dirname(self._path), glob.escape(_journal_prefix) + '*' + _journal_suffix)
+        paths = [path for path in glob.glob(pattern) if os.path.abspath(path) != os.path.abspath(self._path)]
+        paths.sort(key=lambda path: os.path.getmtime(path), reverse=True)
+
+        orphans = []
+        for path in paths:
+            try:
+                lock = _try_lock(path + _lock_suffix)
+            except OSError as e:
+                _logger.warning("Could not check whether edit journal %s is in use: %s", path, e)
+                continue
+
+            if lock is not None:
+                orphans.append((path, lock))
+
+        return orphans
+
+    def replay(self, transform_controller: pyre.viewmodels.TransformController, stos_filename: str | None) -> int:
+        if not os.path.isdir(os.path.dirname(self._path)):
+            return 0
+
+        num_records = 0
+        for path, lock in self._orphaned_journals():
+            if self._replayed is None:
+                num_records = self._replay(path, transform_controller, stos_filename)
+                if num_records > 0:
+                    # Held until this session's journal holds the restored edits, then removed
+                    self._replayed = (path, lock)
+                    continue
+
+            lock.close()
+
+        return num_records
+
+    def _replay(self, path: str, transform_controller: pyre.viewmodels.TransformController,
+                stos_filename: str | None) -> int:
+        """Restore the transform recorded in a journal if it was recorded for the stos file"""
+        try:
+            records = _read_records(path)
+        except OSError as e:
+            _logger.error("Could not read edit journal %s: %s", path, e)
+            return 0
+
+        transform_indices = [i for i, (kind, _) in enumerate(records) if kind == _transform_record]
+        if len(transform_indices) == 0:
+            return 0
+
+        records = records[transform_indices[-1]:]
+        header = json.loads(records[0][1].decode('utf-8'))
+        if header['stos_filename'] != stos_filename:
+            _logger.warning("Edit journal %s was recorded for %s, it is kept to be restored when that file is "
+                            "opened at startup", path, header['stos_filename'])
+            return 0
+
+        try:
+            transform = nornir_imageregistration.transforms.LoadTransform(header['transform'])
+            points = None
+            for kind, payload in records[1:]:
+                if kind == _points_record:
+                    points = np.frombuffer(payload, dtype=np.float64).reshape(-1, 4).copy()
+                elif kind == _delta_record:
+                    if points is None:
+                        points = np.array(transform.points, dtype=np.float64)
+                    points = _apply_delta(points, payload)
+        except Exception:
+            _logger.exception("Could not replay edit journal %s, it is kept", path)
+            return 0
+
+        transform_controller.TransformModel = transform
+        if points is not None:
+            transform_controller.SetPoints(points)
+
+        _logger.info("Replayed edit journal %s", path)
+        return len(records)
+
+    def _discard_replayed(self):
+        """Remove the crashed session's journal once its edits are in this session's journal"""
+        if self._replayed is None:
+            return
+
+        path, lock = self._replayed
+        self._replayed = None
+        _remove(path)
+        lock.close()
+        _remove(path + _lock_suffix)
+
+    def _transform_payload_for(self, transform: nornir_imageregistration.ITransform) -> bytes:
+        return json.dumps({'stos_filename': self._stos_filename,
+                           'transform': transform.ToITKString()}).encode('utf-8')
+
+    def attach(self, transform_controller: pyre.viewmodels.TransformController, stos_filename: str | None):
+        if self._transform_controller is not None:
+            self._detach()
+
+        self._transform_controller = transform_controller
+        self._stos_filename = stos_filename
+        self._recorded_version = transform_controller.version
+
+        try:
+            os.makedirs(os.path.dirname(self._path), exist_ok=True)
+            if self._lock is None:
+                self._lock = _try_lock(self._path + _lock_suffix)
+                if self._lock is None:
+                    raise OSError(f"{self._path} is locked by another process")
+            self._sequence = 0
+            self._transform_payload = self._transform_payload_for(transform_controller.TransformModel)
+            self._points = transform_controller.CopyPoints()
+            self._create([(_transform_record, self._transform_payload)])
+        except OSError as e:
+            _logger.error("Could not create edit journal %s, edits will not be recoverable: %s", self._path, e)
+            self._transform_controller = None
+            return
+
+        self._discard_replayed()
+        self._writer = threading.Thread(target=self._run, name="Edit journal writer", daemon=True)
+        self._writer.start()
+
+        transform_controller.AddOnChangeEventListener(self._on_transform_changed)
+        transform_controller.AddOnModelReplacedEventListener(self._on_transform_model_replaced)
+
+    def set_stos_filename(self, stos_filename: str | None):
+        self._stos_filename = stos_filename
+        if self._transform_controller is not None:
+            self._queue_transform()
+
+    def _recording(self) -> bool:
+        """False once the writer has stopped after an error"""
+        return self._writer is not None and self._writer.is_alive()
+
+    def _queue_transform(self):
+        if not self._recording():
+            return
+
+        self._recorded_version = self._transform_controller.version
+        self._queue.put((_transform_record,
+                         self._transform_payload_for(self._transform_controller.TransformModel),
+                         self._transform_controller.CopyPoints()))
+
+    def _on_transform_changed(self, transform_controller: pyre.viewmodels.TransformController,
+                              change: pyre.controllers.transformcontroller.TransformChange):
+        if transform_controller.version == self._recorded_version or not self._recording():
+            return  # The points were already queued
+
+        if change.indices is not None and change.previous_version == self._recorded_version and \
+                change.version == transform_controller.version:
+            # Every edit since the queued points is in the change, only the edited rows are copied
+            indices = np.fromiter(change.indices, dtype=np.intp, count=len(change.indices))
+            self._queue.put((_delta_record, indices, np.array(transform_controller.points[indices])))
+        else:
+            self._queue.put((_delta_record, None, transform_controller.CopyPoints()))
+
+        self._recorded_version = transform_controller.version
+
+    def _on_transform_model_replaced(self, transform_controller: pyre.viewmodels.TransformController,
+                                     old: nornir_imageregistration.ITransform,
+                                     new: nornir_imageregistration.ITransform):
+        self._queue_transform()
+
+    def flush(self):
+        if not self._recording():
+            return
+
+        flushed = threading.Event()
+        self._queue.put((None, flushed, None))
+        flushed.wait()
+
+    def _detach(self):
+        self._transform_controller.RemoveOnChangeEventListener(self._on_transform_changed)
+        self._transform_controller.RemoveOnModelReplacedEventListener(self._on_transform_model_replaced)
+        self._transform_controller = None
+
+        self._queue.put((None, None, None))
+        self._writer.join()
+        self._writer = None
+        self._close_file()
+
+    def close(self):
+        if self._transform_controller is None:
+            return
+
+        self._detach()
+        _remove(self._path)
+        if self._lock is not None:
+            self._lock.close()
+            self._lock = None
+            _remove(self._path + _lock_suffix)
+
+    def _create(self, records: list[tuple[int, bytes]]):
+        """Replace the journal file with one holding only the records, then map it for appending"""
+        encoded = [_file_header.pack(_magic, _format_version)]
+        for kind, payload in records:
+            encoded.append(_encode_record(kind, self._sequence, payload))
+            self._sequence += 1
+        data = b''.join(encoded)
+
+        # Written beside the journal and renamed, so a crash leaves either the old or the new journal
+        temp_path = self._path + '.tmp'
+        with open(temp_path, 'wb') as file:
+            file.write(data)
+            file.truncate(len(data) + _chunk_bytes)
+            file.flush()
+            os.fsync(file.fileno())
+        os.replace(temp_path, self._path)
+
+        self._file = open(self._path, 'r+b')
+        self._mmap = mmap.mmap(self._file.fileno(), 0)
+        self._offset = len(data)
+
+    def _close_file(self):
+        if self._mmap is not None:
+            self._mmap.flush()
+            self._mmap.close()
+            self._mmap = None
+        if self._file is not None:
+            self._file.close()
+            self._file = None
+
+    def _append(self, kind: int, payload: bytes):
+        record = _encode_record(kind, self._sequence, payload)
+        self._sequence += 1
+        end = self._offset + len(record)
+        if end + _record_header.size > len(self._mmap):
+            # Remap a larger file, the space after the last record stays zero and marks the end of the journal
+            size = end + _record_header.size + _chunk_bytes
+            self._mmap.flush()
+            self._mmap.close()
+            self._file.truncate(size)
+            os.fsync(self._file.fileno())
+            self._mmap = mmap.mmap(self._file.fileno(), 0)
+
+        self._mmap[self._offset:end] = record
+        self._offset = end
+
+    def _write(self, kind: int, payload: bytes | NDArray[np.intp] | None, points: NDArray[np.floating]) -> bool:
+        """
+        Append the record for a queued edit
+        :param payload: The transform record's payload, or for an edit the indices of the points if only the edited
+        rows were queued
+        :return: True if anything was written
+        """
+        if kind == _transform_record:
+            self._transform_payload = payload
+            self._points = points
+            self._append(kind, payload)
+        elif payload is not None:
+            changed = _rows_changed(self._points[payload], points)
+            if not np.any(changed):
+                return False
+            indices = payload[changed]
+            delta = PointDelta(indices, 0, self._points[indices], points[changed], len(self._points),
+                               len(self._points))
+            self._points[indices] = points[changed]
+            self._append(kind, _encode_delta(delta))
+        else:
+            delta = PointDelta.between(self._points, points)
+            if delta is None:
+                return False
+            self._points = points
+            self._append(kind, _encode_delta(delta))
+
+        if self._offset > _compact_bytes:
+            self._close_file()
+            self._create([(_transform_record, self._transform_payload),
+                          (_points_record, np.ascontiguousarray(self._points, dtype=np.float64).tobytes())])
+
+        return True
+
+    def _run(self):
+        """Writer thread, syncs at most every _sync_interval seconds while edits arrive"""
+        unsynced = False
+        last_sync = time.monotonic()
+        while True:
+            timeout = max(0.0, _sync_interval - (time.monotonic() - last_sync)) if unsynced else None
+            try:
+                kind, payload, points = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                kind, payload, points = _end_of_journal, None, None
+
+            try:
+                if kind is None:
+                    self._mmap.flush()
+                    unsynced = False
+                    if payload is None:
+                        return  # Detached
+                    payload.set()
+                    continue
+                elif kind != _end_of_journal:
+                    unsynced = self._write(kind, payload, points) or unsynced
+
+                if unsynced and time.monotonic() - last_sync >= _sync_interval:
+                    self._mmap.flush()
+                    unsynced = False
+                    last_sync = time.monotonic()
+            except (OSError, ValueError) as e:
+                _logger.error("Edit journal %s stopped recording: %s", self._path, e)
+                if kind is None and payload is not None:
+                    payload.set()
+                return
@@ -7,13 +7,18 @@ This module tracks when windows create a GL context.  This the rough order of co
     notify the GLContextManager that a new context has been created.
 4. The GLContextManager will notify all subscribers that a new context has been created.
 5. GLPanel then invokes create_objects() so anyone inheriting GLPanel can perform initialization.
+
+Offscreen contexts (pyre.views.offscreen_renderer.OffscreenRenderer) skip steps 1-3 and call add_context directly.
 """
+import logging
 
 import wx.glcanvas
 
 from pyre.eventmanager import wxEventManager
 from pyre.interfaces import IEventManager
-from pyre.interfaces.managers.gl_context_manager import GLContextCreatedCallback, IGLContextManager
+from pyre.interfaces.managers.gl_context_manager import GLContext, GLContextCreatedCallback, IGLContextManager
+
+_logger = logging.getLogger(__name__)
 
 
 class GLContextManager(IGLContextManager):
@@ -22,16 +27,16 @@ class GLContextManager(IGLContextManager):
     the context so subscribers can create GL resources."""
 
     _GLContextAddedEventListeners: IEventManager[GLContextCreatedCallback]
-    _known_contexts: list[wx.glcanvas.GLContext]
+    _known_contexts: list[GLContext]
 
     def __init__(self):
         self._GLContextAddedEventListeners = wxEventManager[GLContextCreatedCallback]()
         self._known_contexts = list()
 
-    def add_context(self, context: wx.glcanvas.GLContext):
+    def add_context(self, context: GLContext):
         """Add a context to the manager.  This will invoke all subscribers with the new context."""
         if context not in self._known_contexts:
-            print(f"Adding context {context}")
+            _logger.debug("Adding context %s", context)
             self._known_contexts.append(context)
             self._GLContextAddedEventListeners.invoke(context)  # Notify all subscribers
 
@@ -39,7 +44,7 @@ class GLContextManager(IGLContextManager):
         """Callbacks are invoked when a GLContext is created, or if a context already exists,
                 immediately upon registration."""
         self._GLContextAddedEventListeners.add(func)
-        print(f"Adding context event listener {func}")
+        _logger.debug("Adding context event listener %s", func)
         for context in self._known_contexts:
             func(context)
 
@@ -1,5 +1,7 @@
 """Handles shared image resources"""
 from enum import Enum
+import logging
+import threading
 import nornir_imageregistration
 
 from numpy.typing import NDArray
@@ -8,15 +10,27 @@ from pyre.eventmanager import wxEventManager
 from pyre.interfaces.managers.image_manager import IImageManager, ImageManagerChangeCallback
 
 from pyre.interfaces.action import Action
+from pyre.integral_image import summed_area_table
+from pyre.image_pyramid import downsample
 from pyre.interfaces.viewtype import convert_to_key
 
+_logger = logging.getLogger(__name__)
+
 
 class ImageManager(IImageManager):
     _images: dict[str, nornir_imageregistration.ImagePermutationHelper]
+    _mask_tables: dict[str, NDArray]  # Summed-area tables of image masks, built on first use
+    _mask_tables_lock: threading.Lock
+    _pyramids: dict[str, list[nornir_imageregistration.ImagePermutationHelper]]  # Downsampled levels, level 0 first
+    _pyramids_lock: threading.Lock
     _change_event_manager: IEventManager[ImageManagerChangeCallback]
 
     def __init__(self):
         self._images = {}
+        self._mask_tables = {}
+        self._mask_tables_lock = threading.Lock()
+        self._pyramids = {}
+        self._pyramids_lock = threading.Lock()
         self._change_event_manager = wxEventManager[ImageManagerChangeCallback](self.__class__.__name__)
 
     def add(self,
@@ -27,7 +41,7 @@ class ImageManager(IImageManager):
         if key in self._images:
             raise KeyError(f"Image with key {key} already exists in the manager")
 
-        print(f"Adding image {key}")
+        _logger.debug("Adding image %s", key)
         if isinstance(image, nornir_imageregistration.ImagePermutationHelper):
             if mask is not None:
                 raise ValueError("Cannot provide a mask when image parameter is an ImagePermutationHelper")
@@ -40,10 +54,14 @@ class ImageManager(IImageManager):
         return permutations
 
     def __delitem__(self, key: str | Enum):
-        print(f"Removing image {key}")
+        _logger.debug("Removing image %s", key)
         key = convert_to_key(key)
         value = self._images[key]
         del self._images[key]
+        with self._mask_tables_lock:
+            self._mask_tables.pop(key, None)
+        with self._pyramids_lock:
+            self._pyramids.pop(key, None)
         self._change_event_manager.invoke(Action.REMOVE, key, value)
 
     def __contains__(self, key: str | Enum) -> bool:
@@ -54,6 +72,29 @@ class ImageManager(IImageManager):
         key = convert_to_key(key)
         return self._images[key]
 
+    def mask_summed_area_table(self, key: str | Enum) -> NDArray | None:
+        key = convert_to_key(key)
+        with self._mask_tables_lock:
+            if key not in self._mask_tables:
+                mask = self._images[key].BlendedMask
+                if mask is None:
+                    return None
+                self._mask_tables[key] = summed_area_table(mask)
+
+            return self._mask_tables[key]
+
+    def pyramid_level(self, key: str | Enum, level: int) -> nornir_imageregistration.ImagePermutationHelper:
+        key = convert_to_key(key)
+        if level < 0:
+            raise ValueError(f"Pyramid level must be non-negative, got {level}")
+
+        with self._pyramids_lock:
+            levels = self._pyramids.setdefault(key, [self._images[key]])
+            while len(levels) <= level:
+                levels.append(downsample(levels[-1]))
+
+            return levels[level]
+
     def add_change_event_listener(self, func: ImageManagerChangeCallback):
         """Callbacks are invoked when a GLContext is created, or if a context already exists,
          immediately upon registration."""
@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from enum import Enum
+import logging
 from threading import Lock
 
 import numpy as np
@@ -14,6 +15,8 @@ from pyre.interfaces.action import Action
 from pyre.interfaces.viewtype import convert_to_key
 from pyre.viewmodels.imageviewmodel import ImageViewModel
 
+_logger = logging.getLogger(__name__)
+
 
 class ImageViewModelManager(IImageViewModelManager):
     _models = dict[str, ImageViewModel]
@@ -39,7 +42,7 @@ class ImageViewModelManager(IImageViewModelManager):
         return key in self._models
 
     def __delitem__(self, key: str | Enum):
-        print(f"Removing image viewmodel {key}")
+        _logger.debug("Removing image viewmodel %s", key)
         key = convert_to_key(key)
         if key not in self._models:
             raise KeyError(f"Image {key} does not exist in the manager")
@@ -57,7 +60,7 @@ class ImageViewModelManager(IImageViewModelManager):
             if key in self._models:
                 raise KeyError(f"Image {key} already exists in the manager")
 
-            print(f"Adding image viewmodel {key}")
+            _logger.debug("Adding image viewmodel %s", key)
 
             # Create a new ImageViewModel using the NDArray if it is passed, otherwise assume name is a filename
             parameter = key if image is None else image
@@ -0,0 +1,297 @@
+"""
+Sampling profiler that can be toggled while pyre runs.
+
+A background thread records the Python stack of every thread at a fixed interval.  Each sample is
+attributed to the subsystem of the innermost pyre frame that belongs to one, so time spent in numpy,
+OpenGL or nornir is charged to the pyre code that called it.  Samples of worker threads that are not
+running pyre code are idle pool threads and are dropped.  When stopped the samples are written as a
+pstats file, readable with pstats or snakeviz, and a speedscope profile with one synthetic root frame
+per subsystem.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+import logging
+import marshal
+import os
+import sys
+import threading
+import time
+from types import CodeType, FrameType
+
+from dependency_injector.wiring import Provide, inject
+
+import pyre
+from pyre.container import IContainer
+from pyre.interfaces.managers.profiler import IProfiler, ProfileReport
+from pyre.settings import AppSettings
+
+_logger = logging.getLogger(__name__)
+
+_package_dir = os.path.dirname(os.path.abspath(pyre.__file__))
+
+# Paths are relative to the pyre package with / separators.  A rule matches a frame if the path starts with
+# its prefix and, when functions are listed, the frame's function is one of them.  Rules are tested in order.
+_subsystem_rules: list[tuple[str, str, frozenset[str] | None]] = [
+    ('tile tessellation', 'views/gltiles.py', None),
+    ('texture upload', 'gl_engine/textures.py', None),
+    ('texture upload', 'viewmodels/imageviewmodel.py', frozenset(('CreateImageArray',))),
+    ('registration', 'point_registration.py', None),
+    ('registration', 'batch_registration.py', None),
+    ('registration', 'pyramid_registration.py', None),
+    ('registration', 'commands/stos/registercontrolpointcommand.py', None),
+    ('registration', 'state/managers/roi_cache.py', None),
+    ('event dispatch', 'eventmanager.py', None),
+    ('event dispatch', 'ui/events/', None),
+    ('event dispatch', 'observable/', None),
+    ('event dispatch', 'state/managers/command_queue.py', None),
+    ('draw', 'views/', None),
+    ('draw', 'gl_engine/', None),
+    ('draw', 'ui/widgets/glpanel.py', None),
+]
+_idle = 'idle'  # The main thread is waiting in the wx event loop
+_other = 'other'
+
+_idle_functions = frozenset((('launcher.py', 'Run'),))  # Pyre frames that only wait for wx events
+
+FrameKey = tuple[str, int, str]  # (filename, first line, function), the key pstats uses for a function
+
+
+def default_profile_dir() -> str:
+    return os.path.join(os.path.expanduser('~'), '.pyre', 'profiles')
+
+
+class _CodeInfo:
+    """What the profiler needs to know about a code object, cached since the same functions are sampled often"""
+    __slots__ = ('key', 'in_pyre', 'subsystem', 'idle')
+
+    key: FrameKey
+    in_pyre: bool
+    subsystem: str | None
+    idle: bool
+
+    def __init__(self, code: CodeType):
+        self.key = (code.co_filename, code.co_firstlineno, code.co_name)
+        filename = os.path.abspath(code.co_filename)
+        self.in_pyre = filename.startswith(_package_dir + os.sep)
+        self.subsystem = None
+        self.idle = False
+        if not self.in_pyre:
+            return
+
+        relative = filename[len(_package_dir) + 1:].replace(os.sep, '/')
+        self.idle = (relative, code.co_name) in _idle_functions
+        for subsystem, prefix, functions in _subsystem_rules:
+            if relative.startswith(prefix) and (functions is None or code.co_name in functions):
+                self.subsystem = subsystem
+                return
+
+
+class SamplingProfiler(IProfiler):
+    """
+    Samples the stacks of running threads from a background thread.  The overhead is one walk of each thread's
+    stack per interval, and does not depend on how many calls are made, so the profiler can run during normal use.
+    """
+    _interval: float
+    _all_threads: bool
+    _output_dir: str
+    _sampler: threading.Thread | None
+    _stop: threading.Event
+    _started: float
+    _code_info: dict[CodeType, _CodeInfo]
+    # Samples for each (thread name, subsystem, stack from the outermost frame), as [count, seconds]
+    _samples: dict[tuple[str, str, tuple[FrameKey, ...]], list]
+
+    @property
+    def is_running(self) -> bool:
+        return self._sampler is not None
+
+    @inject
+    def __init__(self, settings: AppSettings = Provide[IContainer.settings]):
+        self._interval = settings.profiler.sample_interval_ms / 1000.0
+        self._all_threads = settings.profiler.all_threads
+        self._output_dir = settings.profiler.output_dir if settings.profiler.output_dir is not None else \
+            default_profile_dir()
+        self._sampler = None
+        self._stop = threading.Event()
+        self._code_info = {}
+        self._samples = {}
+
+    def start(self):
+        if self._sampler is not None:
+            return
+
+        self._samples = {}
+        self._stop.clear()
+        self._started = time.perf_counter()
+        self._sampler = threading.Thread(target=self._run, name='pyre profiler', daemon=True)
+        self._sampler.start()
+        _logger.info("Profiler started, sampling every %gms", self._interval * 1000.0)
+
+    def stop(self) -> ProfileReport | None:
+        if self._sampler is None:
+            return None
+
+        self._stop.set()
+        self._sampler.join()
+        self._sampler = None
+        duration = time.perf_counter() - self._started
+
+        subsystem_seconds = {}
+        for (_, subsystem, _), (_, seconds) in self._samples.items():
+            subsystem_seconds[subsystem] = subsystem_seconds.get(subsystem, 0.0) + seconds
+        subsystem_seconds = dict(sorted(subsystem_seconds.items(), key=lambda item: item[1], reverse=True))
+
+        paths = self._write()
+        _logger.info("Profiled %.1fs, wrote %s", duration, ', '.join(paths))
+        for subsystem, seconds in subsystem_seconds.items():
+            _logger.info("  %s: %.3fs", subsystem, seconds)
+
+        return ProfileReport(paths=paths, duration=duration, subsystem_seconds=subsystem_seconds)
+
+    def _info(self, code: CodeType) -> _CodeInfo:
+        info = self._code_info.get(code)
+        if info is None:
+            info = _CodeInfo(code)
+            self._code_info[code] = info
+        return info
+
+    def _run(self):
+        sampler_id = threading.get_ident()
+        main_id = threading.main_thread().ident
+        last = time.perf_counter()
+        while not self._stop.wait(self._interval):
+            now = time.perf_counter()
+            elapsed = now - last
+            last = now
+
+            frames = sys._current_frames()
+            names = {thread.ident: thread.name for thread in threading.enumerate()} if self._all_threads else {}
+            for thread_id, frame in frames.items():
+                if thread_id == sampler_id or (thread_id != main_id and not self._all_threads):
+                    continue
+
+                self._sample(names.get(thread_id, str(thread_id)) if thread_id != main_id else 'main', frame,
+                             thread_id == main_id, elapsed)
+
+            del frames
+
+    def _sample(self, thread_name: str, frame: FrameType, is_main: bool, elapsed: float):
+        stack = []
+        subsystem = None
+        in_pyre = False
+        while frame is not None:
+            info = self._info(frame.f_code)
+            if info.in_pyre:
+                if not in_pyre and info.idle and is_main:
+                    subsystem = _idle  # The innermost pyre frame is waiting for wx events
+                in_pyre = True
+                if subsystem is None:
+                    subsystem = info.subsystem
+            stack.append(info.key)
+            frame = frame.f_back
+
+        if not in_pyre and not is_main:
+            return  # A pool thread waiting for work
+
+        stack.reverse()
+        key = (thread_name, subsystem if subsystem is not None else _other, tuple(stack))
+        sample = self._samples.get(key)
+        if sample is None:
+            self._samples[key] = [1, elapsed]
+        else:
+            sample[0] += 1
+            sample[1] += elapsed
+
+    def _write(self) -> list[str]:
+        try:
+            os.makedirs(self._output_dir, exist_ok=True)
+        except OSError as e:
+            _logger.error("Could not create profile directory %s: %s", self._output_dir, e)
+            return []
+
+        basename = os.path.join(self._output_dir, 'pyre-' + datetime.datetime.now().strftime('%Y%m%d-%H%M%S'))
+        paths = []
+        for path, write in ((basename + '.pstats', self._write_pstats),
+                            (basename + '.speedscope.json', self._write_speedscope)):
+            try:
+                write(path)
+                paths.append(path)
+            except OSError as e:
+                _logger.error("Could not write profile %s: %s", path, e)
+
+        return paths
+
+    @staticmethod
+    def _subsystem_key(subsystem: str) -> FrameKey:
+        return '~', 0, f'<{subsystem}>'
+
+    def _write_pstats(self, path: str):
+        """Write the samples in the marshalled format cProfile.Profile.dump_stats uses, so pstats can load them"""
+        # {function: [primitive calls, calls, own seconds, cumulative seconds, {caller: [same four values]}]}
+        stats: dict[FrameKey, list] = {}
+
+        def add(function: FrameKey, caller: FrameKey | None, count: int, own: float, cumulative: float):
+            entry = stats.get(function)
+            if entry is None:
+                entry = stats[function] = [0, 0, 0.0, 0.0, {}]
+            entry[0] += count
+            entry[1] += count
+            entry[2] += own
+            entry[3] += cumulative
+            if caller is not None:
+                edge = entry[4].setdefault(caller, [0, 0, 0.0, 0.0])
+                edge[0] += count
+                edge[1] += count
+                edge[2] += own
+                edge[3] += cumulative
+
+        for (_, subsystem, stack), (count, seconds) in self._samples.items():
+            stack = (self._subsystem_key(subsystem),) + stack
+            seen = set()
+            for depth, function in enumerate(stack):
+                caller = stack[depth - 1] if depth > 0 else None
+                own = seconds if depth == len(stack) - 1 else 0.0
+                # Recursive calls count once towards cumulative time
+                cumulative = seconds if function not in seen else 0.0
+                seen.add(function)
+                add(function, caller, count, own, cumulative)
+
+        output = {function: (entry[0], entry[1], entry[2], entry[3],
+                             {caller: tuple(edge) for caller, edge in entry[4].items()})
+                  for function, entry in stats.items()}
+        with open(path, 'wb') as file:
+            marshal.dump(output, file)
+
+    def _write_speedscope(self, path: str):
+        """Write a speedscope sampled profile for each thread, weighted by seconds"""
+        frames: list[dict] = []
+        frame_index: dict[FrameKey, int] = {}
+
+        def index(function: FrameKey) -> int:
+            i = frame_index.get(function)
+            if i is None:
+                i = frame_index[function] = len(frames)
+                filename, line, name = function
+                frames.append({'name': name, 'file': filename, 'line': line} if filename != '~' else {'name': name})
+            return i
+
+        profiles: dict[str, dict] = {}
+        for (thread_name, subsystem, stack), (_, seconds) in self._samples.items():
+            profile = profiles.get(thread_name)
+            if profile is None:
+                profile = profiles[thread_name] = {'type': 'sampled', 'name': thread_name, 'unit': 'seconds',
+                                                   'startValue': 0, 'endValue': 0, 'samples': [], 'weights': []}
+            profile['samples'].append([index(self._subsystem_key(subsystem))] + [index(f) for f in stack])
+            profile['weights'].append(seconds)
+            profile['endValue'] += seconds
+
+        document = {'$schema': 'https://www.speedscope.app/file-format-schema.json',
+                    'name': os.path.basename(path),
+                    'exporter': 'pyre',
+                    'activeProfileIndex': 0,
+                    'shared': {'frames': frames},
+                    'profiles': sorted(profiles.values(), key=lambda p: p['name'] != 'main')}
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(document, file)
@@ -10,12 +10,11 @@ a new command for the input.  The first object to return a command is selected a
 
 from __future__ import annotations
 
-from typing import NamedTuple
+from typing import Iterable, NamedTuple, Sequence
 
 import numpy as np
 import rtree
 
-import nornir_imageregistration
 from pyre.command_interfaces import ICommand
 from pyre.interfaces.managers.region_manager import IRegion, IRegionMap
 from pyre.selection_event_data import SelectionEventData
@@ -36,26 +35,80 @@ class RegionMap(IRegionMap, IControlPointActionMap):
 
     object_to_key: dict[IRegion, int]  # Map a specific object instance to a key
     key_to_object: dict[int, IRegion]  # Map a key to a specific object instance
-
-    def __init__(self):
-        self._index = rtree.index.Index(interleaved=True)
+    _key_to_bounds: dict[int, tuple[float, float, float, float]]  # Bounds each key is indexed under
+
+    def __init__(self, regions: Iterable[IRegion] | None = None):
+        """
+        :param regions: Regions to bulk load into the index
+        """
+        self.clear()
+        if regions is not None:
+            self.add_many(regions)
+
+    @staticmethod
+    def _bounds(obj: IRegion) -> tuple[float, float, float, float]:
+        """(MinY, MinX, MaxY, MaxX) of a region, a point region has zero area at its centroid"""
+        bounding_box = obj.bounding_box
+        if bounding_box is None:
+            centroid = obj.centroid
+            return float(centroid[0]), float(centroid[1]), float(centroid[0]), float(centroid[1])
+
+        return tuple(float(value) for value in bounding_box.ToTuple())
 
     def add(self, obj: IRegion) -> int:
         if obj in self.object_to_key:
             raise KeyError("Object already in manager")
 
-        bounds = obj.bounding_box.ToTuple()
+        bounds = self._bounds(obj)
         key = id(obj)
         self.key_to_object[key] = obj
+        self.object_to_key[obj] = key
+        self._key_to_bounds[key] = bounds
         self._index.insert(key, bounds)
         return key
 
+    def add_many(self, objs: Iterable[IRegion]) -> list[int]:
+        objs = list(objs)
+        if len(self.key_to_object) > 0:
+            return [self.add(obj) for obj in objs]
+
+        keys = []
+        for obj in objs:
+            if obj in self.object_to_key:
+                raise KeyError("Object already in manager")
+
+            key = id(obj)
+            self.key_to_object[key] = obj
+            self.object_to_key[obj] = key
+            self._key_to_bounds[key] = self._bounds(obj)
+            keys.append(key)
+
+        if len(keys) > 0:
+            # Stream loading sorts the entries and packs the tree in one pass
+            self._index = rtree.index.Index(((key, self._key_to_bounds[key], None) for key in keys),
+                                            interleaved=True)
+        return keys
+
+    def update(self, key: int) -> bool:
+        if key not in self.key_to_object:
+            return False
+
+        bounds = self._bounds(self.key_to_object[key])
+        old_bounds = self._key_to_bounds[key]
+        if bounds == old_bounds:
+            return True
+
+        self._index.delete(key, old_bounds)
+        self._index.insert(key, bounds)
+        self._key_to_bounds[key] = bounds
+        return True
+
     def tryremove(self, key: int) -> bool:
         if key in self.key_to_object:
             obj = self.key_to_object[key]
             del self.key_to_object[key]
             del self.object_to_key[obj]
-            self._index.delete(key)
+            self._index.delete(key, self._key_to_bounds.pop(key))
             return True
         return False
 
@@ -63,26 +116,39 @@ class RegionMap(IRegionMap, IControlPointActionMap):
         self._index = rtree.index.Index(interleaved=True)
         self.object_to_key = {}
         self.key_to_object = {}
+        self._key_to_bounds = {}
 
     def has_potential_interactions(self, event: SelectionEventData) -> bool:
         return len(self.find_potential_interactions(event)) > 0
 
-    def find_potential_interactions(self, event: SelectionEventData) -> list[InteractionCandidate]:
-        """Determine the list of possible interactions for the event at a world position.
-        First checks the bounding box, then invokes interaction_distance on the object"""
-        world_position = event.world_position
-        bounds = nornir_imageregistration.Rectangle.CreateFromBounds(
-            np.array((world_position[0], world_position[1], world_position[0], world_position[1])))
-        keys = list(self._index.intersection(bounds.ToTuple()))
-        objects = [self.key_to_object[key] for key in keys]
+    def _candidates(self, keys: Iterable[int], event: SelectionEventData) -> list[InteractionCandidate]:
+        """Ask each region for its distance to the event, nearest first"""
         candidates = []  # type: list[InteractionCandidate]
-        for obj in objects:
+        for key in keys:
+            obj = self.key_to_object[int(key)]
             distance = obj.interaction_distance(event)
             if distance is not None:
                 candidates.append(InteractionCandidate(distance, obj))
 
-        sorted_candidates = sorted(candidates, key=lambda x: x.distance)
-        return sorted_candidates
+        return sorted(candidates, key=lambda x: x.distance)
+
+    def find_potential_interactions(self, event: SelectionEventData) -> list[InteractionCandidate]:
+        """Determine the list of possible interactions for the event at a world position.
+        First checks the bounding box, then invokes interaction_distance on the object"""
+        world_position = event.world_position
+        keys = self._index.intersection((world_position[0], world_position[1], world_position[0], world_position[1]))
+        return self._candidates(keys, event)
+
+    def find_potential_interactions_batch(self, events: Sequence[SelectionEventData]) -> list[
+        list[InteractionCandidate]]:
+        """Determine the possible interactions for many events with a single vectorized index query"""
+        if len(events) == 0:
+            return []
+
+        positions = np.array([event.world_position[:2] for event in events], dtype=np.float64)
+        keys, counts = self._index.intersection_v(positions, positions)
+        offsets = np.concatenate(([0], np.cumsum(counts)))
+        return [self._candidates(keys[offsets[i]:offsets[i + 1]], event) for i, event in enumerate(events)]
 
     def try_get_command(self, event: SelectionEventData) -> ICommand | None:
         """Determine the list of possible interactions, and return the first command nearest the interaction point"""
@@ -0,0 +1,92 @@
+"""Caches registration regions of interest so the regions of unchanged points are not warped again"""
+from collections import OrderedDict
+import threading
+
+from dependency_injector.wiring import Provide, inject
+import numpy as np
+from numpy.typing import NDArray
+
+import nornir_imageregistration
+from pyre.container import IContainer
+from pyre.interfaces.action import Action
+from pyre.interfaces.managers.image_manager import IImageManager
+from pyre.interfaces.managers.roi_cache import IRegistrationROICache, ROICacheKey
+from pyre.settings import AppSettings
+
+
+class RegistrationROICache(IRegistrationROICache):
+    """
+    Least recently used cache of regions of interest bounded by total size.  Regions are stored
+    as built, before rotation and padding.  A region is a quarter of the size of its padded FFT,
+    and a point stores one source region instead of an FFT for every search angle, so far more
+    points fit in the budget.  Rotation and the FFTs are redone on a hit.  Entries are keyed by the
+    region geometry, so a point the transform moved misses the cache even if it was not
+    invalidated.  The cache is cleared whenever an image is added to or removed from the
+    image manager.
+    """
+    _entries: OrderedDict[ROICacheKey, NDArray[np.floating]]
+    _indices: dict[int, set[ROICacheKey]]  # Keys stored for each control point index
+    _max_bytes: int
+    _nbytes: int
+    _lock: threading.Lock
+
+    @property
+    def nbytes(self) -> int:
+        return self._nbytes
+
+    @inject
+    def __init__(self,
+                 image_manager: IImageManager = Provide[IContainer.image_manager],
+                 settings: AppSettings = Provide[IContainer.settings]):
+        self._entries = OrderedDict()
+        self._indices = {}
+        self._nbytes = 0
+        self._max_bytes = settings.stos.point_registration.roi_cache_megabytes * 1024 * 1024
+        self._lock = threading.Lock()
+        image_manager.add_change_event_listener(self._on_image_changed)
+
+    def _on_image_changed(self, action: Action, key: str,
+                          image: nornir_imageregistration.ImagePermutationHelper):
+        self.clear()
+
+    def get(self, key: ROICacheKey) -> NDArray[np.floating] | None:
+        with self._lock:
+            value = self._entries.get(key)
+            if value is not None:
+                self._entries.move_to_end(key)
+            return value
+
+    def put(self, key: ROICacheKey, value: NDArray[np.floating]):
+        if value.nbytes > self._max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+
+            self._entries[key] = value
+            self._indices.setdefault(key.index, set()).add(key)
+            self._nbytes += value.nbytes
+
+            while self._nbytes > self._max_bytes:
+                self._remove(next(iter(self._entries)))
+
+    def _remove(self, key: ROICacheKey):
+        value = self._entries.pop(key)
+        self._nbytes -= value.nbytes
+        keys = self._indices[key.index]
+        keys.discard(key)
+        if len(keys) == 0:
+            del self._indices[key.index]
+
+    def invalidate_points(self, indices: set[int] | list[int]):
+        with self._lock:
+            for index in indices:
+                for key in list(self._indices.get(index, ())):
+                    self._remove(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._indices.clear()
+            self._nbytes = 0
@@ -1,3 +1,5 @@
+import logging
+
 import OpenGL.GL as gl
 from dependency_injector.wiring import Provide, inject
 import numpy as np
@@ -12,10 +14,12 @@ from pyre.interfaces.managers import BufferType, GLBufferCollection, IGLContextM
 from pyre.interfaces.eventmanager import IEventManager
 from pyre.interfaces.action import Action
 from pyre.state.events import TransformControllerAddRemoveCallback
-from pyre.controllers.transformcontroller import TransformController
+from pyre.controllers.transformcontroller import TransformChange, TransformController
 
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
     """Tracks the current transform that is being editted.
@@ -29,6 +33,7 @@ class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
     _buffer_layouts: dict[BufferType, VertexArrayLayout]
     _glcontext_manager: IGLContextManager
     _have_context: bool = False  # True if we've got a context from the context manager
+    _uploaded_versions: dict[TransformController, int]  # Version of each controller's points in its buffers
 
     @inject
     def __init__(self,
@@ -37,6 +42,7 @@ class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
         self._glcontext_manager = glcontext_manager
         self._OnTransformControllerAddRemoveEventListeners = wxEventManager[TransformControllerAddRemoveCallback]()
         self._transform_controllers = {}
+        self._uploaded_versions = {}
         self._buffer_layouts = buffer_layouts
         self._OnTransformControllerChangeEventListeners = set()
         self._glcontext_manager.add_glcontext_added_event_listener(self._on_gl_context_added)
@@ -53,7 +59,7 @@ class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
         if transform_controller in self._transform_controllers:
             raise KeyError(f"Transform controller {transform_controller} already exists in the manager")
 
-        print(f'Adding transform controller {transform_controller} with buffer collection {buffer_collection}')
+        _logger.debug('Adding transform controller %s with buffer collection %s', transform_controller, buffer_collection)
 
         self._transform_controllers[transform_controller] = buffer_collection
         self._fire_on_transform_controller_add_remove_event(Action.ADD, transform_controller)
@@ -62,8 +68,9 @@ class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
 
     def remove(self, transform_controller: TransformController):
         """Adds buffers for a transform controller"""
-        print(f'Removing transform controller {transform_controller}')
+        _logger.debug('Removing transform controller %s', transform_controller)
         del self._transform_controllers[transform_controller]
+        self._uploaded_versions.pop(transform_controller, None)
         self._fire_on_transform_controller_add_remove_event(Action.REMOVE, transform_controller)
 
     def _on_gl_context_added(self, context):
@@ -103,12 +110,27 @@ class TransformControllerGLBufferManager(ITransformControllerGLBufferManager):
         output = input[:, [1, 0, 3, 2]]
         return output
 
-    def _on_transform_changed(self, transform_controller: TransformController):
+    def _on_transform_changed(self, transform_controller: TransformController, change: TransformChange):
         """Called when the transform controller changes"""
         buffer_collection = self._transform_controllers[transform_controller]
         if buffer_collection is not None:
+            uploaded_version = self._uploaded_versions.get(transform_controller)
+            if uploaded_version == change.version:
+                return
+
+            # Record the version the change describes, not the controller's.  Points edited after the change was
+            # posted are only listed in the indices of the next notification, whose previous version is this one.
+            self._uploaded_versions[transform_controller] = change.version
             control_point_buffer = buffer_collection[BufferType.ControlPoint]
             num_ctrl_points = len(control_point_buffer.data)
+
+            if change.indices is not None and uploaded_version == change.previous_version and \
+                    num_ctrl_points == transform_controller.NumPoints:
+                # The buffer holds the points as of the last notification, only the edited points changed since
+                indices = np.fromiter(change.indices, dtype=np.intp, count=len(change.indices))
+                control_point_buffer.update_rows(indices, self.__swap_columns(transform_controller.points[indices]))
+                return
+
             if num_ctrl_points != len(transform_controller.points):
                 selection_point_buffer = buffer_collection[BufferType.Selection]
                 selection_point_buffer.data = np.zeros((len(transform_controller.points), 1), dtype=np.uint16)
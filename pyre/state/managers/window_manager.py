@@ -2,6 +2,7 @@
 from __future__ import annotations
 
 from enum import Enum
+import logging
 
 import wx
 
@@ -11,6 +12,8 @@ from pyre.interfaces.managers import IWindowManager, WindowManagerChangeCallback
 from pyre.interfaces.action import Action
 from pyre.interfaces.viewtype import convert_to_key
 
+_logger = logging.getLogger(__name__)
+
 
 # Change event for the ImageManager, passes the key and the ImagePermutationHelper associated with the key
 
@@ -29,14 +32,14 @@ class WindowManager(IWindowManager):
         if key in self._windows:
             raise KeyError(f"Image with key {key} already exists in the manager")
 
-        print(f'Adding window "{key}"')
+        _logger.debug('Adding window "%s"', key)
 
         self._windows[key] = frame
         self._change_event.invoke(Action.ADD, key, frame)
 
     def __delitem__(self, key: str | Enum):
         key = convert_to_key(key)
-        print(f"Removing window {key}")
+        _logger.debug("Removing window %s", key)
         value = self._windows[key]
         del self._windows[key]
         self._change_event.invoke(Action.REMOVE, key, value)
@@ -1,3 +1,4 @@
+import logging
 import os
 import sys
 
@@ -11,6 +12,8 @@ from pyre.viewmodels import ImageViewModel
 from pyre.views import ImageTransformView
 from pyre.controllers.transformcontroller import TransformController
 
+_logger = logging.getLogger(__name__)
+
 
 class MosaicState(StateEventsImpl):
     '''State for viewing a mosiac'''
@@ -57,10 +60,8 @@ class MosaicState(StateEventsImpl):
         if os.path.exists(tile_full_path):
             return mosaic_dir
 
-        print("Unable to locate tiles in directories:")
-        print("  %s" % mosaic_dir)
-        if not tiles_dir is None:
-            print("  %s" % tiles_dir)
+        _logger.warning("Unable to locate tiles in directories:\n  %s%s", mosaic_dir,
+                        "" if tiles_dir is None else "\n  " + tiles_dir)
 
         return None
 
@@ -1,5 +1,6 @@
 import concurrent.futures
 from dataclasses import dataclass
+import logging
 import os
 
 import numpy
@@ -19,6 +20,8 @@ from pyre.viewmodels import ImageViewModel
 from pyre.controllers.transformcontroller import TransformController
 from pyre.interfaces.viewtype import ViewType
 
+_logger = logging.getLogger(__name__)
+
 
 @dataclass
 class StosWindowConfig:
@@ -33,14 +36,14 @@ class StosWindowConfig:
 
 
 def LoadImage(imageFullPath: str) -> ImageViewModel | None:
-    """Loads an image, prints an error and returns None if the file cannot be opened"""
+    """Loads an image, logs an error and returns None if the file cannot be opened"""
     try:
         return ImageViewModel(imageFullPath)
     except IOError as e:
         if not os.path.isfile(imageFullPath):
-            print("Image passed to load image does not exist: " + imageFullPath)
+            _logger.error("Image passed to load image does not exist: %s", imageFullPath)
         else:
-            print(f"Exception opening {imageFullPath}:\n{e}")
+            _logger.error("Exception opening %s:\n%s", imageFullPath, e)
 
         return None
 
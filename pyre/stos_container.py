@@ -1,5 +1,3 @@
-import logging
-import sys
 from dependency_injector import containers, providers
 import wx
 import yaml
@@ -14,7 +12,10 @@ from pyre.state.managers.mousepositionhistorymanager import MousePositionHistory
 from pyre.state.managers.region_manager import RegionMap
 from pyre.state.managers.transformcontroller_glbuffer_manager import TransformControllerGLBufferManager
 from pyre.state.managers.command_history import CommandHistory
+from pyre.state.managers.edit_journal import EditJournal
+from pyre.state.managers.profiler import SamplingProfiler
 from pyre.state.managers.image_manager import ImageManager
+from pyre.state.managers.roi_cache import RegistrationROICache
 from pyre.state.managers.window_manager import WindowManager
 from pyre.state.managers.controlpointmapmanager import ControlPointMapManager
 from pyre.state.imageloader import ImageLoader
@@ -22,6 +23,7 @@ from pyre.state import TransformController
 from pyre.observable.oset import ObservableSet
 from pyre.container import IContainer
 import pyre.commands.stos
+import pyre.log
 from nornir_imageregistration.transforms.transform_type import TransformType
 from pyre.commands.stos import GridTransformActionMap, TriangulationTransformActionMap
 
@@ -35,19 +37,21 @@ class StosContainer(containers.DeclarativeContainer):
     """IoC container for the application components."""
     config = providers.Configuration()
     logger = providers.Resource(
-        logging.basicConfig,
-        level=logging.INFO,
-        stream=sys.stdout,
+        pyre.log.configure_logging,
+        settings=config.logging,
     )
 
     # space = providers.Dependency(instance_of=pyre.Space)
     # view_type = providers.Dependency(instance_of=pyre.ui.ViewType)
 
     history_manager = providers.ThreadSafeSingleton(CommandHistory)
-    region_manager = providers.ThreadSafeSingleton(RegionMap)
+    region_map = providers.ThreadSafeSingleton(RegionMap)
     mouse_position_history = providers.ThreadSafeSingleton(MousePositionHistoryManager)
     command_history = providers.ThreadSafeSingleton(CommandHistory)
+    edit_journal = providers.ThreadSafeSingleton(EditJournal)
+    profiler = providers.ThreadSafeSingleton(SamplingProfiler)
     image_manager = providers.ThreadSafeSingleton(ImageManager)
+    roi_cache = providers.ThreadSafeSingleton(RegistrationROICache)
     transform_glbuffermanager = providers.ThreadSafeSingleton(
         TransformControllerGLBufferManager, buffer_layouts={
             BufferType.ControlPoint: pyre.gl_engine.shaders.controlpointset_shader.pointset_layout,
@@ -160,7 +160,7 @@ class Camera(IReadOnlyCamera):
                  scale: float = 1,
                  angle: float = 0,
                  size=None,
-                 log: logging.Logger = logging.getLogger("camera"),
+                 log: logging.Logger = logging.getLogger(__name__),
                  settings: AppSettings = Provide[IContainer.settings]):
         """
         :param tuple size: Size of the window the camera is within
@@ -237,7 +237,7 @@ class Camera(IReadOnlyCamera):
         half_window_size = (np.array(self.window_size) / self.scale) / 2.0
 
         if aspect == 0:
-            self._log.warn("No aspect ratio in camera.focus")
+            self._log.warning("No aspect ratio in camera.focus")
             return
 
         # self._projection = Mat4.orthogonal_projection(
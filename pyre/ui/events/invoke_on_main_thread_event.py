@@ -1,10 +1,15 @@
+import logging
+import traceback
+
 import wx
 from dependency_injector.wiring import Provide
-import traceback
+
 from pyre.container import IContainer
 
 # from pyre.interfaces import IEventManager
 
+_logger = logging.getLogger(__name__)
+
 # An event that invokes a callback on the main thread
 wx_INVOKE_ON_MAIN_THREAD_EventType = wx.NewEventType()
 wx_EVT_INVOKE_ON_MAIN_THREAD = wx.PyEventBinder(wx_INVOKE_ON_MAIN_THREAD_EventType)
@@ -58,6 +63,6 @@ class wxInvokeOnMainThreadEvent(wx.PyEvent):
             self._obj.invoke(*self._args, **self._kwargs)
         except Exception as e:
             if self.debug:
-                print(f"Exception invoking event {e} from {self._stack}")
+                _logger.error("Exception invoking event %s from %s", e, self._stack)
 
             raise
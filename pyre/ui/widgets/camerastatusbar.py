@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+import logging
+
 from dependency_injector.wiring import Provide, inject
 
 import nornir_imageregistration
@@ -12,7 +14,7 @@ from pyre.container import IContainer
 try:
     import wx
 except:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
 
 
 class CameraStatusBar(wx.StatusBar):
@@ -2,6 +2,7 @@
 
 # import OpenGL as gl
 
+import logging
 from typing import Callable
 
 from dependency_injector.wiring import inject, Provide
@@ -10,6 +11,7 @@ import OpenGL.GL as gl
 
 from pyre.interfaces.managers.gl_context_manager import IGLContextManager
 from pyre.container import IContainer
+import pyre.log
 
 from nornir_imageregistration import in_debug_mode
 
@@ -18,12 +20,15 @@ try:
     import wx.glcanvas
 
 except:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+
+_logger = logging.getLogger(__name__)
+_driver_messages = pyre.log.throttle(1.0, 10)  # Drivers can report a message for every draw call
 
 
 def cb_dbg_msg(source, msg_type, msg_id, severity, length, raw, user):
     msg = raw[0:length]
-    print(f'debug: {source}, {msg_type}, {msg_id}, {severity}, {msg}')
+    _logger.debug('debug: %s, %s, %s, %s, %s', source, msg_type, msg_id, severity, msg, extra=_driver_messages)
 
 
 # DEBUG_CALLBACK_TYPE = gl.GLDEBUGPROC(None, c_uint, c_uint, c_uint, c_uint, c_size_t, POINTER(c_char), c_void_p)
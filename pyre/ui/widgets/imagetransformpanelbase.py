@@ -3,6 +3,7 @@ Created on Feb 6, 2015
 
 @author: u0490822
 """
+import logging
 from abc import abstractmethod
 
 import numpy as np
@@ -12,7 +13,7 @@ from pyre.interfaces.managers import IGLContextManager
 try:
     import wx
 except:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
 
 from dependency_injector.wiring import Provide, inject
 import nornir_imageregistration
@@ -21,6 +22,10 @@ from pyre.ui.widgets import glpanel
 from pyre.ui.widgets.camerastatusbar import CameraStatusBar
 from pyre.controllers.transformcontroller import TransformController
 from pyre.container import IContainer
+import pyre.log
+
+_logger = logging.getLogger(__name__)
+_per_resize = pyre.log.throttle()  # The size is updated for every resize event while the window is dragged
 
 
 class ImageTransformPanelBase:
@@ -141,7 +146,7 @@ class ImageTransformPanelBase:
         # (self._width, self._height) = e.Size.width, e.Size.height
         if self.camera is not None and self._width > 0 and self._height > 0:
             # try:
-            print(f"Setting window size to {self._height}h x {self._width}w")
+            _logger.debug("Setting window size to %dh x %dw", self._height, self._width, extra=_per_resize)
             self.camera.window_size = np.array((self._height, self._width))
             self.camera.focus(self.height, self.width)
             # except:
@@ -5,6 +5,7 @@ Created on Oct 16, 2012
 """
 from __future__ import annotations
 from dataclasses import dataclass
+import logging
 import warnings
 import numpy as np
 
@@ -22,6 +23,7 @@ from pyre.observable import ObservableSet
 from pyre.interfaces.action import Action
 from pyre.interfaces.managers import ICommandQueue, IGLContextManager
 from pyre.interfaces.managers.image_viewmodel_manager import IImageViewModelManager
+import pyre.log
 from pyre.interfaces.managers.transformcontroller_glbuffer_manager import ITransformControllerGLBufferManager, \
     BufferType
 import pyre.interfaces.managers.gl_context_manager
@@ -40,6 +42,9 @@ from nornir_imageregistration.transforms.transform_type import TransformType
 from pyre.interfaces.viewtype import ViewType
 from pyre.views.transformcontrollerview import BinarySelectionMapper, TransformControllerView
 
+_logger = logging.getLogger(__name__)
+_per_drag = pyre.log.throttle()  # The selected point is set for every mouse motion while dragging
+
 
 @dataclass
 class ImageTransformPanelConfig:
@@ -128,8 +133,8 @@ class ImageTransformViewPanel(imagetransformpanelbase.ImageTransformPanelBase):
         if value is not None:
             ImageTransformViewPanel._HighlightedPointIndex = value
 
-        print(
-            f'Set Selected Point Index {value} cdp: {ImageTransformViewPanel._CurrentDragPoint} hpi: {ImageTransformViewPanel._HighlightedPointIndex}')
+        _logger.debug('Set Selected Point Index %s cdp: %s hpi: %s', value, ImageTransformViewPanel._CurrentDragPoint,
+                      ImageTransformViewPanel._HighlightedPointIndex, extra=_per_drag)
 
     @property
     def transform(self) -> nornir_imageregistration.ITransform:
@@ -263,7 +268,7 @@ class ImageTransformViewPanel(imagetransformpanelbase.ImageTransformPanelBase):
 
         # Ensure we load the next command when this command finishes
         self._command.add_completed_callback(self.activate_command)
-        print(f'Activating command: {self._command}')
+        _logger.debug('Activating command: %s', self._command)
         self._command.activate()
 
     def on_imageviewmodelmanager_change(self,
@@ -271,10 +276,10 @@ class ImageTransformViewPanel(imagetransformpanelbase.ImageTransformPanelBase):
                                         action: Action,
                                         image: pyre.viewmodels.ImageViewModel):
         """Called when an imageviewmodel is added or removed from the manager"""
-        print(
-            f'* ImageTransformViewPanel.on_imageviewmodelmanager_change {name} {action.value} self: {self.imagename_space_mapping}')
+        _logger.debug('ImageTransformViewPanel.on_imageviewmodelmanager_change %s %s self: %s', name, action.value,
+                      self.imagename_space_mapping)
         if name not in self.imagename_space_mapping:
-            print('\tDoes not match')
+            _logger.debug('\tDoes not match')
             return  # Not of interest to our class
 
         if action == Action.ADD:
@@ -289,7 +294,7 @@ class ImageTransformViewPanel(imagetransformpanelbase.ImageTransformPanelBase):
         # self._image_transform_view.image_view_model = image
         if self.view_type == ViewType.Composite:
             if self._image_transform_view is None:
-                print('\tAdding CompositeTransformView')
+                _logger.debug('\tAdding CompositeTransformView')
                 self._image_transform_view = CompositeTransformView(display_space=Space.Target,
                                                                     activate_context=self.glcanvas.activate_context,
                                                                     source_image_name=ViewType.Source,
@@ -299,12 +304,12 @@ class ImageTransformViewPanel(imagetransformpanelbase.ImageTransformPanelBase):
                 # The CompositeTransformView should exist and be subscribed so this ViewModel should be added by the View
                 pass
         else:
-            print(f'\tAdding ImageTransformView {name} in space {self.space.value}')
+            _logger.debug('\tAdding ImageTransformView %s in space %s', name, self.space.value)
             self._image_transform_view = ImageTransformView(space=self.space,
                                                             activate_context=self.glcanvas.activate_context,
                                                             image_view_model=image,
                                                             transform_controller=self.transform_controller)
-            print(f'Added image view model {name} to {self.view_type.value} view')
+            _logger.info('Added image view model %s to %s view', name, self.view_type.value)
 
         wx.CallAfter(self.center_camera)
 
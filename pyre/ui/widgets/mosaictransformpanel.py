@@ -4,6 +4,8 @@ Created on Feb 6, 2015
 @author: u0490822
 '''
 
+import logging
+
 import nornir_imageregistration
 import nornir_imageregistration.spatial
 import pyre.state as state
@@ -11,7 +13,7 @@ import pyre.state as state
 try:
     import wx
 except:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
 
 from pyre.ui.widgets import imagetransformpanelbase
 import nornir_imageregistration.transforms.utils as utils
@@ -1,3 +1,5 @@
+import logging
+
 from dependency_injector.wiring import inject, Provide
 from pyre.ui.events.invoke_on_main_thread_event import wxInvokeOnMainThreadEvent, wx_EVT_INVOKE_ON_MAIN_THREAD
 
@@ -11,7 +13,9 @@ try:
 
     matplotlib.use('wx')
 except ImportError:
-    print("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+    logging.getLogger(__name__).warning("Ignoring wx import failure, assumed documentation use, otherwise please install wxPython")
+
+_logger = logging.getLogger(__name__)
 
 
 class PyreWindowBase(wx.Frame):
@@ -29,7 +33,7 @@ class PyreWindowBase(wx.Frame):
                  title):
         wx.Frame.__init__(self, parent, title=title, size=(800, 400))
 
-        print("Parent:" + str(self.Parent))
+        _logger.debug("Parent: %s", self.Parent)
 
         # Listen for events to invoke callbacks on the main thread
         self._ID = windowID
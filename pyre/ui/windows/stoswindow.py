@@ -1,4 +1,7 @@
+import copy
+import logging
 import os
+import threading
 
 from dependency_injector.wiring import Provide, inject
 import wx
@@ -13,17 +16,21 @@ import pyre
 from pyre.settings import AppSettings, StosSettings, ImageAndMaskPath
 from pyre.space import Space
 from pyre.container import IContainer
-from pyre.interfaces.managers import ICommandHistory, IImageManager, IImageViewModelManager, IImageLoader
+from pyre.interfaces.managers import ICommandHistory, IEditJournal, IImageManager, IImageViewModelManager, IImageLoader, \
+    IProfiler
 import pyre.state
 from pyre.interfaces.viewtype import ViewType
 from pyre.interfaces.named_tuples import LoadStosResult
 import pyre.ui
+import pyre.views.tile_export
 from pyre.ui.widgets import ImageTransformViewPanel
 from pyre.ui.windows.filedrop import FileDrop
 from pyre.ui.windows.pyrewindows import PyreWindowBase
 from pyre.stos_container import StosContainer
 from pyre.observable import ObservableSet
 
+_logger = logging.getLogger(__name__)
+
 
 class StosWindow(PyreWindowBase):
     stosfilename = ''
@@ -37,6 +44,8 @@ class StosWindow(PyreWindowBase):
     _transform_controller: pyre.state.TransformController
     _imageviewmodel_manager: IImageViewModelManager = Provide[IContainer.imageviewmodel_manager]
     _history_manager: ICommandHistory = Provide[IContainer.history_manager]
+    _edit_journal: IEditJournal = Provide[IContainer.edit_journal]
+    _profiler: IProfiler = Provide[IContainer.profiler]
     _config = Provide[IContainer.config]
     _settings: AppSettings = Provide[IContainer.settings]
     _image_manager: IImageManager = Provide[IContainer.image_manager]
@@ -245,12 +254,12 @@ class StosWindow(PyreWindowBase):
         transform_type = self.__get_transform_type_from_menuitem(selected_item)
 
         if pyre.state.currentStosConfig.TransformType == transform_type:
-            print(f"transform is already {transform_type}, no change")
+            _logger.info("Transform is already %s, no change", transform_type)
             return
 
         converter_kwargs = self.GetTransformConfig(transform_type)
         if converter_kwargs is None:
-            print("User cancelled settings, transform conversion aborted")
+            _logger.info("User cancelled settings, transform conversion aborted")
             return
 
         # pyre.history.SaveState(setattr, pyre.state.currentStosConfig.TransformController, 'TransformModel',
@@ -262,7 +271,7 @@ class StosWindow(PyreWindowBase):
                 source_image_shape=source_imageviewmodel.Image.shape,
                 **converter_kwargs)
 
-        print(f"Changed transform type to {transform_type}")
+        _logger.info("Changed transform type to %s", transform_type)
         self.UpdateTransformTypeChecks(menu)
         return
 
@@ -381,6 +390,12 @@ class StosWindow(PyreWindowBase):
 
         self.Bind(wx.EVT_MENU, self.OnClearAllPoints, menuClear)
 
+        # Every window has this item, the check is refreshed when a menu opens to match the shared profiler
+        self.menuProfile = menu.AppendCheckItem(wx.ID_ANY, "&Profile\tCtrl+Shift+P",
+                                                "Sample where time is spent and write a profile when stopped")
+        self.Bind(wx.EVT_MENU, self.OnToggleProfiler, self.menuProfile)
+        self.Bind(wx.EVT_MENU_OPEN, self.OnMenuOpen)
+
         return menu
 
     def __CreateFileMenu(self):
@@ -411,6 +426,10 @@ class StosWindow(PyreWindowBase):
         menuSaveWarpedImage = filemenu.Append(wx.ID_ANY, "&Save Warped Image")
         self.Bind(wx.EVT_MENU, self.OnSaveWarpedImage, menuSaveWarpedImage)
 
+        if self.Composite:
+            menuExportTiles = filemenu.Append(wx.ID_ANY, "&Export Composite Tiles")
+            self.Bind(wx.EVT_MENU, self.OnExportCompositeTiles, menuExportTiles)
+
         filemenu.AppendSeparator()
 
         menuExit = filemenu.Append(wx.ID_EXIT, "&Exit")
@@ -464,6 +483,24 @@ class StosWindow(PyreWindowBase):
         pyre.Windows[ViewType.Target].setPosition()
         pyre.Windows[ViewType.Source].setPosition()
 
+    def OnMenuOpen(self, e):
+        self.menuProfile.Check(self._profiler.is_running)
+        e.Skip()
+
+    def OnToggleProfiler(self, e):
+        report = self._profiler.toggle()
+        self.menuProfile.Check(self._profiler.is_running)
+        if report is None:
+            return
+
+        lines = [f"Profiled {report.duration:.1f}s"]
+        lines.extend(f"{subsystem}: {seconds:.2f}s" for subsystem, seconds in report.subsystem_seconds.items())
+        lines.append("")
+        lines.extend(report.paths)
+        dlg = wx.MessageDialog(self, '\n'.join(lines), "Profile", wx.OK)
+        dlg.ShowModal()
+        dlg.Destroy()
+
     def OnInstructions(self, e):
 
         dlg = wx.MessageDialog(self, self._config["readme"], "Keyboard Instructions", wx.OK)
@@ -479,29 +516,33 @@ class StosWindow(PyreWindowBase):
             targetImageView.Image.shape)
 
     def OnClearMaskedPoints(self, e):
-        if not (
-                pyre.state.currentStosConfig.FixedImageMaskViewModel is None or pyre.state.currentStosConfig.WarpedImageMaskViewModel is None):
-            pyre.common.ClearPointsOnMask(self._transform_controller.TransformModel,
-                                          pyre.state.currentStosConfig.FixedImageMaskViewModel.Image,
-                                          pyre.state.currentStosConfig.WarpedImageMaskViewModel.Image)
+        if ViewType.Source not in self._image_manager or ViewType.Target not in self._image_manager:
+            _logger.warning("Need source and target images loaded to clear masked points")
+            return
 
-        elif not pyre.state.currentStosConfig.FixedImageMaskViewModel is None:
-            pyre.common.ClearPointsOnMask(self._transform_controller.TransformModel,
-                                          pyre.state.currentStosConfig.FixedImageMaskViewModel.Image, None)
+        fixed_mask = self._image_manager[ViewType.Target].BlendedMask
+        warped_mask = self._image_manager[ViewType.Source].BlendedMask
+        if fixed_mask is None and warped_mask is None:
+            return
 
-        elif not pyre.state.currentStosConfig.WarpedImageMaskViewModel is None:
-            pyre.common.ClearPointsOnMask(self._transform_controller.TransformModel, None,
-                                          pyre.state.currentStosConfig.WarpedImageMaskViewModel.Image)
+        original_points = self._transform_controller.CopyPoints()
+        num_removed = pyre.common.ClearPointsOnMask(self._transform_controller, fixed_mask, warped_mask)
+        self._history_manager.RecordPointEdit(self._transform_controller, original_points)
+        _logger.info("Removed %d points on masked regions", num_removed)
 
     def OnFlipImage(self, e):
+        original_points = self.transform_controller.CopyPoints()
         self.transform_controller.FlipWarped()
+        self._history_manager.RecordPointEdit(self.transform_controller, original_points)
 
     def OnRotateTranslate(self, e):
         settings = self._settings.stos.brute_registration
         resulting_transform = pyre.common.RotateTranslateWarpedImage(source_image_key=Space.Source,
                                                                      target_image_key=Space.Target,
                                                                      settings=settings,
-                                                                     LimitImageSize=True
+                                                                     LimitImageSize=True,
+                                                                     UsePyramid=self._settings.stos.rigid_pyramid,
+                                                                     RefineWindow=self._settings.stos.rigid_refine_window
                                                                      )
 
         if resulting_transform is not None:
@@ -510,19 +551,67 @@ class StosWindow(PyreWindowBase):
     def OnRefineGrid(self, e):
         if self._settings.stos.source_image is None or \
                 self._settings.stos.target_image is None:
-            print("Need both images loaded with a transform to run refine grid")
+            _logger.warning("Need both images loaded with a transform to run refine grid")
             return None
 
         user_settings = pyre.ui.windows.RefineGridSettingsDialog.GetGridRefineSettings(self)
-        if user_settings is not None:
-            with nornir_imageregistration.settings.GridRefinement.CreateWithPreprocessedImages(
-                    source_img_data=self._image_manager[ViewType.Source],
-                    target_img_data=self._image_manager[ViewType.Target],
-                    num_iterations=user_settings.num_iterations,
-                    grid_spacing=user_settings.grid_spacing,
-                    cell_size=user_settings.cell_size,
-                    angles_to_search=user_settings.angle_range) as grid_refinement_settings:
-                pyre.common.GridRefineTransform(grid_refinement_settings)
+        if user_settings is None:
+            return
+
+        # The refinement reads a snapshot, the transform is only replaced if it was not edited or replaced while
+        # refining.  Edits in place keep the model, only the controller's version shows them.
+        original_version = self._transform_controller.version
+        transform = copy.deepcopy(self._transform_controller.TransformModel)
+        source_image = self._image_manager[ViewType.Source]
+        target_image = self._image_manager[ViewType.Target]
+
+        progress_dlg = wx.ProgressDialog("Refine Grid", f"Iteration 0 of {user_settings.num_iterations}",
+                                         maximum=user_settings.num_iterations, parent=self,
+                                         style=wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME |
+                                               wx.PD_REMAINING_TIME)
+        cancel_event = threading.Event()
+
+        def update_dialog(completed: int, total: int, seconds: float):
+            keep_going, _ = progress_dlg.Update(completed,
+                                                f"Iteration {completed} of {total}, last took {seconds:.1f}s")
+            if not keep_going:
+                cancel_event.set()
+
+        def on_progress(completed: int, total: int, seconds: float) -> bool:
+            # Runs on the refinement thread, the dialog may only be touched from the UI thread
+            wx.CallAfter(update_dialog, completed, total, seconds)
+            return not cancel_event.is_set()
+
+        def replace_transform(refined: nornir_imageregistration.ITransform | None):
+            if refined is None:
+                return
+
+            if self._transform_controller.version != original_version:
+                _logger.warning("Transform was changed during grid refinement, discarding the refined transform")
+                return
+
+            self._transform_controller.TransformModel = refined
+
+        def refine():
+            refined = None
+            try:
+                refined = pyre.common.GridRefineTransform(transform,
+                                                          source_image=source_image,
+                                                          target_image=target_image,
+                                                          num_iterations=user_settings.num_iterations,
+                                                          cell_size=user_settings.cell_size,
+                                                          grid_spacing=user_settings.grid_spacing,
+                                                          angles_to_search=user_settings.angle_range,
+                                                          progress=on_progress,
+                                                          SavePlots=self._settings.debug)
+            except Exception as e:
+                _logger.exception("Exception running grid refinement")
+            finally:
+                wx.CallAfter(progress_dlg.Destroy)
+                wx.CallAfter(replace_transform, refined)
+
+        pool = pools.GetGlobalThreadPool()
+        pool.add_task("Refine grid", refine)
 
     def OnOpenFixedImage(self, e):
         dlg = wx.FileDialog(self, "Choose a fixed image", StosWindow.imagedirname, "", "*.*", wx.FD_OPEN)
@@ -592,12 +681,17 @@ class StosWindow(PyreWindowBase):
                  image_loader: IImageLoader = Provide[IContainer.image_loader],
                  stos_transform_controller: pyre.state.TransformController = Provide[
                      StosContainer.transform_controller],
-                 settings: pyre.settings.AppSettings = Provide[IContainer.settings]) -> LoadStosResult | None:
+                 settings: pyre.settings.AppSettings = Provide[IContainer.settings],
+                 history_manager: ICommandHistory = Provide[IContainer.history_manager],
+                 edit_journal: IEditJournal = Provide[IContainer.edit_journal]) -> LoadStosResult | None:
         try:
             load_result = image_loader.load_stos(filename)
             settings.stos.stos_filename = filename
             transform = nornir_imageregistration.transforms.LoadTransform(load_result.stos.Transform)
             stos_transform_controller.TransformModel = transform
+            # Edits of the previous transform cannot be applied to the loaded one
+            history_manager.Clear()
+            edit_journal.set_stos_filename(filename)
 
             settings.stos.source_image = ImageAndMaskPath(image_fullpath=load_result.source.image_fullpath,
                                                           mask_fullpath=load_result.source.mask_fullpath)
@@ -607,28 +701,98 @@ class StosWindow(PyreWindowBase):
             return load_result
 
         except Exception as e:
-            print("Error loading stos file: {e}")
-            pass
+            _logger.exception("Error loading stos file")
 
     def OnSaveWarpedImage(self, e):
-        # Set the path for the output directory.
-        if not (
-                pyre.state.currentStosConfig.FixedImageViewModel is None or pyre.state.currentStosConfig.WarpedImageViewModel is None):
-            dlg = wx.FileDialog(self, "Choose a Directory", StosWindow.imagedirname, "", "*.png", wx.FD_SAVE)
-            if dlg.ShowModal() == wx.ID_OK:
-                StosWindow.imagedirname = dlg.GetDirectory()
-                self.filename = dlg.GetFilename()
-                pyre.state.currentStosConfig.OutputImageFullPath = os.path.join(StosWindow.imagedirname, self.filename)
-
-                #                 common.SaveRegisteredWarpedImage(pyre.state.currentStosConfig.OutputImageFullPath,
-                #                                                  pyre.state.currentStosConfig.transform,
-                #                                                  pyre.state.currentStosConfig.WarpedImageViewModel.Image)
-                pool = pools.GetGlobalThreadPool()
-                pool.add_task("Save " + pyre.state.currentStosConfig.OutputImageFullPath,
-                              pyre.common.SaveRegisteredWarpedImage,
-                              pyre.state.currentStosConfig.OutputImageFullPath,
-                              pyre.state.currentStosConfig.Transform,
-                              pyre.state.currentStosConfig.WarpedImageViewModel.Image)
+        """Warp the source image into target space on a background thread, tiff output is streamed chunk by chunk"""
+        if ViewType.Source not in self._image_manager or ViewType.Target not in self._image_manager:
+            _logger.warning("Need source and target images loaded to save a warped image")
+            return
+
+        dlg = wx.FileDialog(self, "Choose a Directory", StosWindow.imagedirname, "",
+                            "Tiled TIFF (*.tif)|*.tif|PNG (*.png)|*.png", wx.FD_SAVE)
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+
+        StosWindow.imagedirname = dlg.GetDirectory()
+        self.filename = dlg.GetFilename()
+        output_path = os.path.join(StosWindow.imagedirname, self.filename)
+        dlg.Destroy()
+
+        # The export reads a snapshot, every chunk is warped by the transform as it was when the export started
+        transform = copy.deepcopy(self._transform_controller.TransformModel)
+        warped_image = self._image_manager[ViewType.Source].Image
+        target_shape = self._image_manager[ViewType.Target].Image.shape
+
+        progress_dlg = wx.ProgressDialog("Save Warped Image", output_path, maximum=100, parent=self,
+                                         style=wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME)
+        cancel_event = threading.Event()
+
+        def update_dialog(completed: int, total: int):
+            keep_going, _ = progress_dlg.Update(int((completed * 100) / total), f"Chunk {completed} of {total}")
+            if not keep_going:
+                cancel_event.set()
+
+        def on_progress(completed: int, total: int) -> bool:
+            # Runs on the export thread, the dialog may only be touched from the UI thread
+            wx.CallAfter(update_dialog, completed, total)
+            return not cancel_event.is_set()
+
+        def report_failure(error: Exception):
+            dlg = wx.MessageDialog(self, f"Unable to save {output_path}\n{error}", "Save Warped Image",
+                                   wx.OK | wx.ICON_ERROR)
+            dlg.ShowModal()
+            dlg.Destroy()
+
+        def save():
+            # Nothing waits on the pool task, a failed chunk must be reported here or it is lost
+            try:
+                pyre.common.SaveRegisteredWarpedImage(output_path, transform, warped_image, target_shape,
+                                                      progress=on_progress)
+            except Exception as error:
+                _logger.exception("Error saving warped image %s", output_path)
+                wx.CallAfter(report_failure, error)
+            finally:
+                wx.CallAfter(progress_dlg.Destroy)
+
+        pool = pools.GetGlobalThreadPool()
+        pool.add_task("Save " + output_path, save)
+
+    def OnExportCompositeTiles(self, e):
+        """Render the composite view tile by tile at full resolution into a PNG tile directory or tiled TIFF"""
+        view = self.imagepanel.image_transform_view
+        if view is None or ViewType.Target not in self._image_manager:
+            _logger.warning("Need a target image loaded to export composite tiles")
+            return
+
+        dlg = wx.FileDialog(self, "Choose a TIFF file or tile directory name", StosWindow.imagedirname, "",
+                            "Tiled TIFF (*.tif)|*.tif|PNG tile directory (*)|*", wx.FD_SAVE)
+        if dlg.ShowModal() != wx.ID_OK:
+            dlg.Destroy()
+            return
+
+        StosWindow.imagedirname = dlg.GetDirectory()
+        output_path = os.path.join(StosWindow.imagedirname, dlg.GetFilename())
+        dlg.Destroy()
+
+        target_shape = self._image_manager[ViewType.Target].Image.shape
+        bounds = nornir_imageregistration.Rectangle.CreateFromPointAndArea((0, 0), target_shape)
+
+        progress_dlg = wx.ProgressDialog("Export Composite Tiles", output_path, maximum=100, parent=self,
+                                         style=wx.PD_CAN_ABORT | wx.PD_AUTO_HIDE | wx.PD_ELAPSED_TIME)
+
+        def on_progress(completed: int, total: int) -> bool:
+            keep_going, _ = progress_dlg.Update(int((completed * 100) / total), f"Tile {completed} of {total}")
+            return keep_going
+
+        try:
+            pyre.views.tile_export.export_view(view, space=Space.Target, bounds=bounds, output_path=output_path,
+                                               scale=1.0, pyramid_levels=4,
+                                               activate_context=self.imagepanel.glcanvas.activate_context,
+                                               progress=on_progress)
+        finally:
+            progress_dlg.Destroy()
 
     def OnSaveStos(self, e):
         if not (self._transform_controller is None):
@@ -655,6 +819,7 @@ class StosWindow(PyreWindowBase):
                         self._settings.stos.target_image.mask_fullpath,
                         self._settings.stos.source_image.mask_fullpath, )
                     stosObj.Save(fullpath)
+                    self._edit_journal.set_stos_filename(fullpath)
                 except ValueError:
                     prettyoutput.LogErr(f"Error saving stos file {fullpath}")
             dlg.Destroy()
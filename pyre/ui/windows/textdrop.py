@@ -1,5 +1,12 @@
+import logging
+
 import wx
 
+import pyre.log
+
+_logger = logging.getLogger(__name__)
+_per_event = pyre.log.throttle()  # Drag over is reported for every mouse motion
+
 
 class TextDrop(wx.TextDropTarget):
     def __init__(self, window):
@@ -7,8 +14,8 @@ class TextDrop(wx.TextDropTarget):
         self.window = window
 
     def OnDragOver(self, *args, **kwargs):
-        print("DragOver Text")
+        _logger.debug("DragOver Text", extra=_per_event)
         return wx.TextDropTarget.OnDragOver(self, *args, **kwargs)
 
     def OnDropText(self, x, y, data):
-        print(str(data))
+        _logger.info("Dropped text %s", data)
@@ -1,23 +1,21 @@
 import numpy as np
 from numpy.typing import NDArray
-import scipy.spatial
 
 from pyre.space import Space
-from pyre.controllers.transformcontroller import TransformController
+from pyre.controllers.transformcontroller import TransformChange, TransformController
 
 
 class ControlPointMap:
     """
     Has a collection of points that represent a transform,
-    creates a searchable spatial data structure,
+    searches them through the transform controller's spatial index,
     and assists in mapping interactions to commands
     """
 
     _transformcontroller: TransformController
-    _kdtree: scipy.spatial.KDTree
     _tween: float | Space
-    _cached_tween_points: NDArray[np.floating] = None
     _cached_points: NDArray[np.floating] = None  # The cached source and target points
+    _cached_version: int | None = None  # Transform controller version the cached points were computed at
 
     def __init__(self, transformcontroller: TransformController,
                  tween: float | Space):
@@ -29,13 +27,17 @@ class ControlPointMap:
         self._tween = tween
         self._transformcontroller = transformcontroller
         self._transformcontroller.AddOnChangeEventListener(self._OnTransformChange)
-        self.create_kdtree()
+        self.update_index()
 
-    def _OnTransformChange(self, transform_controller: TransformController):
-        self.create_kdtree()
+    def _OnTransformChange(self, transform_controller: TransformController, change: TransformChange):
+        self.update_index()
 
     @property
     def points(self) -> NDArray[np.floating]:
+        # Edits are visible here before the coalesced change notification reaches _OnTransformChange
+        self.update_index()
+        if self._cached_points is None:
+            self._cached_points = self._transformcontroller.spatial_index.positions(self._tween)
         return self._cached_points
 
     @property
@@ -49,12 +51,13 @@ class ControlPointMap:
 
     @tween.setter
     def tween(self, value: float | Space):
+        """The index covers every tween, changing it only changes how queries are answered"""
         self._tween = value
-        self.create_kdtree()
+        self._cached_points = None
 
     @property
     def cached_tween_points(self) -> NDArray[np.floating]:
-        return self._kdtree.data
+        return self.points
 
     @staticmethod
     def tweened_points(transform_controller: TransformController, tween: float | Space) -> NDArray[np.floating]:
@@ -67,25 +70,20 @@ class ControlPointMap:
             return (transform_controller.SourcePoints * (1.0 - tween) +
                     transform_controller.TargetPoints * tween)
 
-    def create_kdtree(self):
-        """Create a KDTree from the current control points, if they have changed"""
-        new_points = self.tweened_points(self._transformcontroller, self.tween)
-        if self._cached_points is not None and \
-                np.allclose(self._cached_points.shape, new_points.shape) and \
-                np.allclose(self._cached_points, new_points):
-            """If there is no change, do not rebuild expensive KDTree"""
+    def update_index(self):
+        """Drop cached points if the control points have changed.  The spatial index is owned by the transform controller."""
+        version = self._transformcontroller.version
+        if self._cached_version == version:
             return
 
-        self._kdtree = scipy.spatial.KDTree(new_points,
-                                            copy_data=True,
-                                            # Copy data.  If the transform changes we need to notice so we can regenerate
-                                            balanced_tree=True)
-        self._cached_points = new_points
+        self._cached_points = None
+        self._cached_version = version
 
-        # print('KDTree created')
-
-    def find_nearest_within(self, points: NDArray[np.floating], max_distance: float) -> set[int]:
-        """Find the nearest point to the given point within max_distance"""
-        return set(self._kdtree.query_ball_point(points,
-                                                 r=max_distance,
-                                                 return_sorted=True))
+    def find_nearest_within(self, points: NDArray[np.floating], max_distance: float,
+                            tween: float | Space | None = None) -> set[int]:
+        """
+        Find the nearest point to the given point within max_distance
+        :param tween: Tween to test the points at, defaults to the map's tween
+        """
+        tween = self._tween if tween is None else tween
+        return set(self._transformcontroller.FindPointsWithin(points, max_distance, tween).tolist())
@@ -6,7 +6,6 @@ Created on Oct 17, 2012
 
 import logging
 import math
-import sys
 from typing import Generator
 
 import OpenGL.GL as gl
@@ -18,7 +17,7 @@ import nornir_imageregistration
 from nornir_shared.mathhelper import NearestPowerOfTwo
 import pyre.gl_engine as gl_engine
 
-Logger = logging.getLogger("ImageArray")
+Logger = logging.getLogger(__name__)
 
 
 class ImageViewModel:
@@ -115,7 +114,7 @@ class ImageViewModel:
         '''Convert the passed _Image to a Luminance Texture, cutting the image into smaller images as necessary'''
         if isinstance(input_image, str):
 
-            Logger.info("Loading image: " + input_image)
+            Logger.info("Loading image: %s", input_image)
             self._ImageFilename = input_image
 
             self._Image = nornir_imageregistration.LoadImage(input_image, dtype=np.float16) * 255  # //
@@ -176,10 +175,7 @@ class ImageViewModel:
 
         texture_grid = list()  # type: list[list[int]]
 
-        print_output = self.NumCols > 1 and self.NumRows > 1
-
-        if print_output:
-            print('\nConverting image to ' + str(self.NumCols) + "x" + str(self.NumRows) + ' grid of OpenGL textures')
+        Logger.info('Converting image to %dx%d grid of OpenGL textures', self.NumCols, self.NumRows)
 
         for iX in range(0, self.width, self.TextureSize[nornir_imageregistration.iPoint.X]):
             columnTextures = list()  # type: list[int]
@@ -190,14 +186,9 @@ class ImageViewModel:
             if pad_image:
                 end_iX = self.Image.shape[1]
 
-            if print_output:
-                sys.stdout.write('\n')
-
             # print "ix " + str(iX)
             for iY in range(0, self.height, self.TextureSize[nornir_imageregistration.iPoint.Y]):
 
-                if print_output:
-                    sys.stdout.write('.')
                 lastRow = iY + self.TextureSize[nornir_imageregistration.iPoint.Y] > self.height
 
                 end_iY = iY + self.TextureSize[nornir_imageregistration.iPoint.Y]
@@ -223,9 +214,6 @@ class ImageViewModel:
 
             texture_grid.append(columnTextures)
 
-        if print_output:
-            print('\nTexture creation complete\n')
-
         Logger.info("Completed CreateImageArray")
         return texture_grid
 
@@ -5,7 +5,7 @@ from numpy.typing import NDArray
 import nornir_imageregistration
 from pyre.gl_engine import GLBuffer
 from pyre.gl_engine.shaders import controlpointset_shader
-from pyre.controllers.transformcontroller import TransformController
+from pyre.controllers.transformcontroller import TransformChange, TransformController
 
 
 class TransformGLViewModel:
@@ -58,7 +58,8 @@ class TransformGLViewModel:
         if self._transform_controller is not None:
             self._transform_controller.AddOnChangeEventListener(self._OnTransformChange)
 
-    def _OnTransformChange(self):
+    def _OnTransformChange(self, transform_controller: TransformController | None = None,
+                           change: TransformChange | None = None):
         if self._transform_model is None:
             self._point_buffer.points = np.zeros((0, 4), dtype=np.float32)
             return
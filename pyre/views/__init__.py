@@ -1,6 +1,7 @@
 __all__ = ['CompositeTransformView', 'ImageTransformView', 'MosaicView']
 
 import ctypes
+import logging
 
 import OpenGL.GL as gl
 from OpenGL.arrays import vbo
@@ -14,6 +15,8 @@ from .imagetransformview import ImageTransformView
 from .mosaicview import MosaicView
 from .pointset_view import PointSetView
 
+_logger = logging.getLogger(__name__)
+
 
 def LineIndiciesFromTri(T: scipy.spatial.Delaunay) -> list[int]:
     """
@@ -70,7 +73,7 @@ def VertsForRectangle(rect):
 
     Points = numpy.hstack((verts, numpy.ones((4, 1))))
 
-    print("rect: %s" % (str(rect)))
+    _logger.debug("rect: %s", rect)
 
     FlatPoints = Points.ravel().tolist()
     vertarray = (gl.GLfloat * len(FlatPoints))(*FlatPoints)
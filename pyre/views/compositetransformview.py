@@ -3,6 +3,7 @@ Created on Oct 19, 2012
 
 @author: u0490822
 """
+import logging
 from multiprocessing.managers import Value
 from typing import Callable
 
@@ -25,6 +26,8 @@ from pyre.controllers.transformcontroller import TransformController
 from pyre.views.interfaces import IImageTransformView
 from pyre.container import IContainer
 
+_logger = logging.getLogger(__name__)
+
 
 class CompositeTransformView(IImageTransformView):
     """
@@ -172,10 +175,10 @@ class CompositeTransformView(IImageTransformView):
                                         action: Action,
                                         image: pyre.viewmodels.ImageViewModel):
         """Called when an imageviewmodel is added or removed from the manager"""
-        print(
-            f'* CompositeTransformView.on_imageviewmodelmanager_change {name} {action.value} self: {self._nameset}')
+        _logger.debug('CompositeTransformView.on_imageviewmodelmanager_change %s %s self: %s', name, action.value,
+                      self._nameset)
         if name not in self._nameset:
-            print('\tDoes not match')
+            _logger.debug('\tDoes not match')
             return  # Not of interest to our class
 
         if action == Action.ADD:
@@ -194,7 +197,7 @@ class CompositeTransformView(IImageTransformView):
                                   activate_context=self._activate_context,
                                   image_view_model=image,
                                   transform_controller=self._transform_controller)
-        print(f'Added image view model {name} to existing CompositeTransformView')
+        _logger.info('Added image view model %s to existing CompositeTransformView', name)
 
         if space_mapping == Space.Source:
             self._source_image_view = view
@@ -301,6 +304,8 @@ class CompositeTransformView(IImageTransformView):
         # 1. Render each image to a FrameBufferObject
         # 2. Render both FrameBufferObjects to the screen, blending the results according to the overlay type
         if self._source_image_view is not None and self._target_image_view is not None:
+            # Return to the caller's frame buffer when finished so we can be rendered offscreen
+            output_fbo = int(gl.glGetIntegerv(gl.GL_DRAW_FRAMEBUFFER_BINDING))
 
             source_fbo = self._source_frame_buffer.get_or_create_fbo(client_size)
             gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, source_fbo)
@@ -320,7 +325,7 @@ class CompositeTransformView(IImageTransformView):
 
             self._target_image_view.draw(view_proj, space, client_size, bounding_box)
 
-            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, output_fbo)
             # OK, we have two textures with the rendered+transformed images of source and target images.
             # Inject textures into an overlay renderer and blend the images
             # ortho_projection = pyre.ui.camera.Camera.orthogonal_projection(-1, 1,
@@ -22,7 +22,7 @@ from pyre.space import Space
 from pyre.views.gltiles import RenderCache, RenderDataMap, TileGLObjects
 import pyre.views.gltiles as gltiles
 from pyre.views.interfaces import IImageTransformView
-from pyre.controllers.transformcontroller import TransformController
+from pyre.controllers.transformcontroller import TransformChange, TransformController
 
 
 class ImageTransformView(IImageTransformView):
@@ -137,7 +137,7 @@ class ImageTransformView(IImageTransformView):
 
         self.update_all_tile_buffers()
 
-    def OnTransformChanged(self, transform_controller: TransformController):
+    def OnTransformChanged(self, transform_controller: TransformController, change: TransformChange | None = None):
         if self._gl_initialized:
             self.update_all_tile_buffers()
 
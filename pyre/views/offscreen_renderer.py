@@ -0,0 +1,111 @@
+"""
+Headless counterpart of GLPanel.  Drives ImageTransformView, CompositeTransformView and
+TransformControllerView into an offscreen context and returns the rendered pixels.
+"""
+from typing import Callable
+
+from dependency_injector.wiring import Provide, inject
+import OpenGL.GL as gl
+import numpy as np
+from numpy.typing import NDArray
+
+import pyre
+from pyre.container import IContainer
+from pyre.gl_engine.offscreen_context import OffscreenBackend, OffscreenGLContext
+from pyre.interfaces.managers.gl_context_manager import IGLContextManager
+from pyre.views import ClearDrawTextureState, SetDrawTextureState
+from pyre.views.interfaces import IImageTransformView
+from pyre.views.transformcontrollerview import TransformControllerView
+
+
+class OffscreenRenderer:
+    """
+    Owns an offscreen GL context.  The context is registered with the GLContextManager
+    so shaders, textures and view objects are created for it exactly as for a window.
+    """
+    _context: OffscreenGLContext
+
+    @property
+    def context(self) -> OffscreenGLContext:
+        return self._context
+
+    @property
+    def size(self) -> tuple[int, int]:
+        """Size of the rendered image (height, width)"""
+        return self._context.size
+
+    @inject
+    def __init__(self,
+                 size: tuple[int, int],
+                 backend: OffscreenBackend | None = None,
+                 glcontext_manager: IGLContextManager = Provide[IContainer.glcontext_manager]):
+        """
+        :param size: Size of the rendered image (height, width)
+        :param backend: EGL or OSMesa, defaults to the PyOpenGL platform
+        """
+        self._context = OffscreenGLContext(size, backend)
+        self._context.activate()
+        glcontext_manager.add_context(self._context)
+
+    def activate_context(self):
+        """Make the offscreen context current, passed to views as their activate_context callable"""
+        self._context.activate()
+
+    def resize(self, size: tuple[int, int]):
+        self._context.resize(size)
+
+    def render(self, draw_method: Callable[[], None]) -> NDArray[np.uint8]:
+        """Clear the surface, invoke draw_method and return the (height, width, 4) RGBA result"""
+        self._context.activate()
+        height, width = self._context.size
+
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        gl.glViewport(0, 0, width, height)
+        gl.glClearDepth(10000.0)
+        gl.glClearColor(0, 0, 0, 1)
+        gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+        gl.glEnable(gl.GL_BLEND)
+        gl.glEnable(gl.GL_POLYGON_OFFSET_FILL)
+        gl.glEnable(gl.GL_DEPTH_TEST)
+        gl.glDepthFunc(gl.GL_LESS)
+        gl.glDisable(gl.GL_CULL_FACE)
+
+        draw_method()
+
+        gl.glFinish()
+        return self._context.read_pixels()
+
+    def render_view(self,
+                    camera: 'pyre.ui.Camera',
+                    space: pyre.Space,
+                    image_transform_view: IImageTransformView | None,
+                    transform_controller_view: TransformControllerView | None = None,
+                    control_point_scale: float = 10.0) -> NDArray[np.uint8]:
+        """
+        Render views the same way ImageTransformViewPanel.draw does
+        :param camera: Camera positioned over the region to render, its window size is set to the surface size
+        :param space: Space to render the image in
+        :param control_point_scale: Radius of control points in pixels
+        """
+        height, width = self._context.size
+        camera.window_size = np.array((height, width))
+        camera.focus(width, height)
+
+        def draw():
+            if image_transform_view is not None:
+                SetDrawTextureState()
+                image_transform_view.draw(camera.view_proj,
+                                          space=space,
+                                          client_size=(height, width),
+                                          bounding_box=camera.VisibleImageBoundingBox)
+                ClearDrawTextureState()
+
+            if transform_controller_view is not None:
+                tween = 0 if space == pyre.Space.Source else 1
+                point_scale = (1 / camera.scale) * control_point_scale
+                transform_controller_view.draw(camera.view_proj, tween=tween, scale_factor=point_scale)
+
+        return self.render(draw)
+
+    def release(self):
+        self._context.release()
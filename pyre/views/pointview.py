@@ -151,8 +151,16 @@ class PointView:
         self._vao.add_index_buffer(self._indicies)
         self._vao.end_init()
 
-    def draw(self, view_proj_matrix: NDArray[np.floating], tween: float, scale_factor: float):
-        """Draw the points"""
+    def draw(self, view_proj_matrix: NDArray[np.floating], tween: float, scale_factor: float,
+             selected_offset: NDArray[np.floating] | None = None):
+        """
+        Draw the points
+        :param selected_offset: 2x2 array of (Y,X) offsets added to selected points, source space in the first row
+        and target space in the second
+        """
+        if selected_offset is not None:
+            selected_offset = np.asarray(selected_offset, dtype=np.float32)[:, ::-1]
+
         gl.glDisable(gl.GL_DEPTH_TEST)
         gl.glEnable(gl.GL_BLEND)
         gl.glBlendFunc(gl.GL_SRC_ALPHA, gl.GL_ONE_MINUS_SRC_ALPHA)
@@ -160,5 +168,6 @@ class PointView:
                                                            self._texture_array,
                                                            self._vao,
                                                            len(self._point_buffer.data),
-                                                           tween=tween, scale=scale_factor)
+                                                           tween=tween, scale=scale_factor,
+                                                           selected_offset=selected_offset)
         gl.glEnable(gl.GL_DEPTH_TEST)
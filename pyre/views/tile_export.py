@@ -0,0 +1,235 @@
+"""
+Exports what a view renders at full resolution, one tile at a time.
+
+Tiles are rendered into an offscreen frame buffer object and read back through a pair of
+pixel pack buffers, so the GPU draws the next tile while the previous one is copied to
+client memory.  Tiles are streamed to a writer as they arrive, so memory use depends only
+on the tile size and not on the size of the exported region.
+
+The exported row 0 is the smallest Y coordinate of the region, matching the array layout
+of images loaded by nornir_imageregistration.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Generator, Iterable
+import math
+import os
+import tempfile
+
+import OpenGL.GL as gl
+import numpy as np
+from numpy.typing import NDArray
+from PIL import Image
+
+import nornir_imageregistration
+from pyre.gl_engine import FrameBuffer
+from pyre.gl_engine.pixel_pack_buffer import PixelPackBuffer
+from pyre.space import Space
+from pyre.ui.camera import Camera
+from pyre.views import ClearDrawTextureState, SetDrawTextureState
+from pyre.views.interfaces import IImageTransformView
+
+TileResult = tuple[int, int, NDArray[np.uint8]]  # (row, column, RGBA pixels)
+TileCallback = Callable[[int, int], bool]  # (tiles completed, total tiles), return False to cancel
+
+
+def tile_grid_shape(bounds: nornir_imageregistration.Rectangle, scale: float, tile_size: int) -> tuple[int, int]:
+    """Number of (rows, columns) of tiles needed to cover bounds at the scale"""
+    return (int(math.ceil((bounds.Height * scale) / tile_size)),
+            int(math.ceil((bounds.Width * scale) / tile_size)))
+
+
+def tile_view_proj(center: NDArray[np.floating], tile_size: int, scale: float) -> NDArray[np.floating]:
+    """View projection matrix for a tile_size x tile_size tile centered on a (Y,X) world coordinate"""
+    half = (tile_size / scale) / 2.0
+    projection = Camera.orthogonal_projection(-half, half, -half, half, -255, 255)
+    view = Camera.look_at(position=np.array((center[1], center[0], +1.0)),
+                          target=np.array((center[1], center[0], -1.0)),
+                          up=np.array((0, 1, 0)))
+    return view @ projection
+
+
+def render_tiles(view: IImageTransformView,
+                 space: Space,
+                 bounds: nornir_imageregistration.Rectangle,
+                 scale: float = 1.0,
+                 tile_size: int = 1024,
+                 activate_context: Callable[[], None] | None = None,
+                 progress: TileCallback | None = None) -> Generator[TileResult, None, None]:
+    """
+    Render a view over bounds and yield tiles in row-major order
+    :param bounds: Region of the display space to export
+    :param scale: Output pixels per world unit
+    :param tile_size: Width and height of each tile in pixels
+    :param activate_context: Called before GL calls are made in case another context became current
+    :param progress: Called after each tile, returning False stops the export
+    """
+    if activate_context is not None:
+        activate_context()
+
+    num_rows, num_cols = tile_grid_shape(bounds, scale, tile_size)
+    total = num_rows * num_cols
+    world_tile_size = tile_size / scale
+    origin = np.array(bounds.BottomLeft, dtype=float)
+
+    frame_buffer = FrameBuffer()
+    readers = (PixelPackBuffer(), PixelPackBuffer())
+    pending: tuple[int, int, PixelPackBuffer] | None = None
+    previous_viewport = gl.glGetIntegerv(gl.GL_VIEWPORT)
+    completed = 0
+
+    try:
+        fbo = frame_buffer.get_or_create_fbo((tile_size, tile_size))
+        for index in range(total):
+            iy, ix = divmod(index, num_cols)
+            center = origin + (np.array((iy, ix), dtype=float) + 0.5) * world_tile_size
+
+            if activate_context is not None:
+                activate_context()
+
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, fbo)
+            gl.glViewport(0, 0, tile_size, tile_size)
+            gl.glClearColor(0, 0, 0, 0)
+            gl.glClear(gl.GL_COLOR_BUFFER_BIT | gl.GL_DEPTH_BUFFER_BIT)
+
+            SetDrawTextureState()
+            view.draw(tile_view_proj(center, tile_size, scale),
+                      space=space,
+                      client_size=(tile_size, tile_size),
+                      bounding_box=nornir_imageregistration.Rectangle.CreateFromCenterPointAndArea(
+                          center, (world_tile_size, world_tile_size)))
+            ClearDrawTextureState()
+
+            # Views may bind their own frame buffers, read from ours
+            gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, fbo)
+            reader = readers[index % 2]
+            reader.begin_read(tile_size, tile_size)
+
+            if pending is not None:
+                yield pending[0], pending[1], pending[2].end_read()
+                completed += 1
+                if progress is not None and progress(completed, total) is False:
+                    return
+
+            pending = (iy, ix, reader)
+
+        if pending is not None:
+            yield pending[0], pending[1], pending[2].end_read()
+            completed += 1
+            if progress is not None:
+                progress(completed, total)
+    finally:
+        gl.glBindFramebuffer(gl.GL_FRAMEBUFFER, 0)
+        gl.glViewport(*[int(v) for v in previous_viewport])
+        for reader in readers:
+            reader.free()
+        frame_buffer.free_fbo()
+
+
+def write_png_tiles(tiles: Iterable[TileResult], output_dir: str, downsample: int = 1) -> int:
+    """
+    Write tiles to a pyramid level directory, output_dir/<downsample>/X<col>_Y<row>.png
+    :return: Number of tiles written
+    """
+    level_dir = os.path.join(output_dir, f'{downsample:03d}')
+    os.makedirs(level_dir, exist_ok=True)
+
+    count = 0
+    for iy, ix, pixels in tiles:
+        Image.fromarray(pixels).save(os.path.join(level_dir, f'X{ix:03d}_Y{iy:03d}.png'))
+        count += 1
+
+    return count
+
+
+def write_tiff(tiles_by_level: Iterable[tuple[tuple[int, int], Iterable[TileResult]]],
+               output_path: str,
+               tile_size: int):
+    """
+    Stream tiles into a tiled BigTIFF.  The first level is the full resolution image, later levels
+    are written as reduced resolution sub-IFDs to form a pyramid.  Requires the tifffile package.
+    :param tiles_by_level: ((height, width) of the level, tiles of the level) for each level
+    """
+    try:
+        import tifffile
+    except ImportError as e:
+        raise ImportError("Tiled TIFF export requires the tifffile package, or export a PNG tile directory") from e
+
+    levels = list(tiles_by_level)
+    with tifffile.TiffWriter(output_path, bigtiff=True) as tif:
+        for i_level, (shape, tiles) in enumerate(levels):
+            grid_rows, grid_cols = (int(math.ceil(shape[0] / tile_size)), int(math.ceil(shape[1] / tile_size)))
+            tif.write((pixels for _, _, pixels in tiles),
+                      shape=(grid_rows * tile_size, grid_cols * tile_size, 4),
+                      dtype=np.uint8,
+                      tile=(tile_size, tile_size),
+                      photometric='rgb',
+                      extrasamples=['unassalpha'],
+                      compression='zlib',
+                      subifds=len(levels) - 1 if i_level == 0 else None,
+                      subfiletype=1 if i_level > 0 else 0)
+
+
+def export_view(view: IImageTransformView,
+                space: Space,
+                bounds: nornir_imageregistration.Rectangle,
+                output_path: str,
+                scale: float = 1.0,
+                tile_size: int = 1024,
+                pyramid_levels: int = 1,
+                activate_context: Callable[[], None] | None = None,
+                progress: TileCallback | None = None) -> bool:
+    """
+    Export a view to a PNG tile directory, or a tiled TIFF if output_path ends with .tif/.tiff.
+    Each pyramid level after the first is rendered at half the scale of the previous level.
+    :param progress: Called after each tile with the tiles completed and the total over every level,
+                     returning False stops the export
+    :return: False if the export was cancelled
+    """
+    scales = [scale / (2 ** level) for level in range(pyramid_levels)]
+    level_totals = [math.prod(tile_grid_shape(bounds, s, tile_size)) for s in scales]
+    total = sum(level_totals)
+    cancelled = False
+
+    def level_tiles(level: int) -> Generator[TileResult, None, None]:
+        if cancelled:
+            return
+
+        offset = sum(level_totals[:level])
+
+        def on_progress(completed: int, _: int) -> bool:
+            nonlocal cancelled
+            if progress is not None and progress(offset + completed, total) is False:
+                cancelled = True
+            return not cancelled
+
+        yield from render_tiles(view, space, bounds, scale=scales[level], tile_size=tile_size,
+                                activate_context=activate_context, progress=on_progress)
+
+    if os.path.splitext(output_path)[1].lower() in {'.tif', '.tiff'}:
+        # Written beside the output and renamed once complete, a cancelled export leaves no partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)),
+                                         suffix=os.path.splitext(output_path)[1])
+        os.close(fd)
+        try:
+            try:
+                write_tiff((((int(math.ceil(bounds.Height * s)), int(math.ceil(bounds.Width * s))), level_tiles(level))
+                            for level, s in enumerate(scales)),
+                           temp_path, tile_size)
+            except Exception:
+                # tifffile objects to the tile stream ending early when the export is cancelled
+                if not cancelled:
+                    raise
+
+            if not cancelled:
+                os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+    else:
+        for level in range(len(scales)):
+            if cancelled:
+                break
+            write_png_tiles(level_tiles(level), output_path, downsample=2 ** level)
+
+    return not cancelled
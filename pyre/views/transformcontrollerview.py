@@ -53,6 +53,7 @@ class TransformControllerView:
     _gl_context_manager: pyre.interfaces.managers.IGLContextManager = Provide[IContainer.glcontext_manager]
 
     _initialized: bool = False
+    _drawn_version: int | None = None  # Transform controller version the control point buffer was last updated from
 
     def __init__(self,
                  transform_controller: pyre.controllers.TransformController | None):
@@ -101,9 +102,11 @@ class TransformControllerView:
         if self._controlpoint_view is None:
             return
 
-        if np.allclose(self._controlpoint_view.points, self._transform_controller.points):
+        if self._drawn_version == self._transform_controller.version:
             return
 
+        self._drawn_version = self._transform_controller.version
+
         reset_selection = len(self._controlpoint_view.texture_index) != self._controlpoint_view.points.shape[0]
 
         self._controlpoint_view.points = self._transform_controller.points
@@ -117,6 +120,7 @@ class TransformControllerView:
             return
 
         self._controlpoint_view.points = self._transform_controller.points
+        self._drawn_version = self._transform_controller.version
         self.selected = None
 
     @property
@@ -161,4 +165,5 @@ class TransformControllerView:
         if self._controlpoint_view is None:
             return
 
-        self._controlpoint_view.draw(model_view_proj_matrix, tween, scale_factor)
+        self._controlpoint_view.draw(model_view_proj_matrix, tween, scale_factor,
+                                     selected_offset=self._transform_controller.preview_offset)
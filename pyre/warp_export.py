@@ -0,0 +1,209 @@
+"""
+Warps a source image into target space one chunk at a time.
+
+The source image is copied into shared memory once.  Worker processes attach to it by
+name and warp a single chunk of target space each, so the full image is never pickled
+per task.  Chunks are collected in row-major order and streamed to the writer as they
+complete, so peak memory depends on the chunk size and the number of chunks in flight
+rather than on the size of the target image.
+"""
+from __future__ import annotations
+
+from collections.abc import Callable, Generator
+import math
+import os
+import tempfile
+
+import numpy as np
+from numpy.typing import NDArray
+import scipy.ndimage
+
+import nornir_imageregistration
+import nornir_pools
+from pyre.shared_array import SharedArray, SharedArrayHandle, attach
+
+ChunkResult = tuple[int, int, NDArray]  # (row, column, warped pixels)
+ChunkCallback = Callable[[int, int], bool]  # (chunks completed, total chunks), return False to cancel
+
+
+def chunk_grid_shape(target_shape: tuple[int, int], chunk_size: int) -> tuple[int, int]:
+    """Number of (rows, columns) of chunks needed to cover the target shape"""
+    return (int(math.ceil(target_shape[0] / chunk_size)),
+            int(math.ceil(target_shape[1] / chunk_size)))
+
+
+def warp_chunk(source_handle: SharedArrayHandle,
+               transform: nornir_imageregistration.ITransform,
+               origin: tuple[int, int],
+               chunk_size: int) -> NDArray:
+    """
+    Warp a chunk_size x chunk_size region of target space from a source image in shared memory.
+    Runs in a worker process.  Target pixels that map outside the source image are zero.
+    :param origin: (Y,X) target space coordinate of the chunk's first pixel
+    """
+    with attach(source_handle) as source:
+        ys, xs = np.mgrid[origin[0]:origin[0] + chunk_size, origin[1]:origin[1] + chunk_size]
+        target_points = np.column_stack((ys.ravel(), xs.ravel())).astype(np.float64, copy=False)
+        source_points = np.asarray(transform.InverseTransform(target_points), dtype=np.float64)
+
+        # Points the transform cannot map come back as NaN, send them outside the image
+        source_points[~np.isfinite(source_points)] = -1
+
+        warped = scipy.ndimage.map_coordinates(source, source_points.T, order=1, mode='constant', cval=0)
+        return warped.reshape((chunk_size, chunk_size)).astype(source.dtype, copy=False)
+
+
+def warp_chunks(transform: nornir_imageregistration.ITransform,
+                target_shape: tuple[int, int],
+                source_image: NDArray,
+                chunk_size: int = 2048,
+                pool: nornir_pools.poolbase | None = None,
+                max_pending: int | None = None,
+                progress: ChunkCallback | None = None) -> Generator[ChunkResult, None, None]:
+    """
+    Warp source_image into target space and yield full chunk_size x chunk_size chunks in
+    row-major order.  Chunks on the right and bottom edges are padded with zeros.
+    :param pool: Process pool to warp chunks in, defaults to the local machine pool
+    :param max_pending: Maximum chunks submitted but not yet yielded, defaults to twice the cpu count
+    :param progress: Called after each chunk, returning False stops the export
+    """
+    if pool is None:
+        if nornir_imageregistration.in_debug_mode():
+            pool = nornir_pools.GetGlobalSerialPool()
+        else:
+            pool = nornir_pools.GetGlobalLocalMachinePool()
+
+    if max_pending is None:
+        max_pending = 2 * (os.cpu_count() or 1)
+
+    num_rows, num_cols = chunk_grid_shape(target_shape, chunk_size)
+    total = num_rows * num_cols
+
+    pending = []
+    shared_source = SharedArray(source_image)
+    try:
+        next_index = 0
+        completed = 0
+        cancelled = False
+
+        while completed < total:
+            while not cancelled and next_index < total and len(pending) < max_pending:
+                iy, ix = divmod(next_index, num_cols)
+                task = pool.add_task(f"Warp chunk {iy},{ix}", warp_chunk,
+                                     shared_source.handle, transform, (iy * chunk_size, ix * chunk_size), chunk_size)
+                pending.append((iy, ix, task))
+                next_index += 1
+
+            if not pending:
+                return
+
+            iy, ix, task = pending.pop(0)
+            chunk = task.wait_return()
+            if cancelled:
+                # Drain chunks already handed to workers before the shared memory is released
+                continue
+
+            yield iy, ix, chunk
+            completed += 1
+            if progress is not None and progress(completed, total) is False:
+                cancelled = True
+    finally:
+        # Workers may still be attached if the consumer stopped iterating early
+        for _, _, task in pending:
+            try:
+                task.wait_return()
+            except Exception:
+                pass
+
+        shared_source.close()
+
+
+def assemble_chunks(chunks: Generator[ChunkResult, None, None],
+                    target_shape: tuple[int, int],
+                    dtype: np.dtype,
+                    chunk_size: int) -> NDArray:
+    """Copy chunks into a single image of target_shape, cropping the padding of edge chunks"""
+    output = np.zeros(target_shape, dtype=dtype)
+    for iy, ix, pixels in chunks:
+        y, x = iy * chunk_size, ix * chunk_size
+        height, width = output[y:y + chunk_size, x:x + chunk_size].shape
+        output[y:y + height, x:x + width] = pixels[:height, :width]
+
+    return output
+
+
+def write_tiff(chunks: Generator[ChunkResult, None, None],
+               target_shape: tuple[int, int],
+               dtype: np.dtype,
+               output_path: str,
+               chunk_size: int):
+    """Stream chunks into a tiled BigTIFF, one TIFF tile per chunk.  Requires the tifffile package."""
+    try:
+        import tifffile
+    except ImportError as e:
+        raise ImportError("Streaming warped image export requires the tifffile package") from e
+
+    # tifffile crops the padding of edge tiles to the image shape
+    with tifffile.TiffWriter(output_path, bigtiff=True) as tif:
+        tif.write((pixels for _, _, pixels in chunks),
+                  shape=target_shape,
+                  dtype=dtype,
+                  tile=(chunk_size, chunk_size),
+                  photometric='minisblack',
+                  compression='zlib')
+
+
+def export_warped_image(output_path: str,
+                        transform: nornir_imageregistration.ITransform,
+                        target_shape: tuple[int, int],
+                        source_image: NDArray,
+                        chunk_size: int = 2048,
+                        pool: nornir_pools.poolbase | None = None,
+                        progress: ChunkCallback | None = None) -> bool:
+    """
+    Warp source_image into target space and save it.  A .tif/.tiff output is written chunk by
+    chunk to a tiled BigTIFF.  Other formats cannot be streamed, the chunks are assembled into
+    one image and saved with nornir_imageregistration.ImageSave.
+    :param chunk_size: Width and height of each chunk, must be a multiple of 16 for TIFF output
+    :return: False if the export was cancelled.  A chunk that fails to warp raises its exception, and no
+    output is written.
+    """
+    target_shape = (int(target_shape[0]), int(target_shape[1]))
+    cancelled = False
+
+    def on_progress(completed: int, total: int) -> bool:
+        nonlocal cancelled
+        if progress is not None and progress(completed, total) is False:
+            cancelled = True
+        return not cancelled
+
+    chunks = warp_chunks(transform, target_shape, source_image, chunk_size=chunk_size, pool=pool,
+                         progress=on_progress)
+
+    if os.path.splitext(output_path)[1].lower() in {'.tif', '.tiff'}:
+        # Written beside the output and renamed once complete, a failed or cancelled export leaves no partial file
+        fd, temp_path = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(output_path)),
+                                         suffix=os.path.splitext(output_path)[1])
+        os.close(fd)
+        try:
+            try:
+                write_tiff(chunks, target_shape, source_image.dtype, temp_path, chunk_size)
+            except Exception:
+                # tifffile objects to the chunk stream ending early when the export is cancelled
+                if not cancelled:
+                    raise
+
+            if not cancelled:
+                os.replace(temp_path, output_path)
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+        return not cancelled
+
+    output = assemble_chunks(chunks, target_shape, source_image.dtype, chunk_size)
+    if cancelled:
+        return False
+
+    nornir_imageregistration.ImageSave(output_path, output)
+    return True
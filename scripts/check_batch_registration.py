@@ -0,0 +1,62 @@
+'''
+Compares batched FFT point registration with registering each point on its own.
+
+Usage: python check_batch_registration.py <stos file> [points] [tolerance in pixels]
+
+Registers a sample of the stos file's control points both ways and prints the difference in
+peak, weight and angle of each point.  Exits with status 1 if any peak differs by more than the
+tolerance or the best angles differ.
+'''
+
+import sys
+
+import numpy as np
+
+
+def _load(image_path: str, mask_path: str | None):
+    import nornir_imageregistration
+    image = nornir_imageregistration.LoadImage(image_path)
+    mask = nornir_imageregistration.LoadImage(mask_path) if mask_path else None
+    return nornir_imageregistration.ImagePermutationHelper(image, mask)
+
+
+if __name__ == '__main__':
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit(2)
+
+    stos_path = sys.argv[1]
+    num_points = int(sys.argv[2]) if len(sys.argv) > 2 else 32
+    tolerance = float(sys.argv[3]) if len(sys.argv) > 3 else 1.0
+
+    import nornir_imageregistration
+    from nornir_imageregistration.files.stosfile import StosFile
+    import pyre.batch_registration
+    from pyre.settings import AngleSearchRange, PointRegistrationSettings
+
+    stos = StosFile.Load(stos_path)
+    transform = nornir_imageregistration.transforms.LoadTransform(stos.Transform)
+    target = _load(stos.ControlImageFullPath, stos.ControlMaskFullPath)
+    source = _load(stos.MappedImageFullPath, stos.MappedMaskFullPath)
+
+    # Search angles on both sides of zero so a rotation turning the wrong way shows up as an angle difference
+    settings = PointRegistrationSettings(angle_search_range=AngleSearchRange(max_angle=7.5, angle_step_size=2.5))
+    alignment_area = tuple(settings.alignment_area_shape)
+    angles = settings.angles_to_search
+
+    target_points = transform.TargetPoints
+    rng = np.random.default_rng(0)
+    sample = rng.choice(len(target_points), size=min(num_points, len(target_points)), replace=False)
+
+    differences = pyre.batch_registration.compare_with_point_registration(
+        transform, target, source, target_points[np.sort(sample)], alignment_area, angles)
+
+    failed = False
+    print(f"{'point':>6} {'peak distance':>14} {'weight ratio':>13} {'angle':>6}")
+    for difference in differences:
+        point_failed = difference.peak_distance > tolerance or difference.angle_difference > 0
+        failed = failed or point_failed
+        print(f"{difference.index:>6} {difference.peak_distance:>14.3f} {difference.weight_ratio:>13.3f} "
+              f"{difference.angle_difference:>6.1f}{'  FAIL' if point_failed else ''}")
+
+    sys.exit(1 if failed else 0)